@@ -3,15 +3,22 @@
 Module for handling account balance operations on the XRPL blockchain.
 This module provides functionality to:
 - Get account balances
+- Get trustline (issued currency) balances
+- Fetch XRP and RLUSD balances for many accounts concurrently
 - Monitor balance changes
 - Track balance history
 """
 
 import asyncio
-from typing import Dict, List, Optional
-from xrpl.models.requests import AccountInfo
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.models.requests import AccountInfo, AccountLines
 from xrpl.models.response import ResponseStatus
 
+from config.blockchain_config import BALANCE_CONFIG
 from .client import get_client
 # from ..config.logger_config import setup_logger
 
@@ -86,6 +93,243 @@ async def get_formatted_balance(account_address: str) -> Optional[Dict]:
         print(f"Traceback: {traceback.format_exc()}")
         return None
 
+@dataclass
+class CurrencyBalance:
+    """Balance of a single trustline (issued currency) held by an account."""
+    currency: str
+    issuer: str
+    value: str
+    limit: str
+
+@dataclass
+class AccountBalances:
+    """XRP and trustline balances of an XRPL account."""
+    address: str
+    xrp_drops: str
+    sequence: int
+    currencies: List[CurrencyBalance] = field(default_factory=list)
+
+    def get(self, currency: str, issuer: Optional[str] = None) -> Optional[CurrencyBalance]:
+        """
+        Get the trustline balance for a currency.
+        
+        Args:
+            currency: The currency code (e.g. "RLUSD")
+            issuer: Only match trustlines to this issuer (optional)
+            
+        Returns:
+            The matching CurrencyBalance or None if the account has no such trustline
+        """
+        for balance in self.currencies:
+            if balance.currency == currency and (issuer is None or balance.issuer == issuer):
+                return balance
+        return None
+
+    def filtered(self, issuers: Iterable[str], currencies: Iterable[str]) -> "AccountBalances":
+        """
+        Get a copy with only the trustlines of the given issuers and currencies.
+        
+        Args:
+            issuers: Issuers to keep
+            currencies: Currency codes to keep
+            
+        Returns:
+            The filtered AccountBalances
+        """
+        issuers, currencies = set(issuers), set(currencies)
+        return replace(self, currencies=[
+            balance for balance in self.currencies if balance.issuer in issuers and balance.currency in currencies
+        ])
+
+class BalanceCache:
+    """
+    Bounded LRU cache of the balances of accounts, keyed by address.
+    
+    Entries hold all trustlines of an account, so callers filter by issuer and currency
+    after the lookup and every filter combination shares one entry per account.
+    """
+    
+    def __init__(self, max_size: int = BALANCE_CONFIG["cache_max_size"],
+                 ttl_seconds: float = BALANCE_CONFIG["cache_ttl_seconds"]):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_size: Maximum number of accounts kept; the least recently used is evicted first
+            ttl_seconds: Time after which an account's balances are fetched again
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._balances: "OrderedDict[str, Tuple[float, AccountBalances]]" = OrderedDict()
+    
+    def get(self, address: str) -> Optional[AccountBalances]:
+        """Get the cached balances of an account, dropping them if they are stale."""
+        entry = self._balances.get(address)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= self.ttl_seconds:
+            del self._balances[address]
+            return None
+        self._balances.move_to_end(address)
+        return entry[1]
+    
+    def put(self, balances: AccountBalances) -> None:
+        """Cache the balances of an account, evicting the least recently used beyond max_size."""
+        self._balances[balances.address] = (time.monotonic(), balances)
+        self._balances.move_to_end(balances.address)
+        while len(self._balances) > self.max_size:
+            self._balances.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._balances.clear()
+    
+    def __len__(self) -> int:
+        return len(self._balances)
+
+# Unfiltered balances served from cache
+_balance_cache = BalanceCache()
+
+def decode_currency_code(currency: str) -> str:
+    """
+    Decode a 160-bit hex currency code (e.g. RLUSD) into its ASCII form.
+    
+    Args:
+        currency: Currency code as returned by the ledger
+        
+    Returns:
+        The ASCII currency code, or the input unchanged if it is a standard code
+    """
+    if len(currency) != 40:
+        return currency
+    try:
+        return bytes.fromhex(currency).rstrip(b"\x00").decode("ascii")
+    except ValueError:
+        return currency
+
+async def get_account_lines(account_address: str, client: Optional[AsyncJsonRpcClient] = None) -> Optional[List[Dict]]:
+    """
+    Get all trustlines for an XRPL account, following pagination markers.
+    
+    Args:
+        account_address: The XRPL account address to query
+        client: The XRPL client to use (a new one is created if not given)
+        
+    Returns:
+        List of trustline dictionaries or None if error occurs
+    """
+    client = client or get_client()
+    lines = []
+    marker = None
+    while True:
+        response = await client.request(AccountLines(account=account_address, marker=marker))
+        if response.status != ResponseStatus.SUCCESS:
+            return None
+        lines.extend(response.result.get('lines', []))
+        marker = response.result.get('marker')
+        if not marker:
+            return lines
+
+async def get_account_balances(
+    account_address: str,
+    issuers: Optional[Iterable[str]] = None,
+    currencies: Optional[Iterable[str]] = None,
+    client: Optional[AsyncJsonRpcClient] = None
+) -> Optional[AccountBalances]:
+    """
+    Get XRP and trustline balances for an account.
+    
+    The account_info and account_lines requests are sent concurrently. Trustlines
+    are filtered to the given issuers and currencies.
+    
+    Args:
+        account_address: The XRPL account address to query
+        issuers: Issuers to report (defaults to BALANCE_CONFIG["issuers"])
+        currencies: Currency codes to report (defaults to BALANCE_CONFIG["currencies"])
+        client: The XRPL client to use (a new one is created if not given)
+        
+    Returns:
+        AccountBalances or None if the account could not be queried
+    """
+    balances = await _fetch_account_balances(account_address, client or get_client())
+    if balances is None:
+        return None
+    return balances.filtered(BALANCE_CONFIG["issuers"] if issuers is None else issuers,
+                             BALANCE_CONFIG["currencies"] if currencies is None else currencies)
+
+async def _fetch_account_balances(account_address: str, client: AsyncJsonRpcClient) -> Optional[AccountBalances]:
+    """Get XRP and all trustline balances of an account (see get_account_balances)."""
+    info_response, lines = await asyncio.gather(
+        client.request(AccountInfo(account=account_address)),
+        get_account_lines(account_address, client)
+    )
+    if info_response.status != ResponseStatus.SUCCESS or lines is None:
+        return None
+    
+    account_data = info_response.result.get('account_data', {})
+    balances = AccountBalances(
+        address=account_address,
+        xrp_drops=account_data.get('Balance', '0'),
+        sequence=account_data.get('Sequence', 0)
+    )
+    for line in lines:
+        balances.currencies.append(CurrencyBalance(
+            currency=decode_currency_code(line['currency']),
+            issuer=line['account'],
+            value=line['balance'],
+            limit=line['limit']
+        ))
+    return balances
+
+async def get_balances(
+    addresses: Iterable[str],
+    issuers: Optional[Iterable[str]] = None,
+    currencies: Optional[Iterable[str]] = None,
+    max_concurrency: Optional[int] = None,
+    use_cache: bool = True
+) -> Dict[str, AccountBalances]:
+    """
+    Get XRP and trustline balances for many accounts concurrently.
+    
+    Args:
+        addresses: The XRPL account addresses to query
+        issuers: Issuers to report (defaults to BALANCE_CONFIG["issuers"])
+        currencies: Currency codes to report (defaults to BALANCE_CONFIG["currencies"])
+        max_concurrency: Maximum number of accounts queried in parallel
+            (defaults to BALANCE_CONFIG["max_concurrency"])
+        use_cache: Serve balances fetched within BALANCE_CONFIG["cache_ttl_seconds"] from cache
+        
+    Returns:
+        Dictionary mapping each address to its balances. Addresses that could not
+        be queried are omitted.
+    """
+    issuers = frozenset(BALANCE_CONFIG["issuers"] if issuers is None else issuers)
+    currencies = frozenset(BALANCE_CONFIG["currencies"] if currencies is None else currencies)
+    semaphore = asyncio.Semaphore(max_concurrency or BALANCE_CONFIG["max_concurrency"])
+    client = get_client()
+    
+    async def fetch(address: str) -> Optional[AccountBalances]:
+        balances = _balance_cache.get(address) if use_cache else None
+        if balances is None:
+            async with semaphore:
+                try:
+                    balances = await _fetch_account_balances(address, client)
+                except Exception as e:
+                    print(f"Error getting balances for account {address}: {str(e)}")
+                    return None
+            if balances is None:
+                return None
+            _balance_cache.put(balances)
+        return balances.filtered(issuers, currencies)
+    
+    unique_addresses = list(dict.fromkeys(address for address in addresses if address))
+    results = await asyncio.gather(*(fetch(address) for address in unique_addresses))
+    return {address: balances for address, balances in zip(unique_addresses, results) if balances}
+
+def clear_balance_cache() -> None:
+    """Drop all cached balances."""
+    _balance_cache.clear()
+
 async def main():
     """Main function to demonstrate balance retrieval."""
     # Example usage
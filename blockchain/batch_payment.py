@@ -0,0 +1,216 @@
+"""
+Batch payments: many sender-to-receiver legs in one call.
+
+All customers of a batch are validated with one database query. Legs from different
+senders are submitted concurrently. An account's transactions must carry consecutive
+sequence numbers, so the legs of one sender are assigned sequences locally and submitted
+in order without waiting for validation in between. The whole batch is then awaited
+concurrently, so a payout to many beneficiaries validates in about one ledger close.
+A leg whose submission raised (e.g. timed out) may still be applied, so it is confirmed
+by hash like the others and the sender's remaining legs are not submitted.
+Validated legs are recorded and handed to the post-payment pipeline like single payments.
+"""
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from xrpl.asyncio.account import get_next_valid_seq_number
+from xrpl.asyncio.ledger import get_latest_validated_ledger_sequence
+from xrpl.asyncio.transaction import autofill
+from xrpl.models.requests import SubmitOnly, Tx
+from xrpl.transaction import sign
+from xrpl.wallet import Wallet
+
+from config.blockchain_config import BATCH_PAYMENT_CONFIG
+from config.logger_config import setup_logger
+from .client import get_client
+from .signing import SigningService, get_default_signer
+from .transaction import build_payment, db, record_payment
+from .wallet import get_customer_wallets
+
+logger = setup_logger(__name__)
+
+# Preliminary results after which a transaction can still be validated with its sequence
+_ACCEPTED_PREFIXES = ("tes", "ter", "tec")
+
+class LegStatus(str, Enum):
+    """Outcome of a payment leg."""
+    SUCCEEDED = "succeeded"  # Validated and recorded
+    FAILED = "failed"  # Rejected or not validated
+    INVALID = "invalid"  # Not submitted, the leg did not pass validation
+
+@dataclass
+class PaymentLeg:
+    """A single payment of a batch."""
+    sender_id: str
+    receiver_id: str
+    amount: float
+    currency: str = "RLUSD"
+
+@dataclass
+class LegResult:
+    """Outcome of a single payment of a batch."""
+    index: int
+    sender_id: str
+    receiver_id: str
+    amount: float
+    currency: str
+    status: LegStatus
+    transaction_hash: Optional[str] = None
+    error: Optional[str] = None
+    disbursements: List[Dict[str, Any]] = field(default_factory=list)
+
+    def fail(self, error: str, status: LegStatus = LegStatus.FAILED) -> "LegResult":
+        self.status = status
+        self.error = error
+        return self
+
+async def execute_batch_payment(
+    legs: List[PaymentLeg],
+    post_payment: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    signer: Optional[SigningService] = None
+) -> List[LegResult]:
+    """
+    Execute many payments concurrently.
+
+    Args:
+        legs: The payments to make
+        post_payment: "background" or "inline" follow-up work (defaults to POST_PAYMENT_CONFIG["mode"])
+        max_concurrency: Maximum concurrent ledger requests (defaults to BATCH_PAYMENT_CONFIG)
+        signer: Signing service used to sign in a process pool (defaults to the configured service)
+
+    Returns:
+        One result per leg, in input order
+    """
+    results = [
+        LegResult(index, leg.sender_id, leg.receiver_id, leg.amount, leg.currency.upper(), LegStatus.SUCCEEDED)
+        for index, leg in enumerate(legs)
+    ]
+    customer_ids = {leg.sender_id for leg in legs} | {leg.receiver_id for leg in legs}
+    customers = await asyncio.to_thread(db.get_customers, customer_ids)
+    sender_wallets = await asyncio.to_thread(get_customer_wallets, {leg.sender_id for leg in legs})
+
+    by_sender: Dict[str, List[LegResult]] = defaultdict(list)
+    for result in results:
+        receiver = customers.get(result.receiver_id)
+        if result.amount <= 0:
+            result.fail("Amount must be positive", LegStatus.INVALID)
+        elif result.sender_id not in sender_wallets:
+            result.fail(f"Unknown sender or sender without wallet: {result.sender_id}", LegStatus.INVALID)
+        elif receiver is None or not receiver.wallet_address:
+            result.fail(f"Unknown receiver or receiver without wallet: {result.receiver_id}", LegStatus.INVALID)
+        else:
+            by_sender[result.sender_id].append(result)
+
+    limiter = asyncio.Semaphore(max_concurrency or BATCH_PAYMENT_CONFIG["max_concurrency"])
+    signer = signer or get_default_signer()
+    client = get_client()
+    await asyncio.gather(*(
+        _pay_from_sender(sender_wallets[sender_id], sender_legs, customers, limiter, signer, client, post_payment)
+        for sender_id, sender_legs in by_sender.items()
+    ))
+
+    succeeded = sum(1 for result in results if result.status == LegStatus.SUCCEEDED)
+    logger.info(f"Batch payment: {succeeded} of {len(results)} legs succeeded")
+    return results
+
+async def _pay_from_sender(wallet: Wallet, legs: List[LegResult], customers: Dict, limiter: asyncio.Semaphore,
+                           signer: Optional[SigningService], client, post_payment: Optional[str]) -> None:
+    """Submit the legs of one sender in sequence order, then wait for all of them together."""
+    try:
+        async with limiter:
+            sequence = await get_next_valid_seq_number(wallet.classic_address, client)
+    except Exception as e:
+        for leg in legs:
+            leg.fail(f"Could not read the sender's sequence: {str(e)}")
+        return
+
+    fee = last_ledger_sequence = None
+    pending = []
+    for position, leg in enumerate(legs):
+        try:
+            if fee is None:
+                # Fee and validity window are the same for every leg of the batch
+                payment = build_payment(wallet.classic_address, customers[leg.receiver_id].wallet_address,
+                                        leg.currency, leg.amount, sequence=sequence)
+                async with limiter:
+                    payment = await autofill(payment, client)
+                fee, last_ledger_sequence = payment.fee, payment.last_ledger_sequence
+            else:
+                payment = build_payment(wallet.classic_address, customers[leg.receiver_id].wallet_address,
+                                        leg.currency, leg.amount, sequence=sequence, fee=fee,
+                                        last_ledger_sequence=last_ledger_sequence)
+            if signer is not None:
+                signed = await signer.sign(payment, wallet)
+                tx_blob, tx_hash = signed.tx_blob, signed.hash
+            else:
+                signed = sign(payment, wallet)
+                tx_blob, tx_hash = signed.blob(), signed.get_hash()
+        except Exception as e:
+            # Nothing was submitted, the next leg takes the sequence
+            leg.fail(f"Could not prepare the payment: {str(e)}")
+            continue
+        try:
+            async with limiter:
+                response = await client.request(SubmitOnly(tx_blob=tx_blob))
+        except Exception as e:
+            # The blob may have reached the node (e.g. a timeout), so the outcome is unknown
+            # and the sequence may be used: confirm the leg by hash and submit nothing more
+            logger.warning(f"Submitting {tx_hash} failed, confirming it by hash: {str(e)}")
+            leg.transaction_hash = tx_hash
+            pending.append(leg)
+            for skipped in legs[position + 1:]:
+                skipped.fail(f"Not submitted: an earlier payment of this sender has an unknown outcome ({tx_hash})")
+            break
+
+        engine_result = response.result.get("engine_result", "")
+        if not response.is_successful() or not engine_result.startswith(_ACCEPTED_PREFIXES):
+            # The sequence was not used, the next leg takes it
+            leg.fail(f"{engine_result or response.result.get('error')}: "
+                     f"{response.result.get('engine_result_message') or response.result.get('error_message')}")
+            continue
+        leg.transaction_hash = tx_hash
+        sequence += 1
+        pending.append(leg)
+
+    await asyncio.gather(*(
+        _confirm(leg, last_ledger_sequence, limiter, client, post_payment) for leg in pending
+    ))
+
+async def _confirm(leg: LegResult, last_ledger_sequence: int, limiter: asyncio.Semaphore, client,
+                   post_payment: Optional[str]) -> None:
+    """Wait until a submitted leg is validated or expired, then record it."""
+    try:
+        while True:
+            await asyncio.sleep(BATCH_PAYMENT_CONFIG["poll_interval_seconds"])
+            # Read the validated ledger before the lookup: a leg not validated in the lookup
+            # can still be validated in a ledger closed between the two requests
+            async with limiter:
+                validated_ledger = await get_latest_validated_ledger_sequence(client)
+            async with limiter:
+                response = await client.request(Tx(transaction=leg.transaction_hash))
+            if response.is_successful() and response.result.get("validated"):
+                break
+            if validated_ledger >= last_ledger_sequence:
+                leg.fail(f"Not validated by ledger {last_ledger_sequence}")
+                return
+    except Exception as e:
+        leg.fail(f"Could not confirm the payment: {str(e)}")
+        return
+
+    engine_result = response.result["meta"]["TransactionResult"]
+    if engine_result != "tesSUCCESS":
+        leg.fail(f"Payment failed: {engine_result}")
+        return
+    try:
+        leg.disbursements = await record_payment(
+            leg.transaction_hash, leg.sender_id, leg.receiver_id, leg.amount, leg.currency, post_payment
+        )
+    except Exception as e:
+        # The payment went through, only the bookkeeping failed
+        logger.error(f"Error recording payment {leg.transaction_hash}: {str(e)}")
+        leg.error = f"Payment validated but could not be recorded: {str(e)}"
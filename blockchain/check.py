@@ -2,19 +2,20 @@
 XRPL check operations.
 """
 
+import asyncio
 from typing import Optional
 from datetime import datetime, timedelta
 
 from xrpl.models import CheckCreate, CheckCash, IssuedCurrencyAmount
 from xrpl.utils import datetime_to_ripple_time, xrp_to_drops
 from xrpl.asyncio.transaction import submit_and_wait
-from xrpl.wallet import Wallet
 
 from config.logger_config import setup_logger
 from db.database import get_db
 
 from .client import get_client
-from .wallet import get_wallet_pair
+from .signing import SigningService, get_default_signer, submit_and_wait_signed
+from .wallet import get_customer_wallet, get_wallet_pair
 
 
 # Set up logging
@@ -30,7 +31,8 @@ async def create_check(
     amount: float,
     currency: str = "XRP",
     issuer: Optional[str] = None,
-    expiration_days: int = 1
+    expiration_days: int = 1,
+    signer: Optional[SigningService] = None
 ) -> str:
     """Create a check on the XRPL.
     
@@ -41,6 +43,8 @@ async def create_check(
         currency: The currency to send (default: "XRP")
         issuer: The issuer of the currency (required for non-XRP currencies)
         expiration_days: Number of days until the check expires (default: 1)
+        signer: Signing service used to sign in a process pool (defaults to the
+            configured service when SIGNING_CONFIG["use_process_pool"] is set)
         
     Returns:
         str: The check_id (LedgerIndex) of the created check
@@ -78,7 +82,7 @@ async def create_check(
     
     try:    
         # Submit transaction and wait for result
-        stxn_response = await submit_and_wait(check_txn, client, sender_wallet)
+        stxn_response = await submit_and_wait_signed(check_txn, client, sender_wallet, signer or get_default_signer())
         stxn_result = stxn_response.result
         
         # Get the check_id from the created Check object
@@ -101,15 +105,17 @@ async def create_check(
         logger.info(f"Receiver: {receiver_wallet.address}")
         logger.info(f"Expiration: {expiry_date}")
 
-        # Add transaction history to the database
+        # Add transaction history to the database, off the event loop: with write-behind
+        # enabled the insert waits for its group commit
         if stxn_result['meta']['TransactionResult'] == "tesSUCCESS":
-            db.insert_check(check_id=check_id,
-                          transaction_hash=stxn_result['hash'],
-                          sender_id=customer_id,
-                          receiver_id=beneficiary_id,
-                          amount=amount,
-                          currency=currency,
-                          expiration_date=expiry_date)
+            await asyncio.to_thread(db.insert_check,
+                                    check_id=check_id,
+                                    transaction_hash=stxn_result['hash'],
+                                    sender_id=customer_id,
+                                    receiver_id=beneficiary_id,
+                                    amount=amount,
+                                    currency=currency,
+                                    expiration_date=expiry_date)
         return check_id
     
     except Exception as e:
@@ -134,7 +140,7 @@ async def cash_check(
     """
     try:
         # Get the customer's wallet
-        receiver_wallet = Wallet.from_seed(db.get_customer_seed(beneficiary_id))
+        receiver_wallet = get_customer_wallet(beneficiary_id)
     except Exception as e:
         logger.error(f"Error fetching receiver wallet: {str(e)}")
         raise e
@@ -175,7 +181,7 @@ async def cash_check(
 
         # Update check status in database
         if stxn_result['meta']['TransactionResult'] == "tesSUCCESS":
-            db.update_check_cash(check_id, stxn_result['hash'])
+            await asyncio.to_thread(db.update_check_cash, check_id, stxn_result['hash'])
     
     except Exception as e:
         logger.error(f"Error cashing check: {str(e)}")
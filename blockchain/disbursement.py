@@ -0,0 +1,97 @@
+"""
+Per-cause serialized disbursement allocation.
+
+Allocating a disbursement reads the open donations of a cause and then marks them
+disbursed. Two payments to the same cause allocating at the same time would both see
+the same open donations and allocate them twice. The DisbursementExecutor runs one
+worker per cause that allocates that cause's disbursements one at a time, while
+disbursements for different causes are allocated in parallel.
+
+This only serializes allocation within one process. Database.allocate_disbursement
+additionally takes a transaction-scoped advisory lock per cause on PostgreSQL.
+"""
+
+import asyncio
+from functools import partial
+from typing import Any, Callable, Dict, List
+
+from config.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+Allocator = Callable[..., List[Dict[str, Any]]]
+
+class DisbursementExecutor:
+    """Allocates disbursements through one in-process queue per cause."""
+
+    def __init__(self, allocate: Allocator):
+        """
+        Args:
+            allocate: Blocking function (cause_id, amount, transaction_hash, **kwargs) ->
+                disbursement records. Runs in a worker thread, one call per cause at a time.
+        """
+        self._allocate = allocate
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._processed = 0
+        self._failed = 0
+
+    async def submit(self, cause_id: str, amount: float, transaction_hash: str, **kwargs) -> List[Dict[str, Any]]:
+        """
+        Queue a disbursement for allocation and wait for its records.
+
+        Args:
+            cause_id: The cause ID to allocate donations for
+            amount: The amount available for disbursement
+            transaction_hash: The hash of the transaction that triggered this disbursement
+            **kwargs: Passed on to the allocate function
+
+        Returns:
+            List of disbursement records created
+        """
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(cause_id)
+        if queue is None:
+            queue = self._queues[cause_id] = asyncio.Queue()
+            self._workers[cause_id] = asyncio.create_task(self._run(cause_id, queue))
+        queue.put_nowait((partial(self._allocate, cause_id, amount, transaction_hash, **kwargs), transaction_hash, future))
+        # Shield the allocation so a cancelled request does not stop it half way
+        return await asyncio.shield(future)
+
+    async def _run(self, cause_id: str, queue: asyncio.Queue) -> None:
+        """Allocate queued disbursements of a cause in order until the queue is empty."""
+        try:
+            while True:
+                try:
+                    allocate, transaction_hash, future = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                try:
+                    result = await asyncio.to_thread(allocate)
+                except Exception as e:
+                    self._failed += 1
+                    logger.error(f"Error allocating disbursement {transaction_hash} for cause {cause_id}: {str(e)}")
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    self._processed += 1
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            # Idle causes release their worker; the next submit starts a new one
+            del self._queues[cause_id]
+            del self._workers[cause_id]
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        Get allocation metrics.
+
+        Returns:
+            Dictionary with active_causes, queued, processed and failed
+        """
+        return {
+            "active_causes": len(self._workers),
+            "queued": sum(queue.qsize() for queue in self._queues.values()),
+            "processed": self._processed,
+            "failed": self._failed
+        }
@@ -0,0 +1,293 @@
+"""
+Bulk customer onboarding.
+
+Customers are onboarded through three concurrent stages connected by queues:
+1. Wallet generation (local key generation or funding through the testnet faucet)
+2. Batched database inserts
+3. RLUSD trustline setup
+
+Onboarding is resumable: customers that already exist in the database skip the wallet
+and insert stages and only have their trustline checked, so an interrupted import can
+simply be run again with the same input.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from xrpl.asyncio.wallet import generate_faucet_wallet
+from xrpl.wallet import Wallet
+
+from config.blockchain_config import ONBOARDING_CONFIG, RLUSD_CURRENCY_CODE, RLUSD_ISSUER, TRUSTLINE_CONFIG
+from config.logger_config import setup_logger
+from db.database import CustomerType, get_db, init_db
+from db.sqlite_config import get_connection_string
+from .client import get_client
+from .setup_rlusd_trustline import TrustlineStatus, provision_wallet_trustline, text_to_hex
+
+logger = setup_logger(__name__)
+
+init_db(get_connection_string())
+db = get_db()
+
+class OnboardingStatus:
+    """Outcome of onboarding one customer."""
+    ONBOARDED = "onboarded"  # Created in this run
+    RESUMED = "resumed"  # Already existed, only the trustline was checked
+    FAILED = "failed"
+
+@dataclass
+class OnboardingResult:
+    """Per-row result of a bulk onboarding run."""
+    row: int
+    customer_id: Optional[str]
+    status: str = OnboardingStatus.ONBOARDED
+    wallet_address: Optional[str] = None
+    trustline: Optional[str] = None
+    failed_stage: Optional[str] = None
+    error: Optional[str] = None
+
+    def fail(self, stage: str, error: str) -> None:
+        """Mark the row as failed at the given stage."""
+        self.status = OnboardingStatus.FAILED
+        self.failed_stage = stage
+        self.error = error
+
+@dataclass
+class OnboardingReport:
+    """Summary of a bulk onboarding run."""
+    results: List[OnboardingResult]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of rows per outcome."""
+        counts = {OnboardingStatus.ONBOARDED: 0, OnboardingStatus.RESUMED: 0, OnboardingStatus.FAILED: 0}
+        for result in self.results:
+            counts[result.status] += 1
+        return counts
+
+    def summary(self) -> str:
+        """Human readable one-line summary."""
+        counts = self.counts()
+        return (f"{len(self.results)} rows: {counts[OnboardingStatus.ONBOARDED]} onboarded, "
+                f"{counts[OnboardingStatus.RESUMED]} resumed, {counts[OnboardingStatus.FAILED]} failed")
+
+def load_customer_rows(path: str) -> List[Dict]:
+    """
+    Load customer rows from a CSV or JSON file.
+    
+    CSV files need a header row. JSON files hold either a list of objects or an object
+    with a "customers" list. Recognised fields are customer_id (required), customer_name,
+    email_address, customer_type ("sender" or "receiver") and wallet_seed (to onboard an
+    existing wallet).
+    
+    Args:
+        path: Path to the input file
+        
+    Returns:
+        List of row dictionaries
+    """
+    with open(path, newline='') as f:
+        if path.lower().endswith('.json'):
+            data = json.load(f)
+            return data["customers"] if isinstance(data, dict) else data
+        return list(csv.DictReader(f))
+
+async def onboard_customers(
+    rows: List[Dict],
+    fund_wallets: bool = False,
+    setup_trustline: bool = True,
+    issuer_address: str = RLUSD_ISSUER,
+    currency_code: str = RLUSD_CURRENCY_CODE,
+    limit_amount: str = TRUSTLINE_CONFIG["default_limit"],
+    wallet_concurrency: Optional[int] = None,
+    insert_batch_size: Optional[int] = None,
+    trustline_concurrency: Optional[int] = None
+) -> OnboardingReport:
+    """
+    Onboard many customers, running wallet, insert and trustline stages concurrently.
+    
+    Args:
+        rows: Customer rows (see load_customer_rows)
+        fund_wallets: Fund wallets through the testnet faucet. Without funding, new
+            wallets are generated locally and have no ledger account yet, so their
+            trustline stage is skipped.
+        setup_trustline: Provision the RLUSD trustline for funded wallets
+        issuer_address: The address of the token issuer
+        currency_code: The trustline currency code
+        limit_amount: The trust line limit
+        wallet_concurrency: Parallel wallet generations (defaults to ONBOARDING_CONFIG)
+        insert_batch_size: Customers per insert transaction (defaults to ONBOARDING_CONFIG)
+        trustline_concurrency: Parallel trustline setups (defaults to ONBOARDING_CONFIG)
+        
+    Returns:
+        OnboardingReport with one result per input row, in input order
+    """
+    wallet_concurrency = wallet_concurrency or ONBOARDING_CONFIG["wallet_concurrency"]
+    insert_batch_size = insert_batch_size or ONBOARDING_CONFIG["insert_batch_size"]
+    trustline_concurrency = trustline_concurrency or ONBOARDING_CONFIG["trustline_concurrency"]
+    currency_hex = text_to_hex(currency_code)
+    client = get_client()
+    
+    results = [OnboardingResult(row=index, customer_id=row.get("customer_id") or None) for index, row in enumerate(rows)]
+    wallet_queue: asyncio.Queue = asyncio.Queue()
+    insert_queue: asyncio.Queue = asyncio.Queue()
+    trustline_queue: asyncio.Queue = asyncio.Queue()
+    
+    # Validate rows and resume customers that already exist
+    seen = set()
+    pending = []
+    for result, row in zip(results, rows):
+        customer_id = result.customer_id
+        if not customer_id:
+            result.fail("validate", "customer_id is required")
+        elif customer_id in seen:
+            result.fail("validate", f"Duplicate customer_id {customer_id}")
+        else:
+            try:
+                row["customer_type"] = CustomerType((row.get("customer_type") or CustomerType.RECEIVER.value).lower())
+                seen.add(customer_id)
+                pending.append((result, row))
+            except ValueError:
+                result.fail("validate", f"Invalid customer_type {row.get('customer_type')}")
+    
+    existing = await asyncio.to_thread(db.get_customers, [result.customer_id for result, _ in pending])
+    for result, row in pending:
+        customer = existing.get(result.customer_id)
+        if customer:
+            result.status = OnboardingStatus.RESUMED
+            result.wallet_address = customer.wallet_address
+            await trustline_queue.put((result, customer.wallet_seed, fund_wallets or bool(row.get("wallet_seed"))))
+        else:
+            await wallet_queue.put((result, row))
+    
+    async def wallet_stage() -> None:
+        while True:
+            item = await wallet_queue.get()
+            if item is None:
+                return
+            result, row = item
+            try:
+                wallet = Wallet.from_seed(row["wallet_seed"]) if row.get("wallet_seed") else None
+                if fund_wallets:
+                    wallet = await generate_faucet_wallet(client, wallet)
+                elif wallet is None:
+                    wallet = Wallet.create()
+                result.wallet_address = wallet.classic_address
+                await insert_queue.put((result, row, wallet))
+            except Exception as e:
+                result.fail("wallet", str(e))
+    
+    async def insert_stage() -> None:
+        done = False
+        while not done:
+            batch = []
+            item = await insert_queue.get()
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= insert_batch_size:
+                    break
+                try:
+                    item = await asyncio.wait_for(insert_queue.get(), ONBOARDING_CONFIG["insert_batch_delay_seconds"])
+                except asyncio.TimeoutError:
+                    break
+            done = item is None
+            if batch:
+                await insert_batch(batch)
+    
+    async def insert_batch(batch) -> None:
+        customers = [{
+            "customer_id": result.customer_id,
+            "wallet_seed": wallet.seed,
+            "customer_type": row["customer_type"],
+            "wallet_address": wallet.classic_address,
+            "email_address": row.get("email_address") or None,
+            "customer_name": row.get("customer_name") or None
+        } for result, row, wallet in batch]
+        try:
+            await asyncio.to_thread(db.add_customers, customers)
+            inserted = batch
+        except Exception:
+            # Fall back to one insert per row so a single bad row does not fail the batch
+            inserted = []
+            for item, customer in zip(batch, customers):
+                try:
+                    await asyncio.to_thread(db.add_customer, **customer)
+                    inserted.append(item)
+                except Exception as e:
+                    item[0].fail("insert", str(e))
+        for result, row, wallet in inserted:
+            await trustline_queue.put((result, wallet.seed, fund_wallets or bool(row.get("wallet_seed"))))
+    
+    async def trustline_stage() -> None:
+        while True:
+            item = await trustline_queue.get()
+            if item is None:
+                return
+            result, seed, on_ledger = item
+            if not setup_trustline or not on_ledger:
+                continue
+            try:
+                outcome = await provision_wallet_trustline(
+                    result.customer_id, Wallet.from_seed(seed), issuer_address, currency_hex, limit_amount, client
+                )
+            except Exception as e:
+                result.fail("trustline", str(e))
+                continue
+            result.trustline = outcome.status
+            if outcome.status == TrustlineStatus.FAILED:
+                result.fail("trustline", outcome.error)
+    
+    wallet_workers = [asyncio.create_task(wallet_stage()) for _ in range(wallet_concurrency)]
+    insert_worker = asyncio.create_task(insert_stage())
+    trustline_workers = [asyncio.create_task(trustline_stage()) for _ in range(trustline_concurrency)]
+    
+    # Shut the stages down in pipeline order once each upstream stage has drained
+    for _ in wallet_workers:
+        await wallet_queue.put(None)
+    await asyncio.gather(*wallet_workers)
+    await insert_queue.put(None)
+    await insert_worker
+    for _ in trustline_workers:
+        await trustline_queue.put(None)
+    await asyncio.gather(*trustline_workers)
+    
+    report = OnboardingReport(results=results)
+    logger.info(f"Bulk onboarding finished: {report.summary()}")
+    return report
+
+def main():
+    """Onboard customers from a CSV or JSON file."""
+    parser = argparse.ArgumentParser(description='Bulk onboard customers from a CSV or JSON file')
+    parser.add_argument('path', help='CSV or JSON file with customer rows')
+    parser.add_argument('--fund', action='store_true', help='Fund wallets through the testnet faucet')
+    parser.add_argument('--no-trustline', action='store_true', help='Skip RLUSD trustline setup')
+    parser.add_argument('--report', help='Write the per-row report to this JSON file')
+    parser.add_argument('--wallet-concurrency', type=int, default=ONBOARDING_CONFIG["wallet_concurrency"])
+    parser.add_argument('--insert-batch-size', type=int, default=ONBOARDING_CONFIG["insert_batch_size"])
+    parser.add_argument('--trustline-concurrency', type=int, default=ONBOARDING_CONFIG["trustline_concurrency"])
+    args = parser.parse_args()
+    
+    report = asyncio.run(onboard_customers(
+        load_customer_rows(args.path),
+        fund_wallets=args.fund,
+        setup_trustline=not args.no_trustline,
+        wallet_concurrency=args.wallet_concurrency,
+        insert_batch_size=args.insert_batch_size,
+        trustline_concurrency=args.trustline_concurrency
+    ))
+    
+    for result in report.results:
+        if result.status == OnboardingStatus.FAILED:
+            print(f"Row {result.row} ({result.customer_id}): failed at {result.failed_stage}: {result.error}")
+    print(report.summary())
+    
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump([asdict(result) for result in report.results], f, indent=2)
+        print(f"Report written to {args.report}")
+
+if __name__ == "__main__":
+    main()
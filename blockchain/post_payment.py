@@ -0,0 +1,179 @@
+"""
+Background post-payment pipeline.
+
+Once a payment is validated, execute_payment records it together with a payment outbox
+entry in one transaction. The follow-up work - crediting the cause balance, allocating
+the disbursement to donations and notifying donors - is done by the PostPaymentWorker
+from the outbox, with retries, so /disburse can respond as soon as the payment is
+recorded. Each step is marked done in the same transaction that applies it, so a retried
+entry never credits a balance or allocates a disbursement twice.
+"""
+
+import asyncio
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config.blockchain_config import POST_PAYMENT_CONFIG
+from config.logger_config import setup_logger
+from db.database import Database, get_db
+from .disbursement import DisbursementExecutor
+
+logger = setup_logger(__name__)
+
+# Called with the outbox entry and its disbursement records once they are allocated
+Notifier = Callable[[Dict[str, Any], List[Dict[str, Any]]], Awaitable[None]]
+
+class PostPaymentWorker:
+    """Processes payment outbox entries in the background."""
+
+    def __init__(self, executor: DisbursementExecutor, database: Optional[Database] = None,
+                 notifiers: Optional[List[Notifier]] = None, config: Dict[str, Any] = POST_PAYMENT_CONFIG):
+        """
+        Args:
+            executor: Executor that serializes disbursement allocation per cause
+            database: Database holding the outbox (defaults to the global database)
+            notifiers: Coroutines run after an entry's disbursements are allocated
+            config: Pipeline settings (see POST_PAYMENT_CONFIG)
+        """
+        self._executor = executor
+        self._database = database
+        self.notifiers = list(notifiers or [])
+        self._config = config
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._processed = 0
+        self._retried = 0
+        self._failed = 0
+
+    @property
+    def db(self) -> Database:
+        return self._database or get_db()
+
+    def ensure_started(self) -> None:
+        """Start the worker on the running event loop unless it is already running there."""
+        loop = asyncio.get_running_loop()
+        if self._task and not self._task.done() and self._task.get_loop() is loop:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+        logger.info("Started post-payment worker")
+
+    def notify(self) -> None:
+        """Wake the worker up to process a newly recorded payment without waiting for the next poll."""
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop the worker. Entries it had claimed are retried after their lease expires."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        """Poll the outbox until stopped."""
+        while True:
+            try:
+                processed = await self.process_due()
+            except Exception as e:
+                logger.error(f"Error polling payment outbox: {str(e)}")
+                processed = 0
+            if processed < self._config["batch_size"]:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._config["poll_interval_seconds"])
+                except asyncio.TimeoutError:
+                    pass
+
+    async def process_due(self) -> int:
+        """
+        Claim and process the outbox entries that are due.
+
+        Returns:
+            Number of entries claimed
+        """
+        entries = await asyncio.to_thread(
+            self.db.claim_outbox_entries, self._config["batch_size"], self._config["lease_seconds"]
+        )
+        await asyncio.gather(*(self.process_entry(entry) for entry in entries))
+        return len(entries)
+
+    async def process_now(self, outbox_id: str) -> List[Dict[str, Any]]:
+        """
+        Process a newly recorded outbox entry right away.
+
+        The entry must have been recorded already leased to the caller (see
+        Database.record_payment), so the background worker cannot claim it first.
+
+        Args:
+            outbox_id: ID of the outbox entry
+
+        Returns:
+            The disbursement records allocated, or an empty list if the attempt failed
+            (the entry is then retried in the background)
+        """
+        entry = await asyncio.to_thread(self.db.get_outbox_entry, outbox_id)
+        if entry is None:
+            return []
+        return await self.process_entry(entry) or []
+
+    async def process_entry(self, entry: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run the follow-up work of a claimed outbox entry.
+
+        Args:
+            entry: Claimed entry as returned by Database.claim_outbox_entries
+
+        Returns:
+            The disbursement records of the entry, or None if the attempt failed
+        """
+        outbox_id = entry['outbox_id']
+        try:
+            await asyncio.to_thread(self.db.apply_outbox_balance, outbox_id, entry['sender_id'], entry['amount'])
+            if entry['allocated']:
+                # Allocated by an earlier attempt that failed afterwards: notify with its records
+                disbursements = await asyncio.to_thread(self.db.get_disbursements, entry['transaction_hash'])
+            else:
+                disbursements = await self._executor.submit(
+                    entry['receiver_id'], entry['amount'], entry['transaction_hash'], outbox_id=outbox_id
+                )
+            for notifier in self.notifiers:
+                await notifier(entry, disbursements)
+            await asyncio.to_thread(self.db.complete_outbox_entry, outbox_id)
+            self._processed += 1
+            logger.info(f"Processed payment {entry['transaction_hash']}: {len(disbursements)} disbursements")
+            return disbursements
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+            if entry['attempts'] >= self._config["max_attempts"]:
+                retry_at = None
+                self._failed += 1
+                logger.error(f"Giving up on payment {entry['transaction_hash']} after {entry['attempts']} attempts: {error}\n"
+                             f"{traceback.format_exc()}")
+            else:
+                delay = self._config["retry_backoff_seconds"] * 2 ** (entry['attempts'] - 1)
+                retry_at = datetime.utcnow() + timedelta(seconds=delay)
+                self._retried += 1
+                logger.warning(f"Retrying payment {entry['transaction_hash']} in {delay}s: {error}")
+            await asyncio.to_thread(self.db.retry_outbox_entry, outbox_id, error, retry_at)
+            return None
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get pipeline metrics.
+
+        Returns:
+            Dictionary with running, processed, retried, failed and the outbox entry
+            counts by status
+        """
+        return {
+            "running": bool(self._task and not self._task.done()),
+            "processed": self._processed,
+            "retried": self._retried,
+            "failed": self._failed,
+            "outbox": self.db.get_outbox_counts()
+        }
@@ -1,11 +1,32 @@
-from xrpl.clients import JsonRpcClient
+"""
+Bulk provisioning of RLUSD trustlines for customer wallets.
+
+Existing trustlines are read with account_lines for all customers concurrently and a
+TrustSet is only submitted where the trustline is missing or its limit differs.
+"""
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.asyncio.transaction import submit_and_wait
+from xrpl.models.amounts import IssuedCurrencyAmount
 from xrpl.models.transactions import TrustSet
-from xrpl.utils import xrp_to_drops
-from xrpl.transaction import submit_and_wait
-from xrpl.wallet import generate_faucet_wallet
-from db.database import get_db
 from xrpl.wallet import Wallet
 
+from config.blockchain_config import RLUSD_CURRENCY_CODE, RLUSD_ISSUER, TRUSTLINE_CONFIG
+from config.logger_config import setup_logger
+from db.database import CustomerWallet, get_db, init_db
+from db.sqlite_config import get_connection_string
+from .balance import decode_currency_code, get_account_lines
+from .client import get_client
+
+logger = setup_logger(__name__)
+
+init_db(get_connection_string())
 db = get_db()
 
 def text_to_hex(text):
@@ -17,66 +38,199 @@ def text_to_hex(text):
     # Pad with zeros to make it exactly 40 characters
     return hex_text.ljust(40, '0')
 
-def create_trustline(issuer_address, currency_code, limit_amount="1000000000"):
+class TrustlineStatus:
+    """Outcome of provisioning a trustline for one account."""
+    CREATED = "created"
+    UPDATED = "updated"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+@dataclass
+class TrustlineResult:
+    """Result of provisioning a trustline for one customer."""
+    customer_id: str
+    address: str
+    status: str
+    transaction_hash: Optional[str] = None
+    error: Optional[str] = None
+
+@dataclass
+class TrustlineReport:
+    """Summary of a bulk trustline provisioning run."""
+    results: List[TrustlineResult] = field(default_factory=list)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of accounts per outcome."""
+        counts = {status: 0 for status in (TrustlineStatus.CREATED, TrustlineStatus.UPDATED,
+                                           TrustlineStatus.SKIPPED, TrustlineStatus.FAILED)}
+        for result in self.results:
+            counts[result.status] += 1
+        return counts
+
+    @property
+    def failures(self) -> List[TrustlineResult]:
+        """Results of accounts whose trustline could not be provisioned."""
+        return [result for result in self.results if result.status == TrustlineStatus.FAILED]
+
+    def summary(self) -> str:
+        """Human readable one-line summary."""
+        counts = self.counts()
+        return (f"{len(self.results)} accounts: {counts[TrustlineStatus.CREATED]} created, "
+                f"{counts[TrustlineStatus.UPDATED]} updated, {counts[TrustlineStatus.SKIPPED]} already present, "
+                f"{counts[TrustlineStatus.FAILED]} failed")
+
+def required_trustset(lines: List[Dict], issuer_address: str, currency_hex: str, limit_amount: str) -> Optional[str]:
     """
-    Creates a trustline for a specific currency on XRPL testnet
+    Decide whether a TrustSet is needed given an account's existing trustlines.
     
-    Parameters:
-    issuer_address: The address of the token issuer
-    currency_code: The currency code (e.g., 'USD')
-    limit_amount: The trust line limit amount (default: 1000000000)
+    Args:
+        lines: Trustlines as returned by account_lines
+        issuer_address: The address of the token issuer
+        currency_hex: The currency code in hex format
+        limit_amount: The desired trust line limit
+        
+    Returns:
+        TrustlineStatus.CREATED or TrustlineStatus.UPDATED if a TrustSet must be
+        submitted, None if the trustline already exists with the desired limit
+    """
+    # account_lines reports the currency in hex, or as its ASCII code for standard codes
+    currencies = (currency_hex, decode_currency_code(currency_hex))
+    for line in lines:
+        if line['account'] == issuer_address and line['currency'] in currencies:
+            if Decimal(line['limit']) == Decimal(str(limit_amount)):
+                return None
+            return TrustlineStatus.UPDATED
+    return TrustlineStatus.CREATED
+
+async def provision_wallet_trustline(
+    customer_id: str,
+    wallet: Wallet,
+    issuer_address: str,
+    currency_hex: str,
+    limit_amount: str,
+    client: AsyncJsonRpcClient
+) -> TrustlineResult:
+    """
+    Provision a trustline for a single wallet, skipping it if already present.
+    
+    Args:
+        customer_id: ID of the customer owning the wallet
+        wallet: The customer's wallet
+        issuer_address: The address of the token issuer
+        currency_hex: The currency code in hex format
+        limit_amount: The trust line limit
+        client: The XRPL client to use
+        
+    Returns:
+        TrustlineResult describing what was done
     """
-    # Define the network client
-    client = JsonRpcClient("https://s.altnet.rippletest.net:51234")
-    customers = db.get_all_customers()
-    for customer in customers:
-        wallet = Wallet.from_seed(customer.wallet_seed)
+    address = wallet.classic_address
+    try:
+        lines = await get_account_lines(address, client)
+        if lines is None:
+            return TrustlineResult(customer_id, address, TrustlineStatus.FAILED, error="Could not read account_lines")
         
-        # Convert currency code to proper hex format
-        try:
-            currency_hex = text_to_hex(currency_code)
-        except ValueError as e:
-            print(f"Error: {e}")
-            return
+        action = required_trustset(lines, issuer_address, currency_hex, limit_amount)
+        if action is None:
+            return TrustlineResult(customer_id, address, TrustlineStatus.SKIPPED)
         
-        # Prepare the trust set transaction
         trust_set_tx = TrustSet(
-            account=wallet.classic_address,
-            limit_amount={
-                "currency": currency_hex,
-                "issuer": issuer_address,
-                "value": str(limit_amount)
-            }
+            account=address,
+            limit_amount=IssuedCurrencyAmount(
+                currency=currency_hex,
+                issuer=issuer_address,
+                value=str(limit_amount)
+            )
         )
+        response = await submit_and_wait(trust_set_tx, client, wallet)
+        if response.is_successful() and response.result['meta']['TransactionResult'] == "tesSUCCESS":
+            return TrustlineResult(customer_id, address, action, transaction_hash=response.result['hash'])
+        return TrustlineResult(customer_id, address, TrustlineStatus.FAILED,
+                               transaction_hash=response.result.get('hash'),
+                               error=str(response.result.get('meta', {}).get('TransactionResult') or response.result))
+    except Exception as e:
+        return TrustlineResult(customer_id, address, TrustlineStatus.FAILED, error=str(e))
+
+async def provision_trustlines(
+    issuer_address: str = RLUSD_ISSUER,
+    currency_code: str = RLUSD_CURRENCY_CODE,
+    limit_amount: str = TRUSTLINE_CONFIG["default_limit"],
+    customers: Optional[Iterable[CustomerWallet]] = None,
+    max_concurrency: Optional[int] = None
+) -> TrustlineReport:
+    """
+    Provision trustlines for many customers concurrently.
+    
+    Args:
+        issuer_address: The address of the token issuer
+        currency_code: The currency code (e.g., 'RLUSD')
+        limit_amount: The trust line limit
+        customers: Customers to provision, with customer_id, wallet_address and wallet_seed
+            (defaults to all customers)
+        max_concurrency: Maximum number of accounts handled in parallel
+            (defaults to TRUSTLINE_CONFIG["max_concurrency"])
         
-        print("\n=== Creating Trustline ===")
-        print(f"Account: {wallet.classic_address}")
-        print(f"Currency (original): {currency_code}")
-        print(f"Currency (hex): {currency_hex}")
-        print(f"Issuer: {issuer_address}")
-        print(f"Limit: {limit_amount}")
-        
-        try:
-            # Submit and wait for validation
-            response = submit_and_wait(trust_set_tx, client, wallet)
-            
-            # Check the result
-            if response.is_successful():
-                print("\nTrustline created successfully!")
-                print(f"Transaction hash: {response.result['hash']}")
-                print(f"Wallet Address: {wallet.classic_address}")
-                print(f"Wallet Seed: {wallet.seed}")
-            else:
-                print("\nFailed to create trustline")
-                print(f"Error: {response.result.get('engine_result_message')}")
-                
-        except Exception as e:
-            print(f"\nError creating trustline: {str(e)}")
-        
-        print("==============================\n")
+    Returns:
+        TrustlineReport with one result per customer
+    """
+    currency_hex = text_to_hex(currency_code)
+    customers = db.get_customer_wallets() if customers is None else list(customers)
+    semaphore = asyncio.Semaphore(max_concurrency or TRUSTLINE_CONFIG["max_concurrency"])
+    client = get_client()
+    
+    async def provision(customer: CustomerWallet) -> TrustlineResult:
+        async with semaphore:
+            try:
+                wallet = Wallet.from_seed(customer.wallet_seed)
+            except Exception as e:
+                return TrustlineResult(customer.customer_id, customer.wallet_address or "", TrustlineStatus.FAILED, error=str(e))
+            return await provision_wallet_trustline(
+                customer.customer_id, wallet, issuer_address, currency_hex, limit_amount, client
+            )
+    
+    report = TrustlineReport(results=list(await asyncio.gather(*(provision(customer) for customer in customers))))
+    logger.info(f"Trustline provisioning finished: {report.summary()}")
+    for failure in report.failures:
+        logger.error(f"Trustline for {failure.customer_id} ({failure.address}) failed: {failure.error}")
+    return report
 
-if __name__ == "__main__":
-    issuer_address = "rQhWct2fv4Vc4KRjRgMrxa8xPN9Zx9iLKV"
-    currency_code = "RLUSD"
+def create_trustline(issuer_address, currency_code, limit_amount=TRUSTLINE_CONFIG["default_limit"]):
+    """
+    Creates trustlines for a specific currency for all customers
     
-    create_trustline(issuer_address, currency_code)
\ No newline at end of file
+    Parameters:
+    issuer_address: The address of the token issuer
+    currency_code: The currency code (e.g., 'USD')
+    limit_amount: The trust line limit amount (default: 1000000000)
+    """
+    return asyncio.run(provision_trustlines(issuer_address, currency_code, limit_amount))
+
+def main():
+    """Provision trustlines from the command line."""
+    parser = argparse.ArgumentParser(description='Provision trustlines for customer wallets')
+    parser.add_argument('--issuer', default=RLUSD_ISSUER, help='Address of the token issuer')
+    parser.add_argument('--currency', default=RLUSD_CURRENCY_CODE, help='Currency code')
+    parser.add_argument('--limit', default=TRUSTLINE_CONFIG["default_limit"], help='Trust line limit')
+    parser.add_argument('--concurrency', type=int, default=TRUSTLINE_CONFIG["max_concurrency"],
+                        help='Maximum number of accounts handled in parallel')
+    parser.add_argument('--customer', action='append', help='Only provision these customer IDs (repeatable)')
+    args = parser.parse_args()
+    
+    customers = None
+    if args.customer:
+        customers = list(db.get_customers(args.customer).values())
+    
+    report = asyncio.run(provision_trustlines(args.issuer, args.currency, args.limit, customers, args.concurrency))
+    
+    print("\n=== Trustline Provisioning Report ===")
+    for result in report.results:
+        line = f"{result.customer_id:<20} {result.address:<36} {result.status}"
+        if result.transaction_hash:
+            line += f" {result.transaction_hash}"
+        if result.error:
+            line += f" ({result.error})"
+        print(line)
+    print(report.summary())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Process-pool transaction signing.
+
+Signing and binary serialization are CPU bound. Inside submit_and_wait they run on the
+event loop thread and, during large disbursement batches, starve the other coroutines of
+the API server or Temporal worker. The SigningService autofills transactions on the event
+loop (network I/O) and signs and serializes them in a process pool, handing back signed
+blobs ready for submission.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.asyncio.transaction import autofill, submit_and_wait
+from xrpl.models.response import Response
+from xrpl.models.transactions import Transaction
+from xrpl.transaction import sign
+from xrpl.wallet import Wallet
+
+from config.blockchain_config import SIGNING_CONFIG
+from config.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+@dataclass
+class SignedTransaction:
+    """A signed, serialized transaction ready for submission."""
+    tx_blob: str
+    hash: str
+
+def _sign_in_worker(transaction: Dict[str, Any], seed: str) -> Tuple[str, str]:
+    """
+    Sign and serialize a transaction. Runs in a pool process.
+    
+    The wallet is derived on every call: derivation is cheap next to signing, and pool
+    processes then keep no seeds or keys that clear_wallet_cache could not reach.
+    
+    Args:
+        transaction: The autofilled transaction in XRPL JSON format
+        seed: Seed of the signing wallet
+        
+    Returns:
+        Tuple of (signed blob, transaction hash)
+    """
+    signed = sign(Transaction.from_xrpl(transaction), Wallet.from_seed(seed))
+    return signed.blob(), signed.get_hash()
+
+class SigningService:
+    """Autofills transactions on the event loop and signs them in a process pool."""
+    
+    def __init__(self, max_workers: Optional[int] = SIGNING_CONFIG["max_workers"]):
+        """
+        Initialize the service. The process pool is started on first use.
+        
+        Args:
+            max_workers: Number of signing processes (None uses the number of CPUs)
+        """
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._signed = 0
+        self._failed = 0
+        self._signing_seconds = 0.0
+        self._started_at: Optional[float] = None
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                logger.info(f"Started signing pool with {self._executor._max_workers} workers")
+            return self._executor
+    
+    async def sign(
+        self,
+        transaction: Transaction,
+        wallet: Wallet,
+        client: Optional[AsyncJsonRpcClient] = None
+    ) -> SignedTransaction:
+        """
+        Autofill, sign and serialize a transaction.
+        
+        Args:
+            transaction: The unsigned transaction (Payment, CheckCreate, ...)
+            wallet: The signing wallet
+            client: XRPL client used to autofill sequence, fee and last ledger sequence.
+                If None the transaction must already be fully filled.
+                
+        Returns:
+            SignedTransaction with the signed blob and transaction hash
+        """
+        if client is not None:
+            transaction = await autofill(transaction, client)
+        
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+        try:
+            tx_blob, tx_hash = await loop.run_in_executor(
+                self._get_executor(), _sign_in_worker, transaction.to_xrpl(), wallet.seed
+            )
+        except Exception:
+            self._failed += 1
+            raise
+        self._signed += 1
+        self._signing_seconds += time.perf_counter() - started
+        return SignedTransaction(tx_blob=tx_blob, hash=tx_hash)
+    
+    async def sign_many(
+        self,
+        transactions: List[Tuple[Transaction, Wallet]],
+        client: Optional[AsyncJsonRpcClient] = None
+    ) -> List[SignedTransaction]:
+        """
+        Sign many transactions concurrently across the pool.
+        
+        Transactions from the same account must already carry distinct sequence
+        numbers; autofill would otherwise assign them all the same one.
+        
+        Args:
+            transactions: (transaction, wallet) pairs
+            client: XRPL client used to autofill the transactions (optional)
+            
+        Returns:
+            Signed transactions in input order
+        """
+        return list(await asyncio.gather(*(self.sign(tx, wallet, client) for tx, wallet in transactions)))
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report signing throughput.
+        
+        Returns:
+            Dictionary with signed/failed counts, average signing latency and the
+            number of transactions signed per second since the first signature
+        """
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "pool_started": self._executor is not None,
+            "max_workers": self._executor._max_workers if self._executor else self.max_workers,
+            "signed": self._signed,
+            "failed": self._failed,
+            "avg_signing_ms": round(self._signing_seconds / self._signed * 1000, 3) if self._signed else 0.0,
+            "throughput_per_second": round(self._signed / elapsed, 3) if elapsed else 0.0
+        }
+    
+    def shutdown(self) -> None:
+        """Stop the process pool."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+async def submit_and_wait_signed(
+    transaction: Transaction,
+    client: AsyncJsonRpcClient,
+    wallet: Wallet,
+    signer: Optional[SigningService] = None
+) -> Response:
+    """
+    Submit a transaction and wait for validation, signing it in the pool if a signer is given.
+    
+    Args:
+        transaction: The unsigned transaction
+        client: The XRPL client
+        wallet: The signing wallet
+        signer: Signing service to use; without one the transaction is signed on the event loop
+        
+    Returns:
+        The validated transaction response
+    """
+    if signer is None:
+        return await submit_and_wait(transaction, client, wallet)
+    signed = await signer.sign(transaction, wallet, client)
+    return await submit_and_wait(signed.tx_blob, client)
+
+# Module-level signing service
+_signing_service: Optional[SigningService] = None
+
+def get_signing_service() -> SigningService:
+    """Get the module-level signing service, creating it on first use."""
+    global _signing_service
+    if _signing_service is None:
+        _signing_service = SigningService()
+    return _signing_service
+
+def get_default_signer() -> Optional[SigningService]:
+    """Get the signing service if SIGNING_CONFIG enables process-pool signing, None otherwise."""
+    return get_signing_service() if SIGNING_CONFIG["use_process_pool"] else None
+
+def shutdown_signing_service() -> None:
+    """Stop the module-level signing service's process pool, if it was started."""
+    if _signing_service is not None:
+        _signing_service.shutdown()
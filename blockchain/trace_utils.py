@@ -2,7 +2,9 @@
 Utility functions for working with XRPL transactions.
 """
 
-from typing import Set, List
+from decimal import Decimal
+from typing import Dict, Iterable, Set, List, Optional
+from xrpl.utils import get_balance_changes, get_final_balances
 from .payment_edge import PaymentEdge, ConsolidatedPaymentEdge
 
 def extract_payment_transactions(transactions_response: dict, sender_wallet_address: str) -> List[PaymentEdge]:
@@ -57,3 +59,43 @@ def get_unique_receivers(consolidated_payment_edges: List[ConsolidatedPaymentEdg
     if not consolidated_payment_edges:
         return None
     return set(edge.receiver for edge in consolidated_payment_edges)
+
+def get_balances_from_metadata(meta: dict, accounts: Optional[Iterable[str]] = None) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Derive pre- and post-transaction balances from transaction metadata.
+    
+    The balances are computed from the AffectedNodes of a validated transaction, so no
+    additional ledger queries are needed. XRP amounts are in XRP, not drops.
+    
+    Args:
+        meta: The "meta" field of a validated transaction
+        accounts: Only report these accounts (optional, defaults to all affected accounts)
+        
+    Returns:
+        Dictionary mapping each account to a list of balances with currency, issuer
+        (None for XRP), before, after and change
+    """
+    accounts = set(accounts) if accounts is not None else None
+    final_balances = {
+        (entry['account'], balance['currency'], balance.get('issuer')): balance['value']
+        for entry in get_final_balances(meta)
+        for balance in entry['balances']
+    }
+    
+    balances = {}
+    for entry in get_balance_changes(meta):
+        account = entry['account']
+        if accounts is not None and account not in accounts:
+            continue
+        for change in entry['balances']:
+            key = (account, change['currency'], change.get('issuer'))
+            after = Decimal(final_balances.get(key, '0'))
+            delta = Decimal(change['value'])
+            balances.setdefault(account, []).append({
+                'currency': change['currency'],
+                'issuer': change.get('issuer'),
+                'before': str(after - delta),
+                'after': str(after),
+                'change': str(delta)
+            })
+    return balances
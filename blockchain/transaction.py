@@ -2,29 +2,26 @@
 XRPL transaction operations.
 """
 
+from enum import Enum
 from typing import Dict, Any, Optional, List, Tuple
 from xrpl.models.transactions import Payment
 from xrpl.asyncio.transaction import submit_and_wait
 from xrpl.models.requests import Tx
+from config.blockchain_config import PAYMENT_CONFIG, POST_PAYMENT_CONFIG, RLUSD_CURRENCY_HEX, RLUSD_ISSUER
 from config.logger_config import setup_logger
 from .client import get_client
+from .disbursement import DisbursementExecutor
+from .post_payment import PostPaymentWorker
+from .signing import SigningService, get_default_signer, submit_and_wait_signed
+from .trace_utils import get_balances_from_metadata
 from .wallet import get_wallet_pair, get_wallet_balance
 from workflow.workflow_models import DisasterQuery
 from db.database import (
-    TransactionStatus, 
-    TransactionType, 
     init_db, 
-    get_db, 
-    Donations, 
-    DonationStatus,
-    DisbursementsDonations
+    get_db
 )
 from db.sqlite_config import get_connection_string
 import asyncio
-from xrpl.models.transactions import Payment
-from xrpl.asyncio.transaction import submit_and_wait
-import uuid
-from datetime import datetime
 
 # Set up logging
 logger = setup_logger(__name__)
@@ -36,35 +33,64 @@ db = get_db()
 # Initialize client
 client = get_client()
 
-async def create_wallet_transaction(query: DisasterQuery, response: Dict[str, Any]) -> Dict[str, Any]:
+class PaymentNotSubmitted(Exception):
+    """A payment failed before it was submitted to the ledger, so retrying it cannot pay twice."""
+
+class DiagnosticsLevel(str, Enum):
+    """How much ledger diagnostics the payment path collects."""
+    OFF = "off"  # Submit and wait for validation only
+    METADATA = "metadata"  # Log pre/post balances derived from the transaction metadata
+    LEDGER = "ledger"  # Query balances before/after and look the transaction up (extra round trips)
+
+def get_diagnostics_level(diagnostics: Optional[str] = None) -> DiagnosticsLevel:
+    """Resolve a diagnostics level, defaulting to PAYMENT_CONFIG["diagnostics"]."""
+    return DiagnosticsLevel(diagnostics or PAYMENT_CONFIG["diagnostics"])
+
+async def log_ledger_balances(label: str, addresses: List[str]) -> None:
+    """Query and log the current balances of the given addresses (LEDGER diagnostics)."""
+    logger.info(f"Checking {label} wallet balances:")
+    for address in addresses:
+        logger.info(f"Wallet {address} balance: {await get_wallet_balance(address, client)}")
+
+def log_metadata_balances(result: Dict[str, Any], addresses: List[str]) -> None:
+    """Log pre/post balances of the given addresses from a validated transaction's metadata."""
+    balances = get_balances_from_metadata(result.get('meta', {}), addresses)
+    for address in addresses:
+        for balance in balances.get(address, []):
+            logger.info(
+                f"Wallet {address} {balance['currency']} balance: "
+                f"{balance['before']} -> {balance['after']} ({balance['change']})"
+            )
+
+async def create_wallet_transaction(query: DisasterQuery, response: Dict[str, Any], diagnostics: Optional[str] = None) -> Dict[str, Any]:
     """Create and execute a wallet transaction.
     
     This function:
-    1. Creates two test wallets using the XRPL faucet
-    2. Checks initial balances
-    3. Creates and submits a payment transaction
-    4. Verifies the transaction on the ledger
-    5. Checks final balances
+    1. Fetches the sender and beneficiary wallets
+    2. Creates and submits a payment transaction
+    3. Waits for the transaction to be validated on the ledger
+    4. Reports balance changes according to the diagnostics level
     
     Args:
         query: The disaster query containing customer and beneficiary IDs
         response: Dictionary containing transaction details
+        diagnostics: Diagnostics level (defaults to PAYMENT_CONFIG["diagnostics"])
         
     Returns:
         Dict containing transaction result
     """
     logger.info(f"Creating wallet transaction for response: {response}")
+    diagnostics = get_diagnostics_level(diagnostics)
     
     try:
         sender_wallet, receiver_wallet = await get_wallet_pair(query.customer_id, query.beneficiary_id)
     except Exception as e:
         logger.error(f"Error fetching wallets: {e}")
         raise e
+    addresses = [sender_wallet.address, receiver_wallet.address]
 
-    # Check initial balances
-    logger.info("Checking initial wallet balances:")
-    logger.info(f"Wallet 1 ({sender_wallet.address}) balance: {await get_wallet_balance(sender_wallet.address, client)}")
-    logger.info(f"Wallet 2 ({receiver_wallet.address}) balance: {await get_wallet_balance(receiver_wallet.address, client)}")
+    if diagnostics == DiagnosticsLevel.LEDGER:
+        await log_ledger_balances("initial", addresses)
 
     # Create payment transaction
     logger.info("Creating payment transaction...")
@@ -74,226 +100,199 @@ async def create_wallet_transaction(query: DisasterQuery, response: Dict[str, An
         destination=receiver_wallet.address,
     )
 
-    # Submit transaction
+    # Submit transaction and wait for validation
     logger.info("Submitting payment transaction...")
     payment_response = await submit_and_wait(payment_tx, client, sender_wallet)
-    logger.info("Transaction submitted successfully")
-
-    # Verify transaction
-    logger.info("Looking up transaction on ledger...")
-    tx_response = await client.request(Tx(transaction=payment_response.result["hash"]))
-    logger.info(f"Transaction validated: {tx_response.result['validated']}")
+    logger.info(f"Transaction validated: {payment_response.result.get('validated')}")
 
-    # Check final balances
-    logger.info("Checking final wallet balances:")
-    logger.info(f"Wallet 1 ({sender_wallet.address}) balance: {await get_wallet_balance(sender_wallet.address, client)}")
-    logger.info(f"Wallet 2 ({receiver_wallet.address}) balance: {await get_wallet_balance(receiver_wallet.address, client)}")
+    if diagnostics == DiagnosticsLevel.METADATA:
+        log_metadata_balances(payment_response.result, addresses)
+    elif diagnostics == DiagnosticsLevel.LEDGER:
+        tx_response = await client.request(Tx(transaction=payment_response.result["hash"]))
+        logger.info(f"Ledger lookup: transaction validated: {tx_response.result['validated']}")
+        await log_ledger_balances("final", addresses)
 
     # Insert transaction into database
     # db.insert_transaction(query.customer_id, query.beneficiary_id, payment_response.result["hash"], payment_response.result["amount"], payment_response.result["destination"])
 
     return payment_response.result
 
-def process_disbursement(cause_id: str, amount: float, transaction_hash: str) -> List[Dict[str, Any]]:
+def process_disbursement(cause_id: str, amount: float, transaction_hash: str, outbox_id: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Process disbursement for a cause with the given amount.
     
+    Pending donations are fulfilled oldest first until the amount is used up
+    (see Database.allocate_disbursement).
+    
     Args:
         cause_id: The cause ID to process donations for
         amount: The amount available for disbursement
         transaction_hash: The hash of the transaction that triggered this disbursement
+        outbox_id: Payment outbox entry the disbursement belongs to
         
     Returns:
         List of disbursement records created
     """
-    print(f"\nProcessing disbursement:")
-    print(f"  Cause ID: {cause_id}")
-    print(f"  Amount: {amount} RLUSD")
-    print(f"  Transaction Hash: {transaction_hash}")
+    logger.info(f"Processing disbursement of {amount} for cause {cause_id} (transaction {transaction_hash})")
+    disbursements = get_db().allocate_disbursement(cause_id, amount, transaction_hash, outbox_id=outbox_id)
     
-    db = get_db()
-    session = db.Session()
-    disbursements_created = []
+    unique_donors = set(d['customer_id'] for d in disbursements)
+    total_amount = sum(d['amount'] for d in disbursements)
+    logger.info(f"Disbursed {total_amount} to {len(disbursements)} donations from {len(unique_donors)} donors")
+    return disbursements
+
+# Serializes allocation per cause so concurrent payments cannot allocate the same donations
+disbursement_executor = DisbursementExecutor(process_disbursement)
+
+# Runs the follow-up work of validated payments from the payment outbox
+post_payment_worker = PostPaymentWorker(disbursement_executor)
+
+def build_payment(sender_address: str, destination: str, currency: str, amount, **fields) -> Payment:
+    """
+    Build a payment of RLUSD or XRP.
     
-    try:
-        # Get all donations in database for debugging
-        all_donations = session.query(Donations).all()
-        print("\nAll donations in database:")
-        for donation in all_donations:
-            print(f"  - ID: {donation.donation_id}")
-            print(f"    Customer: {donation.customer_id}")
-            print(f"    Cause: {donation.cause_id}")
-            print(f"    Status: {donation.status}")
-            print(f"    Amount: {donation.amount} {donation.currency}")
-        
-        # Get pending donations for the cause
-        pending_donations = session.query(Donations).filter(
-            Donations.cause_id == cause_id,
-            Donations.status == DonationStatus.PENDING
-        ).order_by(Donations.donation_date.asc()).all()
-        
-        if not pending_donations:
-            print(f"No pending donations found for cause {cause_id}")
-            return []
-            
-        print("\nPending donations:")
-        for donation in pending_donations:
-            print(f"  - ID: {donation.donation_id}")
-            print(f"    Customer: {donation.customer_id}")
-            print(f"    Amount: {donation.amount} {donation.currency}")
-            print(f"    Status: {donation.status}")
-        
-        # Calculate disbursements
-        remaining_amount = float(amount)
-        
-        for donation in pending_donations:
-            if remaining_amount <= 0:
-                break
-                
-            # Calculate fulfillment amount
-            donation_amount = float(donation.amount)
-            fulfillment_amount = min(donation_amount, remaining_amount)
-            
-            # Create disbursement record
-            disbursement = DisbursementsDonations(
-                id=str(uuid.uuid4()),
-                donation_id=donation.donation_id,
-                disbursement_id=transaction_hash,
-                cause_id=cause_id,
-                donor_id=donation.customer_id,
-                amount=fulfillment_amount,
-                created_at=datetime.utcnow()
-            )
-            session.add(disbursement)
-            disbursements_created.append({
-                'donation_id': donation.donation_id,
-                'customer_id': donation.customer_id,
-                'original_amount': donation_amount,
-                'amount': fulfillment_amount
-            })
-            print(f"Created disbursement for donation {donation.donation_id}: {fulfillment_amount} RLUSD")
-            
-            # Update donation status
-            if fulfillment_amount >= donation_amount:
-                donation.status = DonationStatus.COMPLETED
-            
-            remaining_amount -= fulfillment_amount
-        
-        # Print disbursement results
-        print("\nDisbursement results:")
-        for disbursement in disbursements_created:
-            print(f"  - Donation ID: {disbursement['donation_id']}")
-            print(f"    Customer: {disbursement['customer_id']}")
-            print(f"    Original Amount: {disbursement['original_amount']} RLUSD")
-            print(f"    Amount to Fulfill: {disbursement['amount']} RLUSD")
-        
-        # Print summary
-        unique_donors = set(d['customer_id'] for d in disbursements_created)
-        total_amount = sum(d['amount'] for d in disbursements_created)
-        print(f"\nUnique donors: {unique_donors}")
-        print(f"Total amount disbursed: {total_amount} RLUSD")
-        print("-" * 50)
+    Args:
+        sender_address: Classic address of the sending account
+        destination: Classic address of the receiving account
+        currency: The currency to send (RLUSD or XRP)
+        amount: Amount to send
+        **fields: Further Payment fields (sequence, fee, last_ledger_sequence, ...)
         
-        session.commit()
-        print("Successfully recorded disbursements")
-        return disbursements_created
+    Returns:
+        The unsigned payment
+    """
+    if currency.upper() == "RLUSD":
+        # Convert currency code to hex
+        currency_hex = RLUSD_CURRENCY_HEX
+        issuer_address = RLUSD_ISSUER
+    else:
+        currency_hex = "XRP"  # Hex for "XRP"
+        issuer_address = ""
+    return Payment(
+        account=sender_address,
+        amount={
+            "currency": currency_hex,
+            "value": str(amount),
+            "issuer": issuer_address
+        },
+        destination=destination,
+        **fields
+    )
+
+async def record_payment(transaction_hash: str, sender_id: str, beneficiary_id: str, amount, currency: str,
+                         post_payment: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Record a validated payment and run or queue its follow-up work.
+    
+    Args:
+        transaction_hash: Hash of the validated payment
+        sender_id: The ID of the sending customer
+        beneficiary_id: The ID of the receiving customer
+        amount: Amount sent
+        currency: Currency sent
+        post_payment: "background" or "inline" (defaults to POST_PAYMENT_CONFIG["mode"])
         
-    except Exception as e:
-        session.rollback()
-        print(f"Error processing disbursement: {str(e)}")
-        raise
-    finally:
-        session.close()
+    Returns:
+        The disbursement records when run inline, an empty list in the background
+    """
+    inline = (post_payment or POST_PAYMENT_CONFIG["mode"]) == "inline"
+    # Record the payment and queue its follow-up work; inline, the entry is leased to
+    # this call so that a worker poll does not claim it first
+    outbox_id = await asyncio.to_thread(
+        db.record_payment,
+        transaction_hash=transaction_hash,
+        sender_id=sender_id,
+        receiver_id=beneficiary_id,
+        amount=amount,
+        currency=currency,
+        lease_seconds=POST_PAYMENT_CONFIG["lease_seconds"] if inline else None
+    )
+    
+    # Also inline, where the worker retries a failed attempt
+    post_payment_worker.ensure_started()
+    if inline:
+        return await post_payment_worker.process_now(outbox_id)
+    post_payment_worker.notify()
+    return []
 
-async def execute_payment(sender_id, beneficiary_id, currency, amount):
+async def execute_payment(sender_id, beneficiary_id, currency, amount, diagnostics=None, signer: Optional[SigningService] = None,
+                          post_payment: Optional[str] = None):
     """
     Sends RLUSD from a wallet to a destination address
     
+    Once the payment is validated it is recorded together with a payment outbox entry.
+    The follow-up work (cause balance, disbursement allocation, notifications) is done
+    by the post-payment worker.
+    
     Parameters:
     sender_id: The ID of the sending customer
     beneficiary_id: The ID of the receiving customer
     currency: The currency to send (RLUSD or XRP)
     amount: Amount to send
+    diagnostics: Diagnostics level (defaults to PAYMENT_CONFIG["diagnostics"])
+    signer: Signing service used to sign in a process pool (defaults to the
+        configured service when SIGNING_CONFIG["use_process_pool"] is set)
+    post_payment: "background" to return once the payment is recorded, "inline" to wait
+        for the follow-up work (defaults to POST_PAYMENT_CONFIG["mode"])
     
     Returns:
-        Tuple of (success: bool, transaction_hash: Optional[str], disbursements: List[Dict[str, Any]])
+        Tuple of (success: bool, transaction_hash: Optional[str], disbursements: List[Dict[str, Any]]).
+        Disbursements are only returned inline; in the background they are allocated later.
+        
+    Raises:
+        PaymentNotSubmitted: If the payment failed before it was submitted
+        Exception: Errors from submission on are raised as is; the payment may have
+            been applied to the ledger
     """
     try:
+        diagnostics = get_diagnostics_level(diagnostics)
         # Get wallet pair
         sender_wallet, receiver_wallet = await get_wallet_pair(sender_id, beneficiary_id)
+        addresses = [sender_wallet.classic_address, receiver_wallet.classic_address]
         currency = currency.upper()
-        if currency == "RLUSD":
-            # Convert currency code to hex
-            currency_hex = "524C555344000000000000000000000000000000"  # Hex for "RLUSD"
-            issuer_address = "rQhWct2fv4Vc4KRjRgMrxa8xPN9Zx9iLKV"
-        else:
-            currency_hex = "XRP"  # Hex for "XRP"
-            issuer_address = ""
+        issuer_address = RLUSD_ISSUER if currency == "RLUSD" else ""
         
         # Prepare payment transaction
-        payment = Payment(
-            account=sender_wallet.classic_address,
-            amount={
-                "currency": currency_hex,
-                "value": str(amount),
-                "issuer": issuer_address
-            },
-            destination=receiver_wallet.classic_address,
-        )
-        
-        print("\n=== Sending RLUSD ===")
-        print(f"From: {sender_wallet.classic_address}")
-        print(f"To: {receiver_wallet.classic_address}")
-        print(f"Amount: {amount} RLUSD")
-        print(f"Issuer: {issuer_address}")
+        payment = build_payment(sender_wallet.classic_address, receiver_wallet.classic_address, currency, amount)
+    except Exception as e:
+        print(f"\nError preparing payment: {str(e)}")
+        raise PaymentNotSubmitted(str(e)) from e
+    
+    print("\n=== Sending RLUSD ===")
+    print(f"From: {sender_wallet.classic_address}")
+    print(f"To: {receiver_wallet.classic_address}")
+    print(f"Amount: {amount} RLUSD")
+    print(f"Issuer: {issuer_address}")
+    
+    # Get client
+    client = get_client()
+    
+    if diagnostics == DiagnosticsLevel.LEDGER:
+        await log_ledger_balances("initial", addresses)
+    
+    # Submit and wait for validation
+    response = await submit_and_wait_signed(payment, client, sender_wallet, signer or get_default_signer())
+    
+    # Check the result
+    if response.is_successful():
+        print("\nPayment successful!")
+        print(f"Transaction hash: {response.result['hash']}")
         
-        # Get client
-        client = get_client()
+        if diagnostics == DiagnosticsLevel.METADATA:
+            log_metadata_balances(response.result, addresses)
+        elif diagnostics == DiagnosticsLevel.LEDGER:
+            await log_ledger_balances("final", addresses)
         
-        # Submit and wait for validation
-        response = await submit_and_wait(payment, client, sender_wallet)
+        disbursements = await record_payment(
+            response.result['hash'], sender_id, beneficiary_id, amount, currency, post_payment
+        )
+        print(f"Created {len(disbursements)} disbursement records")
         
-        # Check the result
-        if response.is_successful():
-            print(f"response: {response}")
-            print("\nPayment successful!")
-            print(f"Transaction hash: {response.result['hash']}")
-            
-            # Insert transaction record
-            db.insert_transaction(
-                transaction_hash=response.result['hash'],
-                sender_id=sender_id,
-                receiver_id=beneficiary_id,
-                amount=amount,
-                currency=currency,
-                transaction_type=TransactionType.PAYMENT,
-                status=TransactionStatus.SUCCESS
-            )
-
-            sender_balance = await get_wallet_balance(sender_wallet.address, client)
-            db.upsert_cause_balance(sender_id, amount)
-
-            # Process disbursements to notify the donor in FIFO order
-            disbursements = []
-            try:
-                disbursements = process_disbursement(
-                    cause_id=beneficiary_id,
-                    amount=amount,
-                    transaction_hash=response.result['hash']
-                )
-                print(f"Created {len(disbursements)} disbursement records")
-            except Exception as e:
-                print(f"Error processing disbursements: {str(e)}")
-                # Continue since payment was successful
-            
-            return True, response.result['hash'], disbursements
-        else:
-            print("\nPayment failed")
-            print(f"Error: {response.result.get('engine_result_message')}")
-            return False, None, []
-            
-    except Exception as e:
-        print(f"\nError sending payment: {str(e)}")
+        return True, response.result['hash'], disbursements
+    else:
+        # Rejected by the ledger: a final outcome
+        print("\nPayment failed")
+        print(f"Error: {response.result.get('engine_result_message')}")
         return False, None, []
 
 async def main():
@@ -2,12 +2,17 @@
 XRPL wallet operations.
 """
 
-from typing import Tuple
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import event, inspect
 from xrpl.wallet import Wallet
 from xrpl.asyncio.wallet import generate_faucet_wallet
 from xrpl.asyncio.account import get_balance
+from config.blockchain_config import WALLET_CACHE_CONFIG
 from config.logger_config import setup_logger
-from db.database import CustomerType, init_db, get_db
+from db.database import Customer, CustomerType, init_db, get_db
 from db.sqlite_config import get_connection_string
 from .client import get_client
 # Set up logging
@@ -18,6 +23,142 @@ init_db(get_connection_string())
 db = get_db()
 client = get_client()
 
+class WalletCache:
+    """
+    Bounded LRU cache of derived wallets keyed by customer ID.
+    
+    Keeps the database seed lookup and key derivation off the payment hot path.
+    Entries expire after a TTL so seed changes made by other processes are picked
+    up eventually; changes made through the ORM in this process invalidate the
+    entry immediately.
+    """
+    
+    def __init__(self, max_size: int = WALLET_CACHE_CONFIG["max_size"], ttl_seconds: float = WALLET_CACHE_CONFIG["ttl_seconds"]):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_size: Maximum number of wallets kept; the least recently used is evicted first
+            ttl_seconds: Time after which a wallet is re-derived from the database seed
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._wallets: "OrderedDict[str, Tuple[float, Wallet]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, customer_id: str) -> Wallet:
+        """
+        Get the wallet of a customer, deriving it from the database seed on a miss.
+        
+        Args:
+            customer_id: The ID of the customer
+            
+        Returns:
+            Wallet: The customer's wallet
+        """
+        with self._lock:
+            entry = self._wallets.get(customer_id)
+            if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._wallets.move_to_end(customer_id)
+                return entry[1]
+        
+        wallet = Wallet.from_seed(db.get_customer_seed(customer_id))
+        with self._lock:
+            self._wallets[customer_id] = (time.monotonic(), wallet)
+            self._wallets.move_to_end(customer_id)
+            while len(self._wallets) > self.max_size:
+                self._wallets.popitem(last=False)
+        return wallet
+    
+    def get_many(self, customer_ids: Iterable[str]) -> Dict[str, Wallet]:
+        """
+        Get the wallets of many customers, loading all misses with a single query.
+        
+        Args:
+            customer_ids: The IDs of the customers
+            
+        Returns:
+            Dict[str, Wallet]: Wallets keyed by customer ID; customers that do not
+            exist or have no seed are left out
+        """
+        wallets = {}
+        missing = []
+        with self._lock:
+            now = time.monotonic()
+            for customer_id in set(customer_ids):
+                entry = self._wallets.get(customer_id)
+                if entry and now - entry[0] < self.ttl_seconds:
+                    self._wallets.move_to_end(customer_id)
+                    wallets[customer_id] = entry[1]
+                else:
+                    missing.append(customer_id)
+        if not missing:
+            return wallets
+        
+        loaded = {
+            customer_id: Wallet.from_seed(customer.wallet_seed)
+            for customer_id, customer in db.get_customers(missing).items()
+            if customer.wallet_seed
+        }
+        with self._lock:
+            now = time.monotonic()
+            for customer_id, wallet in loaded.items():
+                self._wallets[customer_id] = (now, wallet)
+                self._wallets.move_to_end(customer_id)
+            while len(self._wallets) > self.max_size:
+                self._wallets.popitem(last=False)
+        wallets.update(loaded)
+        return wallets
+    
+    def invalidate(self, customer_id: str) -> None:
+        """Drop the cached wallet of a customer."""
+        with self._lock:
+            self._wallets.pop(customer_id, None)
+    
+    def clear(self) -> None:
+        """Drop all cached wallets, e.g. on shutdown."""
+        with self._lock:
+            self._wallets.clear()
+    
+    def __len__(self) -> int:
+        return len(self._wallets)
+
+# Module-level wallet cache
+wallet_cache = WalletCache()
+
+@event.listens_for(Customer, "after_update")
+def invalidate_wallet_on_seed_change(mapper, connection, target) -> None:
+    """Invalidate the cached wallet when a customer's seed is changed through the ORM."""
+    if inspect(target).attrs.wallet_seed.history.has_changes():
+        wallet_cache.invalidate(target.customer_id)
+
+def get_customer_wallet(customer_id: str) -> Wallet:
+    """Get the (cached) wallet of a customer.
+    
+    Args:
+        customer_id: The ID of the customer
+        
+    Returns:
+        Wallet: The customer's wallet
+    """
+    return wallet_cache.get(customer_id)
+
+def get_customer_wallets(customer_ids: Iterable[str]) -> Dict[str, Wallet]:
+    """Get the (cached) wallets of many customers (see WalletCache.get_many).
+    
+    Args:
+        customer_ids: The IDs of the customers
+        
+    Returns:
+        Dict[str, Wallet]: Wallets keyed by customer ID
+    """
+    return wallet_cache.get_many(customer_ids)
+
+def clear_wallet_cache() -> None:
+    """Drop all cached wallets. Called on shutdown so derived keys do not outlive the process' work."""
+    wallet_cache.clear()
+    logger.info("Wallet cache cleared")
+
 async def get_wallet_pair(customer_id: str, beneficiary_id: str) -> Tuple[Wallet, Wallet]:
     """Get a pair of wallets for customer and beneficiary.
     
@@ -29,8 +170,8 @@ async def get_wallet_pair(customer_id: str, beneficiary_id: str) -> Tuple[Wallet
         Tuple[Wallet, Wallet]: The sender and receiver wallets
     """
     try:
-        sender_wallet = Wallet.from_seed(db.get_customer_seed(customer_id))
-        receiver_wallet = Wallet.from_seed(db.get_customer_seed(beneficiary_id))
+        sender_wallet = get_customer_wallet(customer_id)
+        receiver_wallet = get_customer_wallet(beneficiary_id)
         return sender_wallet, receiver_wallet
     except Exception as e:
         logger.error(f"Error fetching wallet pair: {str(e)}")
@@ -17,6 +17,83 @@ NETWORK_URLS = {
     "mainnet": "https://s2.ripple.com:51234"  # Uncomment when ready for production
 }
 
+# RLUSD issued currency
+RLUSD_CURRENCY_CODE = "RLUSD"
+RLUSD_CURRENCY_HEX = "524C555344000000000000000000000000000000"  # Hex for "RLUSD"
+RLUSD_ISSUER = "rQhWct2fv4Vc4KRjRgMrxa8xPN9Zx9iLKV"
+
+# Balance service configuration
+BALANCE_CONFIG = {
+    "issuers": [RLUSD_ISSUER],  # Trustline issuers reported by the balance service
+    "currencies": [RLUSD_CURRENCY_CODE],  # Trustline currencies reported by the balance service
+    "max_concurrency": 10,  # Maximum number of accounts queried in parallel
+    "cache_ttl_seconds": 15,  # How long a fetched balance is served from cache
+    "cache_max_size": 10000  # Accounts whose balances are cached; the least recently used is evicted first
+}
+
+# Payment configuration
+PAYMENT_CONFIG = {
+    # Diagnostics level of the payment path:
+    # "off"      - submit and wait for validation only
+    # "metadata" - additionally log pre/post balances derived from the transaction metadata
+    # "ledger"   - additionally query balances before/after and look the transaction up (debugging only)
+    "diagnostics": "metadata"
+}
+
+# Idempotency-Key handling of /disburse and /donate
+IDEMPOTENCY_CONFIG = {
+    "wait_timeout_seconds": 60,  # How long a duplicate waits for the original request before getting a 409
+    "poll_interval_seconds": 0.2,  # Poll interval when the original request runs in another process
+    "lease_seconds": 900  # A request in progress for longer is presumed dead (e.g. crashed process) and its key taken over
+}
+
+# Post-payment pipeline configuration
+POST_PAYMENT_CONFIG = {
+    # When the follow-up work of a validated payment (cause balance, disbursement allocation,
+    # notifications) runs:
+    # "background" - /disburse responds once the payment is recorded, a worker does the rest
+    # "inline"     - /disburse waits for the follow-up work and returns the disbursements
+    "mode": "background",
+    "batch_size": 50,  # Outbox entries claimed per poll
+    "poll_interval_seconds": 1.0,  # Idle time between polls of the outbox
+    "lease_seconds": 60,  # Time a claimed entry is reserved before another worker may retry it
+    "max_attempts": 5,  # Attempts before an entry is marked failed
+    "retry_backoff_seconds": 2.0  # Delay before the first retry, doubled on each further attempt
+}
+
+# Batch payment configuration
+BATCH_PAYMENT_CONFIG = {
+    "max_legs": 500,  # Maximum payments per batch request
+    "max_concurrency": 20,  # Maximum concurrent ledger requests of a batch
+    "poll_interval_seconds": 1.0  # Interval between validation checks of submitted payments
+}
+
+# Transaction signing configuration
+SIGNING_CONFIG = {
+    "use_process_pool": False,  # Sign payments and checks in a process pool instead of on the event loop
+    "max_workers": None  # Pool size (None uses the number of CPUs)
+}
+
+# Derived wallet cache configuration
+WALLET_CACHE_CONFIG = {
+    "max_size": 256,  # Maximum number of customer wallets kept in memory
+    "ttl_seconds": 300  # Time after which a wallet is re-derived from the database seed
+}
+
+# Trustline provisioning configuration
+TRUSTLINE_CONFIG = {
+    "default_limit": "1000000000",  # Trust line limit set on customer accounts
+    "max_concurrency": 20  # Maximum number of accounts checked/provisioned in parallel
+}
+
+# Bulk customer onboarding configuration
+ONBOARDING_CONFIG = {
+    "wallet_concurrency": 5,  # Parallel faucet requests (the testnet faucet throttles aggressively)
+    "insert_batch_size": 500,  # Customers inserted per database transaction
+    "insert_batch_delay_seconds": 0.5,  # Maximum time a customer waits for its insert batch to fill
+    "trustline_concurrency": 20  # Parallel trustline checks/submissions
+}
+
 def get_network_url(network: str = None) -> str:
     """
     Get the XRPL network URL based on the specified network.
@@ -28,4 +105,4 @@ def get_network_url(network: str = None) -> str:
         str: The network URL
     """
     network = network or DEFAULT_NETWORK
-    return NETWORK_URLS.get(network, XRPL_TESTNET_URL) 
\ No newline at end of file
+    return NETWORK_URLS.get(network, XRPL_TESTNET_URL) 
@@ -0,0 +1,42 @@
+"""
+Alembic environment.
+
+Migrates the connection handed over by db.migrate, or the database of
+get_connection_string() when run from the alembic command line.
+"""
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from db.database import Base
+from db.sqlite_config import get_connection_string
+
+# Models, for `alembic revision --autogenerate`
+target_metadata = Base.metadata
+
+def run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite can only alter columns by copying the table
+        render_as_batch=connection.dialect.name == "sqlite"
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+    engine = create_engine(get_connection_string())
+    try:
+        with engine.begin() as connection:
+            run_migrations(connection)
+    finally:
+        engine.dispose()
+
+if context.is_offline_mode():
+    # The baseline inspects the database to adopt schemas that predate versioning
+    raise RuntimeError("Offline (--sql) migrations are not supported")
+run_migrations_online()
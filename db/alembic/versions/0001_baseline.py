@@ -0,0 +1,274 @@
+"""Baseline schema
+
+Creates the schema on an empty database. Databases set up before migrations were
+versioned are adopted instead: missing tables, columns and indexes are added and the
+data backfills of the former db/migrations scripts are run as set-based statements.
+Remaining donation amounts are backfilled in chunks afterwards (see db/backfill.py).
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from db.backfill import Backfill
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_baseline'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _tables():
+    """The tables of the baseline schema, in dependency order."""
+    return [
+        ("customers", [
+            sa.Column("customer_id", sa.String(50), primary_key=True),
+            sa.Column("customer_name", sa.String(255), nullable=True),
+            sa.Column("wallet_seed", sa.String(128)),
+            sa.Column("wallet_address", sa.String(128), nullable=True),
+            sa.Column("email_address", sa.String(255), nullable=True),
+            sa.Column("customer_type", sa.Enum("SENDER", "RECEIVER", name="customertype")),
+            sa.Column("created_at", sa.DateTime),
+            sa.Column("updated_at", sa.DateTime),
+        ]),
+        ("causes", [
+            sa.Column("cause_id", sa.String(50), primary_key=True),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.Column("description", sa.String, nullable=False),
+            sa.Column("imageUrl", sa.String, nullable=False),
+            sa.Column("category", sa.String, nullable=False),
+            sa.Column("goal", sa.Numeric(20, 6), nullable=False),
+            sa.Column("balance", sa.Numeric(20, 6), nullable=False),
+            sa.Column("version", sa.Integer, nullable=False, server_default="0"),
+        ]),
+        ("donations", [
+            sa.Column("donation_id", sa.String(50), primary_key=True),
+            sa.Column("customer_id", sa.String(50), nullable=False),
+            sa.Column("cause_id", sa.String(50), nullable=False),
+            sa.Column("amount", sa.Numeric(20, 6), nullable=False),
+            sa.Column("currency", sa.String, nullable=False),
+            sa.Column("donation_date", sa.DateTime, nullable=False),
+            sa.Column("status", sa.Enum("PENDING", "PARTIAL", "COMPLETED", "FAILED", name="donationstatus"),
+                      nullable=False),
+            sa.Column("remaining_amount", sa.Numeric(20, 6), nullable=False),
+        ]),
+        ("disbursements_donations", [
+            sa.Column("id", sa.String, primary_key=True),
+            sa.Column("donation_id", sa.String, nullable=False),
+            sa.Column("disbursement_id", sa.String, nullable=False),
+            sa.Column("cause_id", sa.String, nullable=False),
+            sa.Column("donor_id", sa.String, nullable=False),
+            sa.Column("amount", sa.Float, nullable=False),
+            sa.Column("created_at", sa.DateTime, nullable=False),
+        ]),
+        ("customer_relationships", [
+            sa.Column("sender_id", sa.String, sa.ForeignKey("customers.customer_id", ondelete="CASCADE"),
+                      primary_key=True),
+            sa.Column("receiver_id", sa.String, sa.ForeignKey("customers.customer_id", ondelete="CASCADE"),
+                      primary_key=True),
+        ]),
+        ("transactions", [
+            sa.Column("transaction_hash", sa.String, primary_key=True),
+            sa.Column("sender_id", sa.String, sa.ForeignKey("customers.customer_id", ondelete="CASCADE"),
+                      nullable=False),
+            sa.Column("receiver_id", sa.String, sa.ForeignKey("customers.customer_id", ondelete="CASCADE"),
+                      nullable=False),
+            sa.Column("amount", sa.Numeric(20, 6), nullable=False),
+            sa.Column("currency", sa.String, nullable=False),
+            sa.Column("transaction_type", sa.Enum("PAYMENT", name="transactiontype"), nullable=False),
+            sa.Column("status", sa.Enum("SUCCESS", "FAILED", name="transactionstatus"), nullable=False),
+            sa.Column("insertion_date", sa.DateTime, nullable=False),
+        ]),
+        ("checks", [
+            sa.Column("check_id", sa.String, primary_key=True),
+            sa.Column("transaction_hash", sa.String, nullable=False, unique=True),
+            sa.Column("sender_id", sa.String, sa.ForeignKey("customers.customer_id", ondelete="CASCADE"),
+                      nullable=False),
+            sa.Column("receiver_id", sa.String, sa.ForeignKey("customers.customer_id", ondelete="CASCADE"),
+                      nullable=False),
+            sa.Column("amount", sa.Numeric(20, 6), nullable=False),
+            sa.Column("currency", sa.String, nullable=False),
+            sa.Column("expiration_date", sa.DateTime, nullable=False),
+            sa.Column("insertion_date", sa.DateTime, nullable=False),
+            sa.Column("check_type", sa.Enum("CHECK_CREATE", "CHECK_CASH", name="checktype"), nullable=False),
+        ]),
+        ("disaster_responses", [
+            sa.Column("response_id", sa.String(36), primary_key=True),
+            sa.Column("customer_id", sa.String(36), nullable=False),
+            sa.Column("beneficiary_id", sa.String(36), nullable=False),
+            sa.Column("location", sa.String(255), nullable=False),
+            sa.Column("disaster_type", sa.String(50), nullable=False),
+            sa.Column("severity", sa.String(20), nullable=False),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("is_aid_required", sa.Boolean, nullable=False),
+            sa.Column("estimated_affected", sa.Integer, nullable=False),
+            sa.Column("required_aid_amount", sa.Float, nullable=False),
+            sa.Column("aid_currency", sa.String(10), nullable=False),
+            sa.Column("evacuation_needed", sa.Boolean, nullable=False),
+            sa.Column("disaster_date", sa.String(50), nullable=False),
+            sa.Column("timestamp", sa.DateTime, nullable=False),
+            sa.Column("confidence_score", sa.String(10), nullable=False),
+            sa.Column("is_valid", sa.Boolean, nullable=False),
+            sa.Column("reasoning", sa.String(1000), nullable=False),
+            sa.Column("validation_reasoning", sa.String(1000), nullable=False),
+            sa.Column("summarized_news", sa.String(2000), nullable=True),
+            sa.Column("news_link", sa.String(2000), nullable=True),
+            sa.Column("created_at", sa.DateTime),
+        ]),
+        ("payment_outbox", [
+            sa.Column("outbox_id", sa.String(36), primary_key=True),
+            sa.Column("transaction_hash", sa.String, nullable=False, unique=True),
+            sa.Column("sender_id", sa.String, nullable=False),
+            sa.Column("receiver_id", sa.String, nullable=False),
+            sa.Column("amount", sa.Numeric(20, 6), nullable=False),
+            sa.Column("currency", sa.String, nullable=False),
+            sa.Column("status", sa.Enum("PENDING", "DONE", "FAILED", name="outboxstatus"), nullable=False),
+            sa.Column("balance_applied", sa.Boolean, nullable=False),
+            sa.Column("allocated", sa.Boolean, nullable=False),
+            sa.Column("attempts", sa.Integer, nullable=False),
+            sa.Column("last_error", sa.String(1000), nullable=True),
+            sa.Column("next_attempt_at", sa.DateTime, nullable=False),
+            sa.Column("created_at", sa.DateTime, nullable=False),
+            sa.Column("processed_at", sa.DateTime, nullable=True),
+        ]),
+        ("idempotency_keys", [
+            sa.Column("endpoint", sa.String(100), primary_key=True),
+            sa.Column("idempotency_key", sa.String(255), primary_key=True),
+            sa.Column("request_hash", sa.String(64), nullable=False),
+            sa.Column("status", sa.Enum("IN_PROGRESS", "COMPLETED", name="idempotencystatus"), nullable=False),
+            sa.Column("response_body", sa.String, nullable=True),
+            sa.Column("created_at", sa.DateTime, nullable=False),
+            sa.Column("completed_at", sa.DateTime, nullable=True),
+        ]),
+    ]
+
+# (name, table, columns, unique)
+INDEXES = [
+    ("ix_customers_customer_id", "customers", ["customer_id"], False),
+    ("ix_customers_wallet_address", "customers", ["wallet_address"], False),
+    ("ix_donations_cause_status_date", "donations", ["cause_id", "status", "donation_date"], False),
+    ("ix_donations_customer_date", "donations", ["customer_id", "donation_date"], False),
+    ("ix_disbursements_donations_donation_id", "disbursements_donations", ["donation_id"], False),
+    ("ix_disbursements_donations_donor_id", "disbursements_donations", ["donor_id"], False),
+    ("ix_transactions_sender_id", "transactions", ["sender_id"], False),
+    ("ix_transactions_receiver_id", "transactions", ["receiver_id"], False),
+    ("ix_checks_sender_id", "checks", ["sender_id"], False),
+    ("ix_checks_receiver_id", "checks", ["receiver_id"], False),
+    ("ux_disaster_responses_customer_beneficiary", "disaster_responses", ["customer_id", "beneficiary_id"], True),
+    ("ix_payment_outbox_status_next_attempt", "payment_outbox", ["status", "next_attempt_at"], False),
+]
+
+
+def _backfill_remaining_amounts(connection, keys) -> None:
+    """Remaining amounts of adopted donations from what has already been disbursed."""
+    statement = sa.text("""
+        UPDATE donations
+        SET remaining_amount = amount - COALESCE((
+            SELECT SUM(dd.amount)
+            FROM disbursements_donations dd
+            WHERE dd.donation_id = donations.donation_id
+        ), 0)
+        WHERE donation_id IN :keys
+    """).bindparams(sa.bindparam("keys", expanding=True))
+    connection.execute(statement, {"keys": keys})
+    statement = sa.text("""
+        UPDATE donations
+        SET remaining_amount = CASE WHEN remaining_amount < 0 THEN 0 ELSE remaining_amount END,
+            status = CASE
+                WHEN status <> 'PENDING' OR remaining_amount >= amount THEN status
+                WHEN remaining_amount <= 0 THEN 'COMPLETED'
+                ELSE 'PARTIAL'
+            END
+        WHERE donation_id IN :keys
+    """).bindparams(sa.bindparam("keys", expanding=True))
+    connection.execute(statement, {"keys": keys})
+
+
+backfills = [
+    Backfill(
+        name="0001_donations_remaining_amount",
+        table="donations",
+        key="donation_id",
+        apply=_backfill_remaining_amounts,
+        where="remaining_amount IS NULL"
+    )
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing_tables = set(inspector.get_table_names())
+
+    for name, columns in _tables():
+        if name not in existing_tables:
+            op.create_table(name, *columns)
+            continue
+        # Adopt a table created before migrations were versioned
+        existing_columns = {column["name"] for column in inspector.get_columns(name)}
+        for column in columns:
+            if column.name not in existing_columns:
+                if column.server_default is None:
+                    # Existing rows have no value yet, the backfills below fill them in
+                    column.nullable = True
+                op.add_column(name, column)
+
+    if existing_tables:
+        _backfill_adopted_data()
+
+    existing_indexes = {
+        index["name"]
+        for table in {table for _, table, _, _ in INDEXES}
+        for index in sa.inspect(op.get_bind()).get_indexes(table)
+    }
+    for name, table, columns, unique in INDEXES:
+        if name not in existing_indexes:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def _backfill_adopted_data() -> None:
+    """Fill the columns added to small adopted tables and clean up rows the new indexes reject."""
+    op.execute("UPDATE causes SET balance = 0 WHERE balance IS NULL")
+    op.execute("""
+        UPDATE customers SET created_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+        WHERE created_at IS NULL
+    """)
+
+    # Ledger indexes are no longer stored with transactions
+    if "ledger_index" in {column["name"] for column in sa.inspect(op.get_bind()).get_columns("transactions")}:
+        with op.batch_alter_table("transactions") as batch:
+            batch.drop_column("ledger_index")
+
+    # Keep the latest assessment of each customer and beneficiary for the unique index
+    op.execute("""
+        DELETE FROM disaster_responses
+        WHERE response_id NOT IN (
+            SELECT response_id FROM (
+                SELECT response_id, ROW_NUMBER() OVER (
+                    PARTITION BY customer_id, beneficiary_id
+                    ORDER BY "timestamp" DESC, created_at DESC
+                ) AS position
+                FROM disaster_responses
+            ) ranked
+            WHERE position = 1
+        )
+    """)
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    tables = _tables()
+    for name, _ in reversed(tables):
+        op.drop_table(name)
+    # Enum types outlive their tables on PostgreSQL
+    for _, columns in tables:
+        for column in columns:
+            if isinstance(column.type, sa.Enum):
+                column.type.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,121 @@
+"""Legacy charity detail backfills
+
+Set-based replacements of the former add_amount_raised and populate_charity_details
+scripts, with amount_raised filled in by a chunked backfill (see db/backfill.py). Both
+only apply to databases that still have the customer_details table the causes table
+replaced; elsewhere this revision does nothing.
+
+Revision ID: 0002_legacy_charity_backfills
+Revises: 0001_baseline
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from db.backfill import Backfill
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_legacy_charity_backfills'
+down_revision: Union[str, None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Charity data
+CHARITIES = [
+    {
+        "name": "Global Relief Disaster Response",
+        "goal": 1000000.00,
+        "description": "Providing immediate relief and long-term recovery support to communities affected by natural disasters worldwide."
+    },
+    {
+        "name": "Rebuilding After the Storm with ShelterNow",
+        "goal": 750000.00,
+        "description": "Building resilient homes and communities for families displaced by severe weather events."
+    },
+    {
+        "name": "Mobile Clinics for Crisis Zones with HealthBridge",
+        "goal": 500000.00,
+        "description": "Delivering essential medical care and supplies to underserved populations in conflict and disaster areas."
+    },
+    {
+        "name": "Emergency Aid in Gaza with Humanity Frontline",
+        "goal": 2500000.00,
+        "description": "Providing critical humanitarian assistance and medical support to affected communities in Gaza."
+    },
+    {
+        "name": "Combating Cholera with CleanMedic Haiti",
+        "goal": 300000.00,
+        "description": "Implementing water purification systems and medical interventions to prevent cholera outbreaks in Haiti."
+    },
+    {
+        "name": "Feeding Children in Drought with NourishNow",
+        "goal": 600000.00,
+        "description": "Ensuring food security and nutrition for children in drought-affected regions through sustainable solutions."
+    }
+]
+
+
+def _backfill_amount_raised(connection, keys) -> None:
+    """A random amount between 10% and 90% of the goal."""
+    fraction = "random()" if connection.dialect.name == "postgresql" else "(ABS(RANDOM()) % 1000000) / 1000000.0"
+    statement = sa.text(f"""
+        UPDATE customer_details
+        SET amount_raised = CAST(goal * (0.1 + 0.8 * {fraction}) AS INTEGER)
+        WHERE customer_id IN :keys
+    """).bindparams(sa.bindparam("keys", expanding=True))
+    connection.execute(statement, {"keys": keys})
+
+
+backfills = [
+    Backfill(
+        name="0002_customer_details_amount_raised",
+        table="customer_details",
+        key="customer_id",
+        apply=_backfill_amount_raised,
+        where="amount_raised IS NULL"
+    )
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "customer_details" not in inspector.get_table_names():
+        return
+
+    # One statement pairs the charities with the first receivers that have no details yet
+    charities = " UNION ALL ".join(
+        f"SELECT {position} AS position, :name_{position} AS name, :goal_{position} AS goal, "
+        f":description_{position} AS description"
+        for position in range(len(CHARITIES))
+    )
+    parameters = {}
+    for position, charity in enumerate(CHARITIES):
+        parameters.update({
+            f"name_{position}": charity["name"],
+            f"goal_{position}": charity["goal"],
+            f"description_{position}": charity["description"]
+        })
+    bind.execute(sa.text(f"""
+        INSERT INTO customer_details (customer_id, name, goal, description, total_donations)
+        SELECT receivers.customer_id, charities.name, charities.goal, charities.description, 0
+        FROM (
+            SELECT customers.customer_id, ROW_NUMBER() OVER (ORDER BY customers.created_at, customers.customer_id) - 1 AS position
+            FROM customers
+            WHERE customers.customer_type = 'RECEIVER'
+            AND NOT EXISTS (SELECT 1 FROM customer_details d WHERE d.customer_id = customers.customer_id)
+        ) receivers
+        JOIN ({charities}) charities ON charities.position = receivers.position
+    """), parameters)
+
+    if "amount_raised" not in {column["name"] for column in inspector.get_columns("customer_details")}:
+        op.add_column("customer_details", sa.Column("amount_raised", sa.Integer, nullable=True))
+
+
+def downgrade() -> None:
+    # Backfilled data is kept
+    pass
@@ -0,0 +1,71 @@
+"""Backfill checkpoints
+
+Creates the checkpoint table of the chunked backfill runner (see db/backfill.py) and
+declares the customer name backfill of the former add_customer_names script.
+
+Revision ID: 0003_backfill_checkpoints
+Revises: 0002_legacy_charity_backfills
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from db.backfill import update_backfill
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_backfill_checkpoints'
+down_revision: Union[str, None] = '0002_legacy_charity_backfills'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Customer names mapping
+CUSTOMER_NAMES = {
+    "customer-1": "Global Relief Fund",
+    "customer-2": "Flood Recovery in Louisiana",
+    "customer-3": "Hurricane Harvey Relief",
+    "customer-5": "Earthquake Relief in Turkey",
+    "customer-6": "Hurricane Maria Relief",
+    "customer-7": "Combating Cholera with CleanMedic Haiti"
+}
+
+_parameters = {}
+for _position, (_customer_id, _name) in enumerate(CUSTOMER_NAMES.items()):
+    _parameters[f"customer_{_position}"] = _customer_id
+    _parameters[f"name_{_position}"] = _name
+
+backfills = [
+    update_backfill(
+        name="0003_customer_names",
+        table="customers",
+        key="customer_id",
+        set_clause="customer_name = CASE customer_id "
+                   + " ".join(f"WHEN :customer_{i} THEN :name_{i}" for i in range(len(CUSTOMER_NAMES)))
+                   + " END",
+        where="customer_name IS NULL AND customer_id IN ("
+              + ", ".join(f":customer_{i}" for i in range(len(CUSTOMER_NAMES))) + ")",
+        parameters=_parameters
+    )
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "backfill_checkpoints",
+        sa.Column("name", sa.String(100), primary_key=True),
+        sa.Column("last_key", sa.String(255), nullable=True),
+        sa.Column("rows_processed", sa.Integer, nullable=False),
+        sa.Column("chunks", sa.Integer, nullable=False),
+        sa.Column("status", sa.Enum("RUNNING", "COMPLETED", name="backfillstatus"), nullable=False),
+        sa.Column("started_at", sa.DateTime, nullable=False),
+        sa.Column("updated_at", sa.DateTime, nullable=False),
+        sa.Column("completed_at", sa.DateTime, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("backfill_checkpoints")
+    sa.Enum(name="backfillstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,57 @@
+"""Keyset pagination indexes
+
+Listings page through rows by (date, primary key) (see db/pagination.py). These indexes
+cover that sort key, after the equality filter where a listing has one, so every page
+is a range scan of the index instead of a sort of all matching rows.
+
+Revision ID: 0004_keyset_pagination_indexes
+Revises: 0003_backfill_checkpoints
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_keyset_pagination_indexes'
+down_revision: Union[str, None] = '0003_backfill_checkpoints'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Indexes replaced by wider ones: name, table, columns
+REPLACED_INDEXES = [
+    ("ix_donations_customer_date", "donations", ["customer_id", "donation_date"]),
+    ("ix_transactions_sender_id", "transactions", ["sender_id"]),
+    ("ix_transactions_receiver_id", "transactions", ["receiver_id"]),
+    ("ix_checks_sender_id", "checks", ["sender_id"]),
+    ("ix_checks_receiver_id", "checks", ["receiver_id"]),
+]
+
+INDEXES = [
+    ("ix_donations_customer_date", "donations", ["customer_id", "donation_date", "donation_id"]),
+    ("ix_donations_cause_date", "donations", ["cause_id", "donation_date", "donation_id"]),
+    ("ix_donations_date", "donations", ["donation_date", "donation_id"]),
+    ("ix_transactions_sender_date", "transactions", ["sender_id", "insertion_date", "transaction_hash"]),
+    ("ix_transactions_receiver_date", "transactions", ["receiver_id", "insertion_date", "transaction_hash"]),
+    ("ix_transactions_date", "transactions", ["insertion_date", "transaction_hash"]),
+    ("ix_checks_sender_date", "checks", ["sender_id", "insertion_date", "check_id"]),
+    ("ix_checks_receiver_date", "checks", ["receiver_id", "insertion_date", "check_id"]),
+    ("ix_checks_date", "checks", ["insertion_date", "check_id"]),
+    ("ix_disaster_responses_timestamp", "disaster_responses", ["timestamp", "response_id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, _ in REPLACED_INDEXES:
+        op.drop_index(name, table_name=table)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    for name, table, columns in REPLACED_INDEXES:
+        op.create_index(name, table, columns)
@@ -0,0 +1,28 @@
+"""Disbursement hash index
+
+The post-payment worker reloads the disbursement records of an already allocated
+payment by its transaction hash when it retries the payment's notifications.
+
+Revision ID: 0005_disbursement_hash_index
+Revises: 0004_keyset_pagination_indexes
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_disbursement_hash_index'
+down_revision: Union[str, None] = '0004_keyset_pagination_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_disbursements_donations_disbursement_id", "disbursements_donations", ["disbursement_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_disbursements_donations_disbursement_id", table_name="disbursements_donations")
@@ -0,0 +1,192 @@
+"""
+Resumable batched data backfills.
+
+A migration declares its data backfills in a module-level `backfills` list instead of
+rewriting a whole table in its schema transaction. The BackfillRunner walks the rows
+that need a backfill in keyset order, one chunk per transaction, and records a
+checkpoint with the last key of each chunk in the same transaction. A crashed or
+stopped backfill therefore resumes after the last committed chunk, and other writers
+only ever wait for one chunk.
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from config.logger_config import setup_logger
+from db.database import BackfillCheckpoint, BackfillStatus
+from db.sqlite_config import BACKFILL_CONFIG
+
+logger = setup_logger(__name__)
+
+@dataclass
+class Backfill:
+    """A data backfill over one table."""
+    name: str  # Unique name the checkpoint is recorded under
+    table: str
+    key: str  # Unique, ordered column the chunks are paginated on
+    apply: Callable[[Connection, List[Any]], None]  # Backfills the rows with the given keys
+    where: Optional[str] = None  # SQL condition selecting the rows that still need the backfill
+    parameters: Dict[str, Any] = field(default_factory=dict)  # Bound parameters used by where
+
+def update_backfill(name: str, table: str, key: str, set_clause: str, where: Optional[str] = None,
+                    parameters: Optional[Dict[str, Any]] = None) -> Backfill:
+    """
+    Declare a backfill that runs one UPDATE per chunk.
+
+    Args:
+        name: Unique name of the backfill
+        table: Table to update
+        key: Unique column the chunks are paginated on
+        set_clause: SQL SET clause, e.g. "remaining_amount = amount"
+        where: SQL condition selecting the rows that still need the backfill
+        parameters: Bound parameters used by set_clause and where
+
+    Returns:
+        Backfill: The declaration
+    """
+    statement = text(f"UPDATE {table} SET {set_clause} WHERE {key} IN :keys").bindparams(
+        bindparam("keys", expanding=True)
+    )
+
+    def apply(connection: Connection, keys: List[Any]) -> None:
+        connection.execute(statement, {**(parameters or {}), "keys": keys})
+
+    return Backfill(name=name, table=table, key=key, apply=apply, where=where, parameters=parameters or {})
+
+class BackfillRunner:
+    """Runs backfills in checkpointed, throttled chunks."""
+
+    def __init__(self, engine: Engine, chunk_size: Optional[int] = None, throttle_seconds: Optional[float] = None,
+                 dry_run: bool = False):
+        """
+        Args:
+            engine: Engine of the database to backfill
+            chunk_size: Rows per transaction (defaults to BACKFILL_CONFIG)
+            throttle_seconds: Pause between chunks (defaults to BACKFILL_CONFIG)
+            dry_run: Only count the rows that would be backfilled, without writing anything
+        """
+        self.engine = engine
+        self.chunk_size = chunk_size or BACKFILL_CONFIG["chunk_size"]
+        self.throttle_seconds = BACKFILL_CONFIG["throttle_seconds"] if throttle_seconds is None else throttle_seconds
+        self.dry_run = dry_run
+        self.progress: Dict[str, Dict[str, Any]] = {}
+
+    def run(self, backfill: Backfill, max_chunks: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run a backfill from its last checkpoint until no rows need it anymore.
+
+        Args:
+            backfill: The backfill to run
+            max_chunks: Stop after this many chunks (the next run resumes from there)
+
+        Returns:
+            Progress of this run (see metrics)
+        """
+        progress = self.progress[backfill.name] = {
+            "status": BackfillStatus.RUNNING.value,
+            "dry_run": self.dry_run,
+            "rows": 0,
+            "chunks": 0,
+            "last_key": None,
+            "elapsed_seconds": 0.0,
+            "rows_per_second": 0.0
+        }
+        with self.engine.connect() as connection:
+            if not inspect(connection).has_table(backfill.table):
+                # The table only exists in some deployments
+                progress["status"] = BackfillStatus.COMPLETED.value
+                return progress
+            checkpoint = connection.execute(
+                select(BackfillCheckpoint).where(BackfillCheckpoint.name == backfill.name)
+            ).first()
+        if checkpoint is not None and checkpoint.status == BackfillStatus.COMPLETED:
+            progress["status"] = BackfillStatus.COMPLETED.value
+            return progress
+
+        last_key = json.loads(checkpoint.last_key) if checkpoint is not None and checkpoint.last_key else None
+        if checkpoint is None and not self.dry_run:
+            with self.engine.begin() as connection:
+                connection.execute(BackfillCheckpoint.__table__.insert().values(
+                    name=backfill.name, rows_processed=0, chunks=0, status=BackfillStatus.RUNNING,
+                    started_at=datetime.utcnow(), updated_at=datetime.utcnow()
+                ))
+        if last_key is not None:
+            logger.info(f"Resuming backfill {backfill.name} after key {last_key}")
+
+        started = time.monotonic()
+        while max_chunks is None or progress["chunks"] < max_chunks:
+            keys = self._run_chunk(backfill, last_key)
+            if not keys:
+                break
+            last_key = keys[-1]
+            progress["rows"] += len(keys)
+            progress["chunks"] += 1
+            progress["last_key"] = last_key
+            progress["elapsed_seconds"] = time.monotonic() - started
+            progress["rows_per_second"] = progress["rows"] / progress["elapsed_seconds"] if progress["elapsed_seconds"] else 0.0
+            if progress["chunks"] % BACKFILL_CONFIG["log_every_chunks"] == 0:
+                logger.info(f"Backfill {backfill.name}: {progress['rows']} rows in {progress['chunks']} chunks "
+                            f"({progress['rows_per_second']:.0f} rows/s)")
+            if len(keys) < self.chunk_size:
+                break
+            if self.throttle_seconds:
+                time.sleep(self.throttle_seconds)
+        else:
+            logger.info(f"Paused backfill {backfill.name} after {progress['chunks']} chunks")
+            return progress
+
+        if not self.dry_run:
+            with self.engine.begin() as connection:
+                connection.execute(
+                    update(BackfillCheckpoint).where(BackfillCheckpoint.name == backfill.name)
+                    .values(status=BackfillStatus.COMPLETED, completed_at=datetime.utcnow(), updated_at=datetime.utcnow())
+                )
+        progress["status"] = BackfillStatus.COMPLETED.value
+        progress["elapsed_seconds"] = time.monotonic() - started
+        logger.info(f"{'Dry run of backfill' if self.dry_run else 'Completed backfill'} {backfill.name}: "
+                    f"{progress['rows']} rows in {progress['chunks']} chunks")
+        return progress
+
+    def _run_chunk(self, backfill: Backfill, last_key: Any) -> List[Any]:
+        """Backfill the next chunk after last_key and checkpoint it in one transaction."""
+        conditions = [f"{backfill.key} > :last_key"] if last_key is not None else []
+        if backfill.where:
+            conditions.append(f"({backfill.where})")
+        query = text(
+            f"SELECT {backfill.key} FROM {backfill.table}"
+            f"{' WHERE ' + ' AND '.join(conditions) if conditions else ''}"
+            f" ORDER BY {backfill.key} LIMIT :limit"
+        )
+        with self.engine.begin() as connection:
+            keys = list(connection.execute(
+                query, {**backfill.parameters, "last_key": last_key, "limit": self.chunk_size}
+            ).scalars())
+            if not keys or self.dry_run:
+                return keys
+            backfill.apply(connection, keys)
+            connection.execute(
+                update(BackfillCheckpoint).where(BackfillCheckpoint.name == backfill.name)
+                .values(
+                    last_key=json.dumps(keys[-1]),
+                    rows_processed=BackfillCheckpoint.rows_processed + len(keys),
+                    chunks=BackfillCheckpoint.chunks + 1,
+                    updated_at=datetime.utcnow()
+                )
+            )
+        return keys
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the progress of the backfills run.
+
+        Returns:
+            Dictionary keyed by backfill name with status, dry_run, rows, chunks,
+            last_key, elapsed_seconds and rows_per_second
+        """
+        return dict(self.progress)
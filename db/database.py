@@ -2,14 +2,24 @@
 Database module for managing application data.
 """
 
-from typing import Optional, List, Dict
+from typing import Any, Callable, Optional, List, Dict, NamedTuple, Type
 from enum import Enum
-from sqlalchemy import create_engine, Column, String, ForeignKey, Enum as SQLEnum, Numeric, event, DateTime, Integer, Float, Boolean
+from sqlalchemy import Column, String, ForeignKey, Enum as SQLEnum, Numeric, event, DateTime, Integer, Float, Boolean, Index, case, cast, delete, func, insert, literal, or_, select, text, tuple_, union_all, update
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import Session, sessionmaker, relationship
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from db.sqlite_config import PAGINATION_CONFIG, WRITE_BEHIND_CONFIG, create_database_engine
+from db.instrumentation import QueryInstrumentation, QueryStats
+from db.migrate import ensure_schema
+from db.pagination import Page, decode_cursor, encode_cursor
+from db.unit_of_work import UnitOfWork, get_current_unit_of_work
+from db.write_behind import WriteBehindBuffer
 from config.logger_config import setup_logger
-from datetime import datetime
+from datetime import datetime, timedelta
+import sqlite3
+import threading
 import uuid
 from decimal import Decimal
 
@@ -21,6 +31,8 @@ Base = declarative_base()
 # Enable foreign key support for SQLite
 @event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.close()
@@ -57,6 +69,11 @@ class Customer(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Payments and traces are resolved to customers and causes by wallet address
+        Index("ix_customers_wallet_address", "wallet_address"),
+    )
+    
     # Relationships
     # sent_transactions = relationship("CustomerRelationship", 
     #                                foreign_keys="CustomerRelationship.sender_id",
@@ -86,9 +103,14 @@ class Customer(Base):
 class DonationStatus(str, Enum):
     """Enum for donation status."""
     PENDING = "PENDING"
+    PARTIAL = "PARTIAL"  # Partly covered by disbursements, remaining_amount is still open
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
 
+def _default_remaining_amount(context):
+    """New donations start with their full amount outstanding."""
+    return context.get_current_parameters()["amount"]
+
 class Donations(Base):
     """Model for tracking donations."""
     __tablename__ = "donations"
@@ -100,6 +122,19 @@ class Donations(Base):
     currency = Column(String, nullable=False)
     donation_date = Column(DateTime, nullable=False, default=datetime.utcnow)
     status = Column(SQLEnum(DonationStatus), nullable=False)
+    # Amount not yet covered by disbursements, maintained together with each disbursement
+    remaining_amount = Column(Numeric(20, 6), nullable=False, default=_default_remaining_amount)
+
+    __table_args__ = (
+        # FIFO disbursement allocation walks pending donations of a cause by date
+        Index("ix_donations_cause_status_date", "cause_id", "status", "donation_date"),
+        # Donor statements and donation listings page through a donor's donations by date
+        Index("ix_donations_customer_date", "customer_id", "donation_date", "donation_id"),
+        # Donation listings of a cause page by date
+        Index("ix_donations_cause_date", "cause_id", "donation_date", "donation_id"),
+        # Unfiltered donation listings page by date
+        Index("ix_donations_date", "donation_date", "donation_id"),
+    )
 
 class DisbursementStatus(str, Enum):
     """Enum for disbursement status."""
@@ -119,6 +154,14 @@ class DisbursementsDonations(Base):
     donor_id = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Disbursement history is looked up per donation and per donor
+        Index("ix_disbursements_donations_donation_id", "donation_id"),
+        Index("ix_disbursements_donations_donor_id", "donor_id"),
+        # Records of an allocated payment are reloaded by its hash when its notification is retried
+        Index("ix_disbursements_donations_disbursement_id", "disbursement_id"),
+    )
     # Relationships
     # disbursement = relationship("Disbursement", foreign_keys=[disbursement_id], back_populates="donations")
     # donation = relationship("Donation", foreign_keys=[donation_id], back_populates="disbursements")
@@ -147,6 +190,14 @@ class Transaction(Base):
     status = Column(SQLEnum(TransactionStatus), nullable=False)
     insertion_date = Column(DateTime, nullable=False, default=datetime.utcnow)
     
+    __table_args__ = (
+        # A customer's transactions are looked up from both sides, newest first
+        Index("ix_transactions_sender_date", "sender_id", "insertion_date", "transaction_hash"),
+        Index("ix_transactions_receiver_date", "receiver_id", "insertion_date", "transaction_hash"),
+        # Unfiltered transaction listings page by date
+        Index("ix_transactions_date", "insertion_date", "transaction_hash"),
+    )
+    
     # Relationships
 #    sender = relationship("Customer", foreign_keys=[sender_id], back_populates="transactions_sent")
 #    receiver = relationship("Customer", foreign_keys=[receiver_id], back_populates="transactions_received")
@@ -206,6 +257,14 @@ class Check(Base):
     insertion_date = Column(DateTime, nullable=False, default=datetime.utcnow)
     check_type = Column(SQLEnum(CheckType), nullable=False, default=CheckType.CHECK_CREATE)
     
+    __table_args__ = (
+        # A customer's checks are looked up from both sides, newest first
+        Index("ix_checks_sender_date", "sender_id", "insertion_date", "check_id"),
+        Index("ix_checks_receiver_date", "receiver_id", "insertion_date", "check_id"),
+        # Unfiltered check listings page by date
+        Index("ix_checks_date", "insertion_date", "check_id"),
+    )
+    
     # Relationships
 #    sender = relationship("Customer", foreign_keys=[sender_id], back_populates="checks_sent")
 #    receiver = relationship("Customer", foreign_keys=[receiver_id], back_populates="checks_received")
@@ -221,6 +280,7 @@ class Cause(Base):
     category = Column(String, nullable=False)
     goal = Column(Numeric(20, 6), nullable=False)  # 20 digits total, 6 decimal places
     balance = Column(Numeric(20, 6), nullable=False)  # 20 digits total, 6 decimal places
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped on every balance change
     
     # Relationships (without customer_id foreign key for now)
     ## customer = relationship("Customer", back_populates="details")
@@ -256,24 +316,376 @@ class DisasterResponse(Base):
     news_link = Column(String(2000), nullable=True)  # JSON string of news links
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # One response per customer and beneficiary, the conflict target of upsert_disaster_response
+        Index("ux_disaster_responses_customer_beneficiary", "customer_id", "beneficiary_id", unique=True),
+        # Disaster response listings page by analysis time
+        Index("ix_disaster_responses_timestamp", "timestamp", "response_id"),
+    )
+
     def __repr__(self):
         return f"<DisasterResponse(response_id={self.response_id}, location={self.location}, disaster_type={self.disaster_type})>"
 
+class OutboxStatus(str, Enum):
+    """Enum for post-payment outbox entry status."""
+    PENDING = "PENDING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+class PaymentOutbox(Base):
+    """Model for validated payments whose follow-up work is still to be done."""
+    __tablename__ = "payment_outbox"
+
+    outbox_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    transaction_hash = Column(String, nullable=False, unique=True)
+    sender_id = Column(String, nullable=False)
+    receiver_id = Column(String, nullable=False)
+    amount = Column(Numeric(20, 6), nullable=False)
+    currency = Column(String, nullable=False)
+    status = Column(SQLEnum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING)
+    # Steps already applied, each set in the same transaction as the step itself
+    balance_applied = Column(Boolean, nullable=False, default=False)
+    allocated = Column(Boolean, nullable=False, default=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(1000), nullable=True)
+    # Earliest time the entry may be (re)claimed, doubles as the lease of the worker holding it
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_payment_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+class IdempotencyStatus(str, Enum):
+    """Enum for idempotency key status."""
+    IN_PROGRESS = "IN_PROGRESS"
+    COMPLETED = "COMPLETED"
+
+class IdempotencyKey(Base):
+    """Model for storing the outcome of requests made with an Idempotency-Key header."""
+    __tablename__ = "idempotency_keys"
+
+    endpoint = Column(String(100), primary_key=True)
+    idempotency_key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the request body
+    status = Column(SQLEnum(IdempotencyStatus), nullable=False, default=IdempotencyStatus.IN_PROGRESS)
+    response_body = Column(String, nullable=True)  # JSON of the response once completed
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+class BackfillStatus(str, Enum):
+    """Enum for data backfill status."""
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+
+class BackfillCheckpoint(Base):
+    """Model for the progress of data backfills declared by migrations (see db/backfill.py)."""
+    __tablename__ = "backfill_checkpoints"
+
+    name = Column(String(100), primary_key=True)
+    last_key = Column(String(255), nullable=True)  # JSON of the key of the last row processed
+    rows_processed = Column(Integer, nullable=False, default=0)
+    chunks = Column(Integer, nullable=False, default=0)
+    status = Column(SQLEnum(BackfillStatus), nullable=False, default=BackfillStatus.RUNNING)
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+# Read models: plain tuples of the selected columns, returned by list queries instead of
+# ORM instances, which carry identity-map and attribute-tracking state per row
+
+class CustomerSummary(NamedTuple):
+    """A customer without its wallet seed."""
+    customer_id: str
+    customer_name: Optional[str]
+    customer_type: Optional[CustomerType]
+    wallet_address: Optional[str]
+    email_address: Optional[str]
+
+class CustomerWallet(NamedTuple):
+    """The wallet of a customer."""
+    customer_id: str
+    wallet_address: Optional[str]
+    wallet_seed: Optional[str]
+
+class TransactionRecord(NamedTuple):
+    """A transaction between customers."""
+    transaction_hash: str
+    sender_id: str
+    receiver_id: str
+    amount: Decimal
+    currency: str
+    transaction_type: TransactionType
+    status: TransactionStatus
+    insertion_date: datetime
+
+class CheckRecord(NamedTuple):
+    """A check between customers."""
+    check_id: str
+    transaction_hash: str
+    sender_id: str
+    receiver_id: str
+    amount: Decimal
+    currency: str
+    expiration_date: datetime
+    insertion_date: datetime
+    check_type: CheckType
+
+class ActivityKind(str, Enum):
+    """Kind of a customer activity entry."""
+    PAYMENT = "PAYMENT"
+    CHECK = "CHECK"
+
+class ActivityDirection(str, Enum):
+    """Side of a customer activity entry the customer is on."""
+    SENT = "SENT"
+    RECEIVED = "RECEIVED"
+
+class ActivityRecord(NamedTuple):
+    """A payment or check in a customer's activity feed."""
+    kind: ActivityKind
+    direction: ActivityDirection
+    reference_id: str  # Transaction hash of payments, check ID of checks
+    transaction_hash: str
+    counterparty_id: str
+    amount: Decimal
+    currency: str
+    state: str  # TransactionStatus of payments, CheckType of checks
+    occurred_at: datetime
+    expires_at: Optional[datetime]  # Checks only
+
+class DonationRecord(NamedTuple):
+    """A registered donation."""
+    donation_id: str
+    customer_id: str
+    cause_id: str
+    amount: Decimal
+    currency: str
+    donation_date: datetime
+    status: DonationStatus
+    remaining_amount: Decimal
+
+class DisasterResponseRecord(NamedTuple):
+    """A disaster analysis response."""
+    response_id: str
+    customer_id: str
+    beneficiary_id: str
+    location: str
+    disaster_type: str
+    severity: str
+    status: str
+    is_aid_required: bool
+    estimated_affected: int
+    required_aid_amount: float
+    aid_currency: str
+    evacuation_needed: bool
+    disaster_date: str
+    timestamp: datetime
+    confidence_score: str
+    is_valid: bool
+    reasoning: str
+    validation_reasoning: str
+    summarized_news: Optional[str]
+    news_link: Optional[str]
+    created_at: Optional[datetime]
+
 class Database:
     """Database manager for wallet operations."""
     
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str, write_behind: bool = False, auto_upgrade: Optional[bool] = None):
         """
         Initialize the database connection.
         
         Args:
             connection_string: Database connection string
+            write_behind: Group-commit single-row writes (see enable_write_behind)
+            auto_upgrade: Migrate an empty or outdated database instead of failing
+                (defaults to SCHEMA_CONFIG["auto_upgrade"])
+        """
+        self.engine = create_database_engine(connection_string)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.write_behind: Optional[WriteBehindBuffer] = None
+        # Last donation_date handed out, so donations are dated in registration order
+        self._donation_clock = threading.Lock()
+        self._last_donation_date = datetime.min
+        
+        # One schema version lookup; refuses or migrates empty or outdated databases (see db/migrate.py)
+        ensure_schema(self.engine, auto_upgrade=auto_upgrade)
+        # Statement counts and timing, per request and in total (see db/instrumentation.py)
+        self.instrumentation = QueryInstrumentation(self.engine)
+        
+        if write_behind:
+            self.enable_write_behind()
+
+    def enable_write_behind(self, max_batch_size: Optional[int] = None, max_delay_seconds: Optional[float] = None) -> None:
+        """
+        Route single-row writes through a write-behind buffer that group-commits them.
+        
+        insert_transaction, insert_check, insert_donation and upsert_news_link still
+        return only once their row is committed, but concurrent calls share transactions.
+        
+        Args:
+            max_batch_size: Writes per transaction (defaults to WRITE_BEHIND_CONFIG)
+            max_delay_seconds: Maximum time a write waits for its batch to fill (defaults to WRITE_BEHIND_CONFIG)
+        """
+        if self.write_behind is None:
+            self.write_behind = WriteBehindBuffer(
+                self.session_factory,
+                max_batch_size=max_batch_size or WRITE_BEHIND_CONFIG["max_batch_size"],
+                max_delay_seconds=max_delay_seconds if max_delay_seconds is not None else WRITE_BEHIND_CONFIG["max_delay_seconds"]
+            )
+            logger.info("Write-behind enabled")
+
+    def disable_write_behind(self) -> None:
+        """Flush the write-behind buffer and go back to one transaction per write."""
+        if self.write_behind is not None:
+            buffer, self.write_behind = self.write_behind, None
+            buffer.close()
+            logger.info("Write-behind disabled")
+
+    def unit_of_work(self, commit_on_exit: bool = True) -> UnitOfWork:
+        """
+        Open a unit of work: the methods called inside its with block share one
+        connection and transaction (see db/unit_of_work.py).
+        
+        Args:
+            commit_on_exit: Commit when the block exits without an exception; otherwise
+                only explicit commit() calls are committed
+            
+        Returns:
+            UnitOfWork: The unit of work, to be entered with a with statement
+        """
+        return UnitOfWork(self.engine, commit_on_exit=commit_on_exit)
+    
+    def track_queries(self, label: Optional[str] = None) -> QueryStats:
+        """
+        Count and time the statements run inside a with block, e.g. one request.
+        
+        Args:
+            label: Name the block is aggregated under in the query metrics
+            
+        Returns:
+            QueryStats: The stats, to be entered with a with statement
+        """
+        return self.instrumentation.track(label)
+    
+    def Session(self) -> Session:
+        """
+        Open a session, joined to the current unit of work if there is one.
+        
+        Returns:
+            Session: A session of its own, or one sharing the unit of work's transaction
+        """
+        unit_of_work = self._unit_of_work()
+        if unit_of_work is not None:
+            return unit_of_work.session()
+        return self.session_factory()
+    
+    def _unit_of_work(self) -> Optional[UnitOfWork]:
+        """Get the current unit of work if it belongs to this database."""
+        unit_of_work = get_current_unit_of_work()
+        return unit_of_work if unit_of_work is not None and unit_of_work.engine is self.engine else None
+
+    def _write(self, operation: Callable[[Session], Any]) -> Any:
+        """
+        Apply a write in its own transaction, or through the write-behind buffer if enabled.
+        
+        Inside a unit of work the write joins its transaction instead.
+        
+        Args:
+            operation: Applies the write to the session it is given
+            
+        Returns:
+            The operation's return value, once the write is committed
+        """
+        if self.write_behind is not None and self._unit_of_work() is None:
+            return self.write_behind.write(operation)
+        session = self.Session()
+        try:
+            result = operation(session)
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _upsert(self, model, values: Dict[str, Any], conflict_columns: List[str], update_columns: List[str]):
+        """
+        Build an INSERT ... ON CONFLICT DO UPDATE statement for the engine's backend.
+        
+        Args:
+            model: Model of the table to insert into
+            values: Column values of the row
+            conflict_columns: Columns of the unique index a conflicting row is matched on
+            update_columns: Columns overwritten with the new values on conflict
+            
+        Returns:
+            The statement, ready to execute
+        """
+        dialect = postgresql if self.engine.dialect.name == "postgresql" else sqlite
+        statement = dialect.insert(model).values(**values)
+        return statement.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={column: statement.excluded[column] for column in update_columns}
+        )
+        
+    def _select_records(self, record: Type[NamedTuple], model, *criteria, order_by: tuple = ()) -> List[Any]:
+        """
+        Select only the columns of a read model, without loading ORM instances.
+        
+        Args:
+            record: NamedTuple whose fields name the columns to select
+            model: Model of the table to select from
+            *criteria: Filters of the query
+            order_by: Sort order of the records
+            
+        Returns:
+            List of records
+        """
+        query = select(*(getattr(model, column) for column in record._fields)).where(*criteria).order_by(*order_by)
+        with self.Session() as session:
+            return list(map(record._make, session.execute(query)))
+        
+    def _paginate(self, record: Type[NamedTuple], model, order_by: List[Column], criteria: List[Any],
+                  cursor: Optional[str], limit: Optional[int], descending: bool = False) -> Page:
+        """
+        Read one page of a listing with keyset pagination (see db/pagination.py).
+        
+        Args:
+            record: NamedTuple whose fields name the columns to select
+            model: Model of the table to select from
+            order_by: Sort key columns, all fields of the record; together they must be unique,
+                e.g. end with the primary key
+            criteria: Filters of the listing
+            cursor: Cursor of the previous page's next_cursor, None for the first page
+            limit: Rows per page (defaults to PAGINATION_CONFIG["default_limit"], capped at "max_limit")
+            descending: Sort from the largest key down
+            
+        Returns:
+            Page of records
+            
+        Raises:
+            InvalidCursorError: If the cursor was not issued for this listing
         """
-        self.engine = create_engine(connection_string)
-        self.Session = sessionmaker(bind=self.engine)
+        limit = min(limit or PAGINATION_CONFIG["default_limit"], PAGINATION_CONFIG["max_limit"])
+        scope = f"{model.__tablename__}:{','.join(column.key for column in order_by)}"
+        key = tuple_(*order_by)
+        query = select(*(getattr(model, column) for column in record._fields)).where(*criteria)
+        if cursor is not None:
+            values = decode_cursor(cursor, scope, [column.type.python_type for column in order_by])
+            position = tuple_(*(literal(value, column.type) for value, column in zip(values, order_by)))
+            query = query.where(key < position if descending else key > position)
+        query = query.order_by(*(column.desc() if descending else column for column in order_by)).limit(limit + 1)
         
-        # Create tables if they don't exist
-        Base.metadata.create_all(self.engine)
+        with self.Session() as session:
+            records = list(map(record._make, session.execute(query)))
+        if len(records) <= limit:
+            return Page(records, None)
+        last = records[limit - 1]
+        return Page(records[:limit], encode_cursor(scope, [getattr(last, column.key) for column in order_by]))
         
     def add_customer(self, customer_id: str, wallet_seed: str, customer_type: CustomerType, wallet_address: str, email_address: str, customer_name: Optional[str] = None) -> None:
         """
@@ -306,6 +718,41 @@ class Database:
             raise
         finally:
             session.close()
+
+    def add_customers(self, customers: List[Dict]) -> None:
+        """
+        Add many customers to the database in a single transaction.
+        
+        Args:
+            customers: List of dictionaries with the keyword arguments of add_customer
+                (customer_id, wallet_seed, customer_type, wallet_address, email_address
+                and optionally customer_name)
+                
+        Raises:
+            Exception: If any row cannot be inserted; no row is inserted in that case
+        """
+        if not customers:
+            return
+        session = self.Session()
+        try:
+            session.execute(insert(Customer), [
+                {
+                    "customer_id": customer["customer_id"],
+                    "wallet_seed": customer["wallet_seed"],
+                    "customer_type": customer["customer_type"],
+                    "wallet_address": customer["wallet_address"],
+                    "email_address": customer.get("email_address"),
+                    "customer_name": customer.get("customer_name")
+                } for customer in customers
+            ])
+            session.commit()
+            logger.info(f"Added {len(customers)} customers to database")
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error adding customers: {str(e)}")
+            raise
+        finally:
+            session.close()
             
     def get_customer(self, customer_id: str) -> Optional[Customer]:
         """
@@ -332,6 +779,26 @@ class Database:
             logger.error(f"Error retrieving customer {customer_id}: {e}")
             raise
             
+    def get_customers(self, customer_ids: List[str]) -> Dict[str, Customer]:
+        """
+        Retrieve many customers by their customer_id.
+        
+        Args:
+            customer_ids: The IDs of the customers to retrieve
+            
+        Returns:
+            Dictionary mapping customer_id to Customer for the customers that exist
+        """
+        customer_ids = list(dict.fromkeys(customer_ids))
+        customers = {}
+        with self.Session() as session:
+            # Chunk the IN list to stay below the bound parameter limit
+            for start in range(0, len(customer_ids), 500):
+                chunk = customer_ids[start:start + 500]
+                for customer in session.query(Customer).filter(Customer.customer_id.in_(chunk)):
+                    customers[customer.customer_id] = customer
+        return customers
+            
     def add_relationship(self, sender_id: str, receiver_id: str) -> None:
         """
         Add a relationship between customers.
@@ -410,9 +877,8 @@ class Database:
             transaction_type: Type of transaction (check or payment)
             status: Transaction status (successful or failed)
         """
-        session = self.Session()
-        try:
-            transaction = Transaction(
+        def add(session):
+            session.add(Transaction(
                 transaction_hash=transaction_hash,
                 sender_id=sender_id,
                 receiver_id=receiver_id,
@@ -420,19 +886,16 @@ class Database:
                 currency=currency,
                 transaction_type=transaction_type,
                 status=status
-            )
-            session.add(transaction)
-            session.commit()
+            ))
+        try:
+            self._write(add)
             logger.info(f"Added transaction {transaction_hash} to database")
         except Exception as e:
-            session.rollback()
             logger.error(f"Error adding transaction: {str(e)}")
             raise
-        finally:
-            session.close()
     
 
-    def get_customer_checks(self, customer_id: str) -> List[Check]:
+    def get_customer_checks(self, customer_id: str) -> List[CheckRecord]:
         """
         Get all checks for a customer (both sent and received).
         
@@ -440,15 +903,13 @@ class Database:
             customer_id: ID of the customer
             
         Returns:
-            List of checks
+            List of checks, newest first
         """
-        session = self.Session()
-        try:
-            sent = session.query(Check).filter_by(sender_id=customer_id).all()
-            received = session.query(Check).filter_by(receiver_id=customer_id).all()
-            return sent + received
-        finally:
-            session.close()
+        return self._select_records(
+            CheckRecord, Check,
+            or_(Check.sender_id == customer_id, Check.receiver_id == customer_id),
+            order_by=(Check.insertion_date.desc(), Check.check_id.desc())
+        )
 
     def update_check_cash(self, check_id: str, new_transaction_hash: str) -> None:
         """
@@ -497,12 +958,11 @@ class Database:
             expiration_date: Unix timestamp when the check expires
             check_type: Type of check (CREATE or CASH), defaults to CHECK_CREATE
         """
-        session = self.Session()
-        try:
-            # Convert Unix timestamp to datetime
-            expiration_datetime = datetime.fromtimestamp(expiration_date)
-            
-            check = Check(
+        # Convert Unix timestamp to datetime
+        expiration_datetime = datetime.fromtimestamp(expiration_date)
+        
+        def add(session):
+            session.add(Check(
                 check_id=check_id,
                 transaction_hash=transaction_hash,
                 sender_id=sender_id,
@@ -511,16 +971,13 @@ class Database:
                 currency=currency,
                 expiration_date=expiration_datetime,
                 check_type=check_type
-            )
-            session.add(check)
-            session.commit()
+            ))
+        try:
+            self._write(add)
             logger.info(f"Inserted check {check_id} with transaction hash {transaction_hash} and type {check_type} into database")
         except Exception as e:
-            session.rollback()
             logger.error(f"Error inserting check: {str(e)}")
             raise
-        finally:
-            session.close()
 
     def get_check(self, check_id: str) -> Optional[Check]:
         """
@@ -538,19 +995,25 @@ class Database:
         finally:
             session.close()
 
-    def get_all_customers(self) -> List[Customer]:
+    def get_all_customers(self) -> List[CustomerSummary]:
         """
         Get all customers.
+        
+        Returns:
+            List of customers, without their wallet seeds
         """
-        try:
-            session = self.Session()
-            customers =  session.query(Customer).all()
-            print(f"Customers: {customers}")
-            return customers
-        finally:
-            session.close()
+        return self._select_records(CustomerSummary, Customer)
+    
+    def get_customer_wallets(self) -> List[CustomerWallet]:
+        """
+        Get the wallets of all customers.
+        
+        Returns:
+            List of customer IDs with their wallet address and seed
+        """
+        return self._select_records(CustomerWallet, Customer)
     
-    def get_customer_transactions(self, customer_id: str) -> List[Transaction]:
+    def get_customer_transactions(self, customer_id: str) -> List[TransactionRecord]:
         """
         Get all transactions for a customer (both sent and received).
         
@@ -558,15 +1021,230 @@ class Database:
             customer_id: ID of the customer
             
         Returns:
-            List of transactions
+            List of transactions, newest first
         """
-        session = self.Session()
-        try:
-            sent = session.query(Transaction).filter_by(sender_id=customer_id).all()
-            received = session.query(Transaction).filter_by(receiver_id=customer_id).all()
-            return sent + received
-        finally:
-            session.close()
+        return self._select_records(
+            TransactionRecord, Transaction,
+            or_(Transaction.sender_id == customer_id, Transaction.receiver_id == customer_id),
+            order_by=(Transaction.insertion_date.desc(), Transaction.transaction_hash.desc())
+        )
+    
+    def get_customer_activity(self, customer_id: str, direction: Optional[ActivityDirection] = None,
+                              kind: Optional[ActivityKind] = None, currency: Optional[str] = None,
+                              since: Optional[datetime] = None, until: Optional[datetime] = None,
+                              cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+        """
+        Get a customer's payments and checks, sent and received, newest first, one page at a time.
+        
+        The page is read in one statement: a UNION ALL of one branch per kind and direction,
+        each a range scan of its (customer, date, key) index that stops after limit + 1 rows,
+        so a page costs the same however long the customer's history is.
+        
+        Args:
+            customer_id: ID of the customer
+            direction: Only list entries the customer sent or received
+            kind: Only list payments or checks
+            currency: Only list entries in this currency
+            since: Only list entries from this time on
+            until: Only list entries before this time
+            cursor: next_cursor of the previous page, None for the first page
+            limit: Entries per page
+            
+        Returns:
+            Page of ActivityRecord
+            
+        Raises:
+            InvalidCursorError: If the cursor was not issued for an activity feed
+        """
+        limit = min(limit or PAGINATION_CONFIG["default_limit"], PAGINATION_CONFIG["max_limit"])
+        position = None
+        if cursor is not None:
+            position = decode_cursor(cursor, "activity:occurred_at,branch,reference_id", [datetime, int, str])
+        
+        # Entries are ordered by (occurred_at, branch, reference_id), where branch is the
+        # position of the entry's branch in this list
+        branches = [
+            (ActivityKind.PAYMENT, ActivityDirection.SENT, Transaction, Transaction.sender_id, Transaction.receiver_id),
+            (ActivityKind.PAYMENT, ActivityDirection.RECEIVED, Transaction, Transaction.receiver_id, Transaction.sender_id),
+            (ActivityKind.CHECK, ActivityDirection.SENT, Check, Check.sender_id, Check.receiver_id),
+            (ActivityKind.CHECK, ActivityDirection.RECEIVED, Check, Check.receiver_id, Check.sender_id),
+        ]
+        selects = []
+        for branch, (entry_kind, entry_direction, model, own_id, counterparty_id) in enumerate(branches):
+            if (direction and entry_direction != direction) or (kind and entry_kind != kind):
+                continue
+            occurred_at = model.insertion_date
+            reference_id = Transaction.transaction_hash if model is Transaction else Check.check_id
+            criteria = [own_id == customer_id]
+            if currency:
+                criteria.append(model.currency == currency)
+            if since:
+                criteria.append(occurred_at >= since)
+            if until:
+                criteria.append(occurred_at < until)
+            if position:
+                # Everything after the cursor's (occurred_at, branch, reference_id), newest first
+                cursor_at, cursor_branch, cursor_reference = position
+                if branch < cursor_branch:
+                    criteria.append(occurred_at <= cursor_at)
+                elif branch == cursor_branch:
+                    criteria.append(tuple_(occurred_at, reference_id)
+                                    < tuple_(literal(cursor_at, occurred_at.type), literal(cursor_reference)))
+                else:
+                    criteria.append(occurred_at < cursor_at)
+            selects.append(select(
+                literal(entry_kind.value).label("kind"),
+                literal(entry_direction.value).label("direction"),
+                reference_id.label("reference_id"),
+                model.transaction_hash.label("transaction_hash"),
+                counterparty_id.label("counterparty_id"),
+                model.amount.label("amount"),
+                model.currency.label("currency"),
+                cast(Transaction.status if model is Transaction else Check.check_type, String).label("state"),
+                occurred_at.label("occurred_at"),
+                (Check.expiration_date if model is Check else literal(None, DateTime)).label("expires_at"),
+                literal(branch).label("branch")
+            ).where(*criteria).order_by(occurred_at.desc(), reference_id.desc()).limit(limit + 1).subquery())
+        if not selects:
+            return Page([], None)
+        
+        feed = union_all(*(select(branch_select) for branch_select in selects)).subquery("activity")
+        query = select(feed).order_by(feed.c.occurred_at.desc(), feed.c.branch.desc(), feed.c.reference_id.desc()).limit(limit + 1)
+        with self.Session() as session:
+            rows = session.execute(query).all()
+        records = [
+            ActivityRecord(ActivityKind(row.kind), ActivityDirection(row.direction), *row[2:10])
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor("activity:occurred_at,branch,reference_id",
+                                        [last.occurred_at, last.branch, last.reference_id])
+        return Page(records, next_cursor)
+    
+    def list_customers(self, customer_type: Optional[CustomerType] = None,
+                       cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+        """
+        List customers by customer ID, one page at a time.
+        
+        Args:
+            customer_type: Only list customers of this type
+            cursor: next_cursor of the previous page, None for the first page
+            limit: Rows per page
+            
+        Returns:
+            Page of CustomerSummary
+        """
+        criteria = [Customer.customer_type == customer_type] if customer_type else []
+        return self._paginate(CustomerSummary, Customer, [Customer.customer_id], criteria, cursor, limit)
+    
+    def list_donations(self, customer_id: Optional[str] = None, cause_id: Optional[str] = None,
+                       status: Optional[DonationStatus] = None,
+                       cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+        """
+        List donations, newest first, one page at a time.
+        
+        Args:
+            customer_id: Only list donations of this donor
+            cause_id: Only list donations to this cause
+            status: Only list donations with this status
+            cursor: next_cursor of the previous page, None for the first page
+            limit: Rows per page
+            
+        Returns:
+            Page of DonationRecord
+        """
+        criteria = []
+        if customer_id:
+            criteria.append(Donations.customer_id == customer_id)
+        if cause_id:
+            criteria.append(Donations.cause_id == cause_id)
+        if status:
+            criteria.append(Donations.status == status)
+        return self._paginate(DonationRecord, Donations, [Donations.donation_date, Donations.donation_id],
+                              criteria, cursor, limit, descending=True)
+    
+    def list_transactions(self, sender_id: Optional[str] = None, receiver_id: Optional[str] = None,
+                          currency: Optional[str] = None, status: Optional[TransactionStatus] = None,
+                          cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+        """
+        List transactions, newest first, one page at a time.
+        
+        Args:
+            sender_id: Only list transactions sent by this customer
+            receiver_id: Only list transactions received by this customer
+            currency: Only list transactions in this currency
+            status: Only list transactions with this status
+            cursor: next_cursor of the previous page, None for the first page
+            limit: Rows per page
+            
+        Returns:
+            Page of TransactionRecord
+        """
+        criteria = []
+        if sender_id:
+            criteria.append(Transaction.sender_id == sender_id)
+        if receiver_id:
+            criteria.append(Transaction.receiver_id == receiver_id)
+        if currency:
+            criteria.append(Transaction.currency == currency)
+        if status:
+            criteria.append(Transaction.status == status)
+        return self._paginate(TransactionRecord, Transaction, [Transaction.insertion_date, Transaction.transaction_hash],
+                              criteria, cursor, limit, descending=True)
+    
+    def list_checks(self, sender_id: Optional[str] = None, receiver_id: Optional[str] = None,
+                    currency: Optional[str] = None, check_type: Optional[CheckType] = None,
+                    cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+        """
+        List checks, newest first, one page at a time.
+        
+        Args:
+            sender_id: Only list checks written by this customer
+            receiver_id: Only list checks written to this customer
+            currency: Only list checks in this currency
+            check_type: Only list checks of this type (created or cashed)
+            cursor: next_cursor of the previous page, None for the first page
+            limit: Rows per page
+            
+        Returns:
+            Page of CheckRecord
+        """
+        criteria = []
+        if sender_id:
+            criteria.append(Check.sender_id == sender_id)
+        if receiver_id:
+            criteria.append(Check.receiver_id == receiver_id)
+        if currency:
+            criteria.append(Check.currency == currency)
+        if check_type:
+            criteria.append(Check.check_type == check_type)
+        return self._paginate(CheckRecord, Check, [Check.insertion_date, Check.check_id],
+                              criteria, cursor, limit, descending=True)
+    
+    def list_disaster_responses(self, customer_id: Optional[str] = None, beneficiary_id: Optional[str] = None,
+                                cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+        """
+        List disaster analysis responses, most recent analysis first, one page at a time.
+        
+        Args:
+            customer_id: Only list responses for this customer
+            beneficiary_id: Only list responses for this beneficiary
+            cursor: next_cursor of the previous page, None for the first page
+            limit: Rows per page
+            
+        Returns:
+            Page of DisasterResponseRecord
+        """
+        criteria = []
+        if customer_id:
+            criteria.append(DisasterResponse.customer_id == customer_id)
+        if beneficiary_id:
+            criteria.append(DisasterResponse.beneficiary_id == beneficiary_id)
+        return self._paginate(DisasterResponseRecord, DisasterResponse,
+                              [DisasterResponse.timestamp, DisasterResponse.response_id],
+                              criteria, cursor, limit, descending=True)
     
     def get_customer_seed(self, customer_id: str) -> str:
         """
@@ -574,6 +1252,32 @@ class Database:
         """
         customer = self.get_customer(customer_id)
         return customer.wallet_seed
+
+    def update_customer_seed(self, customer_id: str, wallet_seed: str, wallet_address: str) -> None:
+        """
+        Replace the wallet of a customer (e.g. after a key rotation).
+        
+        Args:
+            customer_id: ID of the customer
+            wallet_seed: The new XRPL wallet seed
+            wallet_address: The address of the new wallet
+        """
+        session = self.Session()
+        try:
+            customer = session.query(Customer).filter_by(customer_id=customer_id).first()
+            if customer:
+                customer.wallet_seed = wallet_seed
+                customer.wallet_address = wallet_address
+                session.commit()
+                logger.info(f"Updated wallet for customer {customer_id} to {wallet_address}")
+            else:
+                logger.warning(f"Customer {customer_id} not found")
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error updating customer wallet: {str(e)}")
+            raise
+        finally:
+            session.close()
     
     def insert_cause(self, cause_id: str, name: str, description: str, imageUrl: str, category: str, goal: float) -> None:
         """
@@ -642,6 +1346,25 @@ class Database:
         finally:
             session.close()
 
+    def get_customers_by_wallet(self, wallet_addresses: List[str]) -> Dict[str, CustomerSummary]:
+        """
+        Look up the customers of many wallet addresses at once.
+        
+        Args:
+            wallet_addresses: Wallet addresses to look up
+            
+        Returns:
+            Dictionary mapping wallet address to customer for the addresses that belong to a customer
+        """
+        wallet_addresses = list(dict.fromkeys(wallet_addresses))
+        customers = {}
+        # Chunk the IN list to stay below the bound parameter limit
+        for start in range(0, len(wallet_addresses), 500):
+            chunk = wallet_addresses[start:start + 500]
+            for customer in self._select_records(CustomerSummary, Customer, Customer.wallet_address.in_(chunk)):
+                customers[customer.wallet_address] = customer
+        return customers
+    
     def get_customer_details_from_wallet(self, wallet_address: str) -> Optional[Customer]:
         """
         Get customer details from wallet address.
@@ -693,44 +1416,672 @@ class Database:
         Raises:
             Exception: If there's an error inserting the donation
         """
-        session = self.Session()
-        try:
-            # Generate a random donation ID
-            donation_id = str(uuid.uuid4())
-            
-            # Create new donation record
-            donation = Donations(
+        # Generate a random donation ID
+        donation_id = str(uuid.uuid4())
+        donation_date, = self._next_donation_dates(1)
+        
+        def add(session):
+            session.add(Donations(
                 donation_id=donation_id,
                 customer_id=customer_id,
                 cause_id=cause_id,
                 amount=amount,
                 currency=currency,
-                donation_date=datetime.utcnow(),
-                status=DonationStatus.PENDING
-            )
-            
-            # Add to database
-            session.add(donation)
-            session.commit()
-            
+                donation_date=donation_date,
+                status=DonationStatus.PENDING,
+                remaining_amount=amount
+            ))
+        try:
+            self._write(add)
             logger.info(f"Successfully registered donation {donation_id} for customer {customer_id} to cause {cause_id}")
             return donation_id
-            
         except Exception as e:
-            session.rollback()
             logger.error(f"Error inserting donation: {str(e)}")
             raise
-        finally:
-            session.close()
 
-    def get_cause_from_address(self, wallet_address: str) -> Optional[Cause]:
+    def _next_donation_dates(self, count: int) -> List[datetime]:
         """
-        Get cause object by joining customers and causes tables using wallet address.
+        Get strictly increasing donation dates, one microsecond apart, for donations about to be registered.
         
-        Args:
-            wallet_address: The wallet address to look up
-            
-        Returns:
+        Allocation orders donations by (donation_date, donation_id) and donation IDs are
+        random, so distinct dates are what keeps it in registration order. The dates
+        start at the current time, or just after the last date handed out by this process.
+        """
+        with self._donation_clock:
+            start = max(datetime.utcnow(), self._last_donation_date + timedelta(microseconds=1))
+            dates = [start + timedelta(microseconds=i) for i in range(count)]
+            self._last_donation_date = dates[-1]
+        return dates
+
+    def insert_donations(self, donations: List[Dict]) -> List[Dict]:
+        """
+        Insert many donations in a single transaction.
+        
+        All values are generated up front, so the rows are written with one
+        executemany and returned without reading them back. Each row gets a later
+        donation_date than the one before it, so allocation follows input order.
+        
+        Args:
+            donations: List of dictionaries with customer_id, cause_id, amount and
+                optionally currency (defaults to "RLUSD")
+            
+        Returns:
+            The inserted donations with donation_id, customer_id, cause_id, amount,
+            currency, donation_date, status and remaining_amount, in input order
+            
+        Raises:
+            Exception: If any row cannot be inserted; no row is inserted in that case
+        """
+        if not donations:
+            return []
+        # Strictly increasing dates keep allocation FIFO in input order within the batch
+        dates = self._next_donation_dates(len(donations))
+        rows = [
+            {
+                'donation_id': str(uuid.uuid4()),
+                'customer_id': donation['customer_id'],
+                'cause_id': donation['cause_id'],
+                'amount': donation['amount'],
+                'currency': donation.get('currency') or "RLUSD",
+                'donation_date': donation_date,
+                'status': DonationStatus.PENDING,
+                'remaining_amount': donation['amount']
+            } for donation, donation_date in zip(donations, dates)
+        ]
+        session = self.Session()
+        try:
+            session.execute(insert(Donations), rows)
+            session.commit()
+            logger.info(f"Registered {len(rows)} donations")
+            return rows
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error inserting donations: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def allocate_disbursement(self, cause_id: str, amount: float, transaction_hash: str,
+                              outbox_id: Optional[str] = None) -> List[Dict]:
+        """
+        Allocate a disbursement to the open donations of a cause in FIFO order.
+        
+        Open donations are streamed oldest first through the
+        (cause_id, status, donation_date) index and streaming stops as soon as the
+        amount is used up, so the cost grows with the number of donations touched
+        rather than the size of the table. Each donation's remaining_amount and
+        status are updated in the same transaction as the DisbursementsDonations
+        rows, which are written with a single multi-row insert.
+        
+        On PostgreSQL the transaction holds an advisory lock on the cause so that
+        allocations for the same cause from different processes are serialized.
+        Within a process, blockchain.disbursement.DisbursementExecutor does the same.
+        
+        Args:
+            cause_id: The cause ID to allocate donations for
+            amount: The amount available for disbursement
+            transaction_hash: The hash of the transaction that triggered this disbursement
+            outbox_id: Payment outbox entry to mark allocated in the same transaction.
+                Nothing is allocated if the entry is already marked.
+            
+        Returns:
+            List of disbursement records created, each with donation_id, customer_id,
+            original_amount, amount and remaining_amount
+        """
+        session = self.Session()
+        try:
+            self._lock_cause_allocation(session, cause_id)
+            if outbox_id and not self._claim_outbox_step(session, outbox_id, PaymentOutbox.allocated):
+                logger.info(f"Disbursement {transaction_hash} was already allocated")
+                return []
+            remaining = Decimal(str(amount))
+            disbursements = []
+            donation_updates = []
+            
+            # FIFO allocation leaves at most the oldest open donation partly covered,
+            # so PARTIAL donations come before PENDING ones. Walking each status
+            # separately keeps both walks in index order without a sort.
+            for status in (DonationStatus.PARTIAL, DonationStatus.PENDING):
+                if remaining <= 0:
+                    break
+                open_donations = session.execute(
+                    select(Donations.donation_id, Donations.customer_id, Donations.amount, Donations.remaining_amount)
+                    .where(Donations.cause_id == cause_id, Donations.status == status)
+                    .order_by(Donations.donation_date.asc(), Donations.donation_id.asc())
+                    .execution_options(yield_per=100)
+                )
+                try:
+                    for donation_id, customer_id, donation_amount, donation_remaining in open_donations:
+                        if remaining <= 0:
+                            break
+                        donation_remaining = Decimal(str(donation_remaining))
+                        fulfilled = min(donation_remaining, remaining)
+                        left = donation_remaining - fulfilled
+                        disbursements.append({
+                            'donation_id': donation_id,
+                            'customer_id': customer_id,
+                            'original_amount': float(donation_amount),
+                            'amount': float(fulfilled),
+                            'remaining_amount': float(left)
+                        })
+                        donation_updates.append({
+                            'donation_id': donation_id,
+                            'remaining_amount': left,
+                            'status': DonationStatus.COMPLETED if left <= 0 else DonationStatus.PARTIAL
+                        })
+                        remaining -= fulfilled
+                finally:
+                    open_donations.close()
+            
+            if not disbursements:
+                logger.info(f"No open donations found for cause {cause_id}")
+                session.commit()
+                return []
+            
+            now = datetime.utcnow()
+            session.execute(insert(DisbursementsDonations), [
+                {
+                    'id': str(uuid.uuid4()),
+                    'donation_id': d['donation_id'],
+                    'disbursement_id': transaction_hash,
+                    'cause_id': cause_id,
+                    'donor_id': d['customer_id'],
+                    'amount': d['amount'],
+                    'created_at': now
+                } for d in disbursements
+            ])
+            # Bulk UPDATE by primary key
+            session.execute(update(Donations), donation_updates)
+            session.commit()
+            logger.info(f"Allocated {float(Decimal(str(amount)) - remaining)} of disbursement {transaction_hash} "
+                        f"to {len(disbursements)} donations of cause {cause_id}")
+            return disbursements
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error allocating disbursement: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def get_disbursements(self, transaction_hash: str) -> List[Dict]:
+        """
+        Get the disbursement records an earlier allocate_disbursement call created for a payment.
+        
+        Args:
+            transaction_hash: The hash of the transaction the disbursement was allocated for
+            
+        Returns:
+            List of disbursement records in allocation order, each with donation_id,
+            customer_id, original_amount, amount and remaining_amount (the donation's
+            current remaining amount)
+        """
+        with self.Session() as session:
+            rows = session.execute(
+                select(DisbursementsDonations.donation_id, DisbursementsDonations.donor_id,
+                       DisbursementsDonations.amount, Donations.amount.label("original_amount"),
+                       Donations.remaining_amount)
+                .join(Donations, Donations.donation_id == DisbursementsDonations.donation_id)
+                .where(DisbursementsDonations.disbursement_id == transaction_hash)
+                .order_by(Donations.donation_date.asc(), Donations.donation_id.asc())
+            ).all()
+        return [{
+            'donation_id': row.donation_id,
+            'customer_id': row.donor_id,
+            'original_amount': float(row.original_amount),
+            'amount': float(row.amount),
+            'remaining_amount': float(row.remaining_amount)
+        } for row in rows]
+
+    def _lock_cause_allocation(self, session, cause_id: str) -> None:
+        """Take a transaction-scoped lock on allocating for a cause, where the backend supports it."""
+        if self.engine.dialect.name == "postgresql":
+            session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:cause_id))"), {"cause_id": cause_id})
+
+    def record_payment(self, transaction_hash: str, sender_id: str, receiver_id: str,
+                       amount: float, currency: str, lease_seconds: Optional[float] = None) -> str:
+        """
+        Record a validated payment and queue its follow-up work.
+        
+        The transaction row and the payment outbox entry are written in one
+        transaction, so a recorded payment always has its follow-up work queued.
+        
+        Args:
+            transaction_hash: Hash of the validated payment
+            sender_id: ID of the sender customer
+            receiver_id: ID of the receiver customer
+            amount: Payment amount
+            currency: Payment currency
+            lease_seconds: Record the entry already claimed by the caller for this long,
+                so no worker claims it before the caller processes it (see get_outbox_entry)
+            
+        Returns:
+            ID of the payment outbox entry
+        """
+        session = self.Session()
+        try:
+            outbox_id = str(uuid.uuid4())
+            claim = {} if lease_seconds is None else {
+                "next_attempt_at": datetime.utcnow() + timedelta(seconds=lease_seconds),
+                "attempts": 1
+            }
+            session.add(Transaction(
+                transaction_hash=transaction_hash,
+                sender_id=sender_id,
+                receiver_id=receiver_id,
+                amount=amount,
+                currency=currency,
+                transaction_type=TransactionType.PAYMENT,
+                status=TransactionStatus.SUCCESS
+            ))
+            session.add(PaymentOutbox(
+                outbox_id=outbox_id,
+                transaction_hash=transaction_hash,
+                sender_id=sender_id,
+                receiver_id=receiver_id,
+                amount=amount,
+                currency=currency,
+                **claim
+            ))
+            session.commit()
+            logger.info(f"Recorded payment {transaction_hash} with outbox entry {outbox_id}")
+            return outbox_id
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error recording payment: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def claim_outbox_entries(self, limit: int, lease_seconds: float, outbox_id: Optional[str] = None) -> List[Dict]:
+        """
+        Claim due payment outbox entries for processing.
+        
+        Claiming pushes next_attempt_at out by the lease, so other workers skip the
+        entry while it is being processed and pick it up again if this one dies.
+        
+        Args:
+            limit: Maximum number of entries to claim
+            lease_seconds: How long the claimed entries are reserved
+            outbox_id: Claim only this entry
+            
+        Returns:
+            List of claimed entries with outbox_id, transaction_hash, sender_id,
+            receiver_id, amount, currency, attempts, balance_applied and allocated
+        """
+        # Committed on its own, even inside a unit of work: other workers must see the lease right away
+        session = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            query = select(PaymentOutbox).where(
+                PaymentOutbox.status == OutboxStatus.PENDING,
+                PaymentOutbox.next_attempt_at <= now
+            )
+            if outbox_id:
+                query = query.where(PaymentOutbox.outbox_id == outbox_id)
+            due = session.execute(query.order_by(PaymentOutbox.next_attempt_at).limit(limit)).scalars().all()
+            
+            claimed = []
+            lease_until = now + timedelta(seconds=lease_seconds)
+            for entry in due:
+                # Compare-and-set on next_attempt_at so two workers never claim the same entry
+                result = session.execute(
+                    update(PaymentOutbox)
+                    .where(PaymentOutbox.outbox_id == entry.outbox_id,
+                           PaymentOutbox.next_attempt_at == entry.next_attempt_at)
+                    .values(next_attempt_at=lease_until, attempts=PaymentOutbox.attempts + 1)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 1:
+                    claimed.append(self._outbox_entry_to_dict(entry, attempts=entry.attempts + 1))
+            session.commit()
+            return claimed
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error claiming outbox entries: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def get_outbox_entry(self, outbox_id: str) -> Optional[Dict]:
+        """
+        Get a pending payment outbox entry without claiming it.
+        
+        For callers that already hold the entry's lease, e.g. because they recorded it
+        with record_payment(lease_seconds=...).
+        
+        Args:
+            outbox_id: ID of the outbox entry
+            
+        Returns:
+            The entry as returned by claim_outbox_entries, or None if it is not pending
+        """
+        with self.Session() as session:
+            entry = session.get(PaymentOutbox, outbox_id)
+            if entry is None or entry.status != OutboxStatus.PENDING:
+                return None
+            return self._outbox_entry_to_dict(entry, attempts=entry.attempts)
+
+    @staticmethod
+    def _outbox_entry_to_dict(entry: PaymentOutbox, attempts: int) -> Dict:
+        """Convert an outbox entry to the dictionary handed to the post-payment worker."""
+        return {
+            'outbox_id': entry.outbox_id,
+            'transaction_hash': entry.transaction_hash,
+            'sender_id': entry.sender_id,
+            'receiver_id': entry.receiver_id,
+            'amount': float(entry.amount),
+            'currency': entry.currency,
+            'attempts': attempts,
+            'balance_applied': entry.balance_applied,
+            'allocated': entry.allocated
+        }
+
+    def apply_outbox_balance(self, outbox_id: str, cause_id: str, delta: float) -> bool:
+        """
+        Add a payment to a cause balance exactly once.
+        
+        Args:
+            outbox_id: Payment outbox entry the increment belongs to
+            cause_id: ID of the cause
+            delta: Amount to add
+            
+        Returns:
+            True if the balance was incremented, False if the entry had already applied it
+        """
+        session = self.Session()
+        try:
+            if not self._claim_outbox_step(session, outbox_id, PaymentOutbox.balance_applied):
+                return False
+            session.execute(
+                update(Cause)
+                .where(Cause.cause_id == cause_id)
+                .values(balance=func.coalesce(Cause.balance, 0) + Decimal(str(delta)), version=Cause.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error applying outbox balance: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def complete_outbox_entry(self, outbox_id: str) -> None:
+        """
+        Mark a payment outbox entry as done.
+        
+        Args:
+            outbox_id: ID of the outbox entry
+        """
+        self._update_outbox_entry(outbox_id, status=OutboxStatus.DONE, processed_at=datetime.utcnow(), last_error=None)
+
+    def retry_outbox_entry(self, outbox_id: str, error: str, retry_at: Optional[datetime]) -> None:
+        """
+        Record a failed attempt of a payment outbox entry.
+        
+        Args:
+            outbox_id: ID of the outbox entry
+            error: Error of the failed attempt
+            retry_at: When to try again, or None to give up and mark the entry failed
+        """
+        if retry_at is None:
+            self._update_outbox_entry(outbox_id, status=OutboxStatus.FAILED, last_error=error[:1000])
+        else:
+            self._update_outbox_entry(outbox_id, next_attempt_at=retry_at, last_error=error[:1000])
+
+    def get_outbox_counts(self) -> Dict[str, int]:
+        """
+        Count payment outbox entries by status.
+        
+        Returns:
+            Dictionary of entry count keyed by status
+        """
+        with self.Session() as session:
+            rows = session.execute(
+                select(PaymentOutbox.status, func.count()).group_by(PaymentOutbox.status)
+            ).all()
+        counts = {status.value: 0 for status in OutboxStatus}
+        counts.update({status.value: count for status, count in rows})
+        return counts
+
+    def _claim_outbox_step(self, session, outbox_id: str, step) -> bool:
+        """Set an outbox step flag in the caller's transaction; False if it was already set."""
+        result = session.execute(
+            update(PaymentOutbox)
+            .where(PaymentOutbox.outbox_id == outbox_id, step.is_(False))
+            .values({step.key: True})
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def _update_outbox_entry(self, outbox_id: str, **values) -> None:
+        """Update columns of a payment outbox entry."""
+        session = self.Session()
+        try:
+            session.execute(
+                update(PaymentOutbox)
+                .where(PaymentOutbox.outbox_id == outbox_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error updating outbox entry: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def claim_idempotency_key(self, endpoint: str, idempotency_key: str, request_hash: str,
+                              lease_seconds: Optional[float] = None) -> Optional[Dict]:
+        """
+        Claim an idempotency key for a request about to be executed.
+        
+        The primary key on (endpoint, idempotency_key) makes the claim atomic, so of
+        several concurrent requests with the same key exactly one claims it. A claim
+        for the same request that has been in progress for longer than lease_seconds
+        is presumed to have died with its process and is taken over.
+        
+        Args:
+            endpoint: Endpoint the key is scoped to
+            idempotency_key: Key sent by the client
+            request_hash: Hash of the request body
+            lease_seconds: Age after which an in-progress claim can be taken over
+                (None never takes a claim over)
+            
+        Returns:
+            None if the key was claimed, otherwise the existing key (see get_idempotency_key)
+        """
+        # Committed on its own, even inside a unit of work: concurrent duplicates must see the claim
+        session = self.session_factory()
+        try:
+            session.add(IdempotencyKey(
+                endpoint=endpoint,
+                idempotency_key=idempotency_key,
+                request_hash=request_hash,
+                status=IdempotencyStatus.IN_PROGRESS
+            ))
+            session.commit()
+            return None
+        except IntegrityError:
+            session.rollback()
+        finally:
+            session.close()
+        existing = self.get_idempotency_key(endpoint, idempotency_key)
+        if existing is None:
+            # Released in the meantime, try again
+            return self.claim_idempotency_key(endpoint, idempotency_key, request_hash, lease_seconds)
+        if (lease_seconds is not None and existing['status'] == IdempotencyStatus.IN_PROGRESS
+                and existing['request_hash'] == request_hash
+                and existing['created_at'] <= datetime.utcnow() - timedelta(seconds=lease_seconds)):
+            if self._take_over_idempotency_key(endpoint, idempotency_key, existing['created_at']):
+                logger.warning(f"Took over stale {endpoint} Idempotency-Key {idempotency_key} "
+                               f"claimed at {existing['created_at']}")
+                return None
+            # Taken over by another request in the meantime, look again
+            return self.claim_idempotency_key(endpoint, idempotency_key, request_hash, lease_seconds)
+        return existing
+
+    def _take_over_idempotency_key(self, endpoint: str, idempotency_key: str, claimed_at: datetime) -> bool:
+        """Renew an in-progress claim made at claimed_at, unless it changed in the meantime."""
+        session = self.session_factory()
+        try:
+            result = session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.endpoint == endpoint,
+                       IdempotencyKey.idempotency_key == idempotency_key,
+                       IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS,
+                       IdempotencyKey.created_at == claimed_at)
+                .values(created_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return result.rowcount == 1
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error taking over idempotency key: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def get_idempotency_key(self, endpoint: str, idempotency_key: str) -> Optional[Dict]:
+        """
+        Get an idempotency key.
+        
+        Args:
+            endpoint: Endpoint the key is scoped to
+            idempotency_key: Key sent by the client
+            
+        Returns:
+            Dictionary with request_hash, status, response_body and created_at (when the
+            key was claimed) if found, None otherwise
+        """
+        with self.Session() as session:
+            row = session.get(IdempotencyKey, (endpoint, idempotency_key))
+            if row is None:
+                return None
+            return {
+                'request_hash': row.request_hash,
+                'status': row.status,
+                'response_body': row.response_body,
+                'created_at': row.created_at
+            }
+
+    def complete_idempotency_key(self, endpoint: str, idempotency_key: str, response_body: str) -> None:
+        """
+        Store the response of a request made with an idempotency key.
+        
+        Args:
+            endpoint: Endpoint the key is scoped to
+            idempotency_key: Key sent by the client
+            response_body: JSON of the response
+        """
+        session = self.Session()
+        try:
+            session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.endpoint == endpoint, IdempotencyKey.idempotency_key == idempotency_key)
+                .values(status=IdempotencyStatus.COMPLETED, response_body=response_body, completed_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error completing idempotency key: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def release_idempotency_key(self, endpoint: str, idempotency_key: str) -> None:
+        """
+        Release an idempotency key whose request failed, so it can be retried.
+        
+        Args:
+            endpoint: Endpoint the key is scoped to
+            idempotency_key: Key sent by the client
+        """
+        # The failed request's unit of work is rolled back anyway, and its uncommitted
+        # writes would hold the lock this separately committed delete needs on SQLite
+        unit_of_work = self._unit_of_work()
+        if unit_of_work is not None:
+            unit_of_work.rollback()
+        session = self.session_factory()
+        try:
+            session.execute(
+                delete(IdempotencyKey)
+                .where(IdempotencyKey.endpoint == endpoint,
+                       IdempotencyKey.idempotency_key == idempotency_key,
+                       IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS)
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error releasing idempotency key: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def get_cause_progress(self, cause_id: str) -> Dict[str, float]:
+        """
+        Get donation totals for a cause.
+        
+        Args:
+            cause_id: ID of the cause
+            
+        Returns:
+            Dictionary with the total donated, disbursed and outstanding amounts
+        """
+        with self.Session() as session:
+            donated, outstanding = session.execute(
+                select(
+                    func.coalesce(func.sum(Donations.amount), 0),
+                    func.coalesce(func.sum(Donations.remaining_amount), 0)
+                ).where(Donations.cause_id == cause_id, Donations.status != DonationStatus.FAILED)
+            ).one()
+        return {
+            'donated': float(donated),
+            'disbursed': float(donated) - float(outstanding),
+            'outstanding': float(outstanding)
+        }
+
+    def get_donor_statement(self, customer_id: str) -> List[Dict]:
+        """
+        Get the donations of a donor with how much of each has been disbursed.
+        
+        Args:
+            customer_id: ID of the donating customer
+            
+        Returns:
+            List of donations, newest first, with donation_id, cause_id, amount,
+            disbursed, remaining_amount, currency, status and donation_date
+        """
+        with self.Session() as session:
+            rows = session.execute(
+                select(Donations.donation_id, Donations.cause_id, Donations.amount, Donations.remaining_amount,
+                       Donations.currency, Donations.status, Donations.donation_date)
+                .where(Donations.customer_id == customer_id)
+                .order_by(Donations.donation_date.desc())
+            ).all()
+        return [{
+            'donation_id': row.donation_id,
+            'cause_id': row.cause_id,
+            'amount': float(row.amount),
+            'disbursed': float(row.amount) - float(row.remaining_amount),
+            'remaining_amount': float(row.remaining_amount),
+            'currency': row.currency,
+            'status': row.status,
+            'donation_date': row.donation_date
+        } for row in rows]
+
+    def get_cause_from_address(self, wallet_address: str) -> Optional[Cause]:
+        """
+        Get cause object by joining customers and causes tables using wallet address.
+        
+        Args:
+            wallet_address: The wallet address to look up
+            
+        Returns:
             Cause object if found, None otherwise
         """
         session = self.Session()
@@ -756,54 +2107,103 @@ class Database:
         finally:
             session.close()
 
-    def update_cause_balance(self, cause_id: str, balance: float) -> None:
+    def update_cause_balance(self, cause_id: str, balance: float, expected_version: Optional[int] = None) -> bool:
         """
-        Update the balance for a cause.
+        Set the balance for a cause.
         
         Args:
             cause_id: ID of the cause
             balance: New balance amount
+            expected_version: Only update if the cause is still at this version
+            
+        Returns:
+            True if the cause was updated, False if it was not found or its version changed
+        """
+        return self._update_cause(cause_id, Decimal(str(balance)), expected_version)
+
+    def increment_cause_balance(self, cause_id: str, delta: float, expected_version: Optional[int] = None) -> bool:
+        """
+        Atomically add to the balance of a cause.
+        
+        The increment happens in a single UPDATE statement, so concurrent
+        increments never overwrite each other.
+        
+        Args:
+            cause_id: ID of the cause
+            delta: Amount to add (negative to subtract)
+            expected_version: Only update if the cause is still at this version
+            
+        Returns:
+            True if the cause was updated, False if it was not found or its version changed
+        """
+        return self._update_cause(cause_id, func.coalesce(Cause.balance, 0) + Decimal(str(delta)), expected_version)
+
+    def increment_cause_balances(self, deltas: Dict[str, float]) -> int:
         """
+        Atomically add to the balances of many causes in one statement.
+        
+        Args:
+            deltas: Amount to add keyed by cause ID
+            
+        Returns:
+            Number of causes updated
+        """
+        if not deltas:
+            return 0
         session = self.Session()
         try:
-            print(f"Updating balance for cause {cause_id} to {balance}")
-            cause = session.query(Cause).filter_by(cause_id=cause_id).first()
-            if cause:
-                cause.balance = balance
-                session.commit()
-                logger.info(f"Updated balance for cause {cause_id} to {balance}")
-            else:
-                logger.warning(f"Cause {cause_id} not found")
+            result = session.execute(
+                update(Cause)
+                .where(Cause.cause_id.in_(list(deltas)))
+                .values(
+                    balance=func.coalesce(Cause.balance, 0) + case(
+                        {cause_id: Decimal(str(delta)) for cause_id, delta in deltas.items()},
+                        value=Cause.cause_id
+                    ),
+                    version=Cause.version + 1
+                )
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            if result.rowcount < len(deltas):
+                logger.warning(f"Updated {result.rowcount} of {len(deltas)} cause balances, the rest were not found")
+            return result.rowcount
         except Exception as e:
             session.rollback()
-            logger.error(f"Error updating cause balance: {str(e)}")
+            logger.error(f"Error incrementing cause balances: {str(e)}")
             raise
         finally:
             session.close()
 
     def upsert_cause_balance(self, cause_id: str, balance: float) -> None:
         """
-        Upsert the balance for a cause.
+        Add to the balance for a cause (see increment_cause_balance).
         """
+        self.increment_cause_balance(cause_id, balance)
+
+    def _update_cause(self, cause_id: str, balance, expected_version: Optional[int]) -> bool:
+        """Set the balance of a cause to a value or SQL expression and bump its version."""
         session = self.Session()
         try:
-            cause = session.query(Cause).filter_by(cause_id=cause_id).first()
-            if cause:
-                # Convert float to Decimal for consistent type handling
-                balance_decimal = Decimal(str(balance))
-                
-                # Handle the case where cause balance is not set
-                if cause.balance is None:
-                    cause.balance = balance_decimal
+            statement = update(Cause).where(Cause.cause_id == cause_id)
+            if expected_version is not None:
+                statement = statement.where(Cause.version == expected_version)
+            result = session.execute(
+                statement.values(balance=balance, version=Cause.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            if result.rowcount == 0:
+                if expected_version is None:
+                    logger.warning(f"Cause {cause_id} not found")
                 else:
-                    cause.balance = cause.balance + balance_decimal
-                session.commit()
-                logger.info(f"Updated balance for cause {cause_id} to {balance_decimal}")
-            else:
-                logger.warning(f"Cause {cause_id} not found")
+                    logger.warning(f"Cause {cause_id} not found or no longer at version {expected_version}")
+                return False
+            logger.info(f"Updated balance for cause {cause_id}")
+            return True
         except Exception as e:
             session.rollback()
-            logger.error(f"Error upserting cause balance: {str(e)}")
+            logger.error(f"Error updating cause balance: {str(e)}")
             raise
         finally:
             session.close()
@@ -859,65 +2259,40 @@ class Database:
         Returns:
             str: The response_id (new or existing)
         """
+        values = {
+            "customer_id": customer_id,
+            "beneficiary_id": beneficiary_id,
+            "location": location,
+            "disaster_type": disaster_type,
+            "severity": severity,
+            "status": status,
+            "is_aid_required": is_aid_required,
+            "estimated_affected": estimated_affected,
+            "required_aid_amount": required_aid_amount,
+            "aid_currency": aid_currency,
+            "evacuation_needed": evacuation_needed,
+            "disaster_date": disaster_date,
+            "timestamp": timestamp,
+            "confidence_score": confidence_score,
+            "is_valid": is_valid,
+            "reasoning": reasoning,
+            "validation_reasoning": validation_reasoning,
+            "summarized_news": summarized_news
+        }
         session = self.Session()
         try:
-            # Check if a response already exists for this customer and beneficiary
-            existing_response = session.query(DisasterResponse).filter(
-                DisasterResponse.customer_id == customer_id,
-                DisasterResponse.beneficiary_id == beneficiary_id
-            ).first()
-            
-            if existing_response:
-                # Update existing response
-                existing_response.location = location
-                existing_response.disaster_type = disaster_type
-                existing_response.severity = severity
-                existing_response.status = status
-                existing_response.is_aid_required = is_aid_required
-                existing_response.estimated_affected = estimated_affected
-                existing_response.required_aid_amount = required_aid_amount
-                existing_response.aid_currency = aid_currency
-                existing_response.evacuation_needed = evacuation_needed
-                existing_response.disaster_date = disaster_date
-                existing_response.timestamp = timestamp
-                existing_response.confidence_score = confidence_score
-                existing_response.is_valid = is_valid
-                existing_response.reasoning = reasoning
-                existing_response.validation_reasoning = validation_reasoning
-                existing_response.summarized_news = summarized_news
-                
-                logger.info(f"Updated existing disaster response {existing_response.response_id}")
-                session.commit()
-                return existing_response.response_id
-            else:
-                # Create new response record
-                response_id = str(uuid.uuid4())
-                response = DisasterResponse(
-                    response_id=response_id,
-                    customer_id=customer_id,
-                    beneficiary_id=beneficiary_id,
-                    location=location,
-                    disaster_type=disaster_type,
-                    severity=severity,
-                    status=status,
-                    is_aid_required=is_aid_required,
-                    estimated_affected=estimated_affected,
-                    required_aid_amount=required_aid_amount,
-                    aid_currency=aid_currency,
-                    evacuation_needed=evacuation_needed,
-                    disaster_date=disaster_date,
-                    timestamp=timestamp,
-                    confidence_score=confidence_score,
-                    is_valid=is_valid,
-                    reasoning=reasoning,
-                    validation_reasoning=validation_reasoning,
-                    summarized_news=summarized_news
-                )
-                session.add(response)
-                logger.info(f"Created new disaster response {response_id}")
-                session.commit()
-                return response_id
-            
+            # One statement, so concurrent analyses of the same pair cannot insert it twice
+            response_id = session.execute(
+                self._upsert(
+                    DisasterResponse,
+                    {"response_id": str(uuid.uuid4()), "created_at": datetime.utcnow(), **values},
+                    conflict_columns=["customer_id", "beneficiary_id"],
+                    update_columns=list(values)
+                ).returning(DisasterResponse.response_id)
+            ).scalar_one()
+            session.commit()
+            logger.info(f"Upserted disaster response {response_id}")
+            return response_id
         except Exception as e:
             session.rollback()
             logger.error(f"Error upserting disaster response: {str(e)}")
@@ -927,28 +2302,30 @@ class Database:
 
     def upsert_news_link(self, customer_id: str, beneficiary_id: str, news_link: str) -> None:
         """
-        Insert a news link into the database.
-        If a customer and beneficary doesn't exist, it will be created.
+        Set the news link of the disaster response for a customer and beneficiary.
+        Nothing is written if there is no such response yet.
         """
-        session = self.Session()
+        def set_link(session):
+            # customer_id and beneficiary_id are unique together, so this updates at most one response
+            return session.execute(
+                update(DisasterResponse)
+                .where(
+                    DisasterResponse.customer_id == customer_id,
+                    DisasterResponse.beneficiary_id == beneficiary_id
+                )
+                .values(news_link=news_link)
+                .returning(DisasterResponse.response_id)
+                .execution_options(synchronize_session=False)
+            ).scalar()
         try:
-            # Check if a response already exists for this customer and beneficiary
-            existing_response = session.query(DisasterResponse).filter(
-                DisasterResponse.customer_id == customer_id,
-                DisasterResponse.beneficiary_id == beneficiary_id
-            ).first()
-
-            if existing_response:
-                existing_response.news_link = news_link
-                session.commit()
-                logger.info(f"Updated news link for disaster response {existing_response.response_id}")
+            response_id = self._write(set_link)
+            if response_id is not None:
+                logger.info(f"Updated news link for disaster response {response_id}")
             else:
                 logger.warning(f"No disaster response found for customer {customer_id} and beneficiary {beneficiary_id}")
         except Exception as e:
             logger.error(f"Error inserting news link: {str(e)}")
             raise
-        finally:
-            session.close()
 
 
 
@@ -966,7 +2343,7 @@ def init_db(connection_string: str) -> None:
     """
     global _db
     if _db is None:
-        _db = Database(connection_string)
+        _db = Database(connection_string, write_behind=WRITE_BEHIND_CONFIG["enabled"])
         logger.info("Database initialized")
     else:
         logger.warning("Database already initialized")
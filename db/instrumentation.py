@@ -0,0 +1,199 @@
+"""
+Query instrumentation.
+
+Cursor events on the Database engine count and time every statement. Totals are kept for
+the process, and statements run inside QueryInstrumentation.track() (every API request, see the
+middleware in service/api_server.py) are also counted for that block, so an endpoint that
+runs one query per row shows up as a statement count instead of having to be found by
+reading code. The context is tracked in a context variable, like the unit of work, so it
+follows calls made through asyncio.to_thread. Statements slower than a threshold are kept
+in a short log, with their parameters reduced to type names and string literals blanked.
+
+    with db.track_queries("GET /customers") as stats:
+        db.list_customers()
+    stats.statements, stats.seconds
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config.logger_config import setup_logger
+from db.sqlite_config import QUERY_INSTRUMENTATION_CONFIG
+
+logger = setup_logger(__name__)
+
+_current_query_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+# String literals inlined into SQL, e.g. by text() statements
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+class SlowStatement(NamedTuple):
+    """A statement that ran longer than the slow statement threshold."""
+    statement: str  # SQL with string literals blanked
+    parameters: List[str]  # Type names of the bound parameters, never their values
+    duration_ms: float
+    label: Optional[str]  # Label of the tracked block it ran in, e.g. the endpoint
+
+def redact_statement(statement: str, max_chars: int) -> str:
+    """Blank the string literals of a statement and cut it to max_chars."""
+    statement = _STRING_LITERAL.sub("'?'", " ".join(statement.split()))
+    return statement if len(statement) <= max_chars else statement[:max_chars] + "..."
+
+def redact_parameters(parameters: Any) -> List[str]:
+    """Reduce bound parameters to their type names."""
+    if isinstance(parameters, dict):
+        parameters = parameters.values()
+    elif not isinstance(parameters, (list, tuple)):
+        return []
+    return [type(value).__name__ for value in parameters]
+
+class QueryStats:
+    """Statements run inside one tracked block, e.g. one API request."""
+
+    def __init__(self, instrumentation: "QueryInstrumentation", label: Optional[str] = None):
+        """
+        Args:
+            instrumentation: Instrumentation of the engine the statements run on
+            label: Name the block is aggregated under in the metrics, e.g. "GET /customers";
+                can also be set before the block exits
+        """
+        self.label = label
+        self.statements = 0
+        self.seconds = 0.0
+        self.slow: List[SlowStatement] = []
+        self._instrumentation = instrumentation
+        self._token: Optional[Token] = None
+
+    def __enter__(self) -> "QueryStats":
+        if self._token is not None:
+            raise RuntimeError("Query stats are already being tracked")
+        self._token = _current_query_stats.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        _current_query_stats.reset(self._token)
+        self._token = None
+        self._instrumentation.record_block(self)
+
+class QueryInstrumentation:
+    """Counts and times the statements run on an engine."""
+
+    def __init__(self, engine: Engine, slow_statement_ms: Optional[float] = None,
+                 block_statement_warning: Optional[int] = None):
+        """
+        Args:
+            engine: Engine to instrument
+            slow_statement_ms: Statements running at least this long are logged (defaults to
+                QUERY_INSTRUMENTATION_CONFIG)
+            block_statement_warning: A tracked block running more statements than this is
+                logged as a likely N+1 query (defaults to QUERY_INSTRUMENTATION_CONFIG)
+        """
+        self.slow_statement_ms = (QUERY_INSTRUMENTATION_CONFIG["slow_statement_ms"]
+                                  if slow_statement_ms is None else slow_statement_ms)
+        self.block_statement_warning = (QUERY_INSTRUMENTATION_CONFIG["block_statement_warning"]
+                                        if block_statement_warning is None else block_statement_warning)
+        self._lock = threading.Lock()
+        self._statements = 0
+        self._seconds = 0.0
+        self._slow: Deque[SlowStatement] = deque(maxlen=QUERY_INSTRUMENTATION_CONFIG["slow_log_size"])
+        self._blocks: Dict[str, Dict[str, Any]] = {}
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def track(self, label: Optional[str] = None) -> QueryStats:
+        """
+        Count the statements run in a with block.
+
+        Args:
+            label: Name the block is aggregated under in the metrics; unlabelled blocks
+                only count towards the totals
+
+        Returns:
+            QueryStats: The stats, to be entered with a with statement
+        """
+        return QueryStats(self, label)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get query metrics.
+
+        Returns:
+            Dictionary with the process totals (statements, total_ms), the statement counts
+            and time of the tracked blocks by label (requests, statements, max_statements,
+            avg_statements, total_ms) and the most recent slow statements
+        """
+        with self._lock:
+            return {
+                "statements": self._statements,
+                "total_ms": round(self._seconds * 1000, 3),
+                "by_label": {
+                    label: {
+                        **block,
+                        "total_ms": round(block["total_ms"], 3),
+                        "avg_statements": block["statements"] / block["requests"]
+                    }
+                    for label, block in self._blocks.items()
+                },
+                "slow_statements": [statement._asdict() for statement in self._slow]
+            }
+
+    def record_block(self, stats: QueryStats) -> None:
+        """Add the stats of a tracked block that has exited to its label's metrics."""
+        if stats.label is None:
+            return
+        with self._lock:
+            block = self._blocks.setdefault(
+                stats.label, {"requests": 0, "statements": 0, "max_statements": 0, "total_ms": 0.0}
+            )
+            block["requests"] += 1
+            block["statements"] += stats.statements
+            block["max_statements"] = max(block["max_statements"], stats.statements)
+            block["total_ms"] += stats.seconds * 1000
+        if stats.statements > self.block_statement_warning:
+            logger.warning(f"{stats.label} ran {stats.statements} statements ({stats.seconds * 1000:.1f} ms)")
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._record(conn, statement, parameters)
+
+    def _handle_error(self, exception_context):
+        # Failed statements never reach after_cursor_execute
+        if exception_context.connection is not None and exception_context.statement is not None:
+            self._record(exception_context.connection, exception_context.statement, exception_context.parameters)
+
+    def _record(self, conn, statement: str, parameters: Any) -> None:
+        """Count a statement that finished on conn towards the totals and the current block."""
+        started = conn.info.get("query_started")
+        if not started:
+            return
+        seconds = time.perf_counter() - started.pop()
+        stats = _current_query_stats.get()
+        slow = None
+        if seconds * 1000 >= self.slow_statement_ms:
+            slow = SlowStatement(
+                redact_statement(statement, QUERY_INSTRUMENTATION_CONFIG["max_statement_chars"]),
+                redact_parameters(parameters),
+                round(seconds * 1000, 3),
+                stats.label if stats else None
+            )
+            logger.warning(f"Slow statement ({slow.duration_ms} ms): {slow.statement}")
+        with self._lock:
+            self._statements += 1
+            self._seconds += seconds
+            if stats is not None:
+                stats.statements += 1
+                stats.seconds += seconds
+            if slow is not None:
+                self._slow.append(slow)
+                if stats is not None:
+                    stats.slow.append(slow)
@@ -0,0 +1,263 @@
+"""
+Versioned schema migrations.
+
+The schema is managed by Alembic revisions in db/alembic/versions. The revision a
+database is at is recorded in its alembic_version table, so starting the application
+only compares that one value with the latest revision, and reads the checkpoints of
+the data backfills, instead of inspecting every table. Data backfills declared by
+revisions (see db/backfill.py) run after the schema upgrade, in chunks of their own
+transactions; one that was interrupted keeps the application from starting until it
+is resumed. Deploys run pending migrations before starting the application with:
+
+    python -m db.migrate upgrade
+
+Upgrades hold a migration lock, so processes started together migrate one at a time.
+"""
+
+import argparse
+import fcntl
+import sys
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Add the project root directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from config.logger_config import setup_logger
+from db.sqlite_config import SCHEMA_CONFIG, get_connection_string
+
+logger = setup_logger(__name__)
+
+SCRIPT_LOCATION = Path(__file__).parent / "alembic"
+
+# Key of the PostgreSQL advisory lock held while migrating
+MIGRATION_LOCK_KEY = 725_404_044
+
+def get_alembic_config(connection: Optional[Connection] = None) -> Config:
+    """
+    Get the Alembic configuration.
+
+    Args:
+        connection: Connection to migrate (defaults to a connection to get_connection_string())
+
+    Returns:
+        Config: The configuration
+    """
+    config = Config()
+    config.set_main_option("script_location", str(SCRIPT_LOCATION))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+@lru_cache(maxsize=1)
+def get_head_revision() -> str:
+    """Get the latest revision."""
+    return ScriptDirectory.from_config(get_alembic_config()).get_current_head()
+
+def get_current_revision(connection: Connection) -> Optional[str]:
+    """
+    Get the revision a database is at.
+
+    Args:
+        connection: Connection to the database
+
+    Returns:
+        The recorded revision, or None if the database has never been migrated
+    """
+    return MigrationContext.configure(connection).get_current_revision()
+
+@contextmanager
+def migration_lock(engine: Engine) -> Iterator[None]:
+    """
+    Hold the migration lock of a database.
+
+    PostgreSQL databases use a session-level advisory lock, SQLite files an exclusive
+    lock on a file next to the database. In-memory databases are private to their
+    process and need no lock.
+
+    Args:
+        engine: Engine of the database
+    """
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as connection:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        return
+
+    database = engine.url.database
+    if engine.dialect.name != "sqlite" or not database or database == ":memory:":
+        yield
+        return
+    with open(f"{database}.migrate.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def upgrade(engine: Engine, revision: str = "head") -> None:
+    """
+    Migrate the schema of a database to a revision in one transaction, then run the
+    pending data backfills of the revisions applied.
+
+    Holds the migration lock; a process that waited for it finds the work already done.
+
+    Args:
+        engine: Engine of the database
+        revision: Target revision
+    """
+    with migration_lock(engine):
+        with engine.begin() as connection:
+            command.upgrade(get_alembic_config(connection), revision)
+        run_backfills(engine)
+
+def run_backfills(engine: Engine, dry_run: bool = False, chunk_size: Optional[int] = None,
+                  throttle_seconds: Optional[float] = None, max_chunks: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the backfills declared by the revisions a database is at, oldest first.
+
+    Completed backfills are skipped and interrupted ones resume from their checkpoint.
+
+    Args:
+        engine: Engine of the database
+        dry_run: Only count the rows that would be backfilled
+        chunk_size: Rows per transaction (defaults to BACKFILL_CONFIG)
+        throttle_seconds: Pause between chunks (defaults to BACKFILL_CONFIG)
+        max_chunks: Stop each backfill after this many chunks
+
+    Returns:
+        Progress keyed by backfill name (see BackfillRunner.metrics)
+    """
+    # Imported here: db.backfill needs the models, whose module imports this one
+    from db.backfill import BackfillRunner
+
+    with engine.connect() as connection:
+        current = get_current_revision(connection)
+        has_checkpoints = inspect(connection).has_table("backfill_checkpoints")
+    if current is None or not has_checkpoints:
+        return {}
+    runner = BackfillRunner(engine, chunk_size=chunk_size, throttle_seconds=throttle_seconds, dry_run=dry_run)
+    for backfill in _declared_backfills(current):
+        runner.run(backfill, max_chunks=max_chunks)
+    return runner.metrics()
+
+def get_pending_backfills(connection: Connection) -> List[str]:
+    """
+    Get the backfills of the applied revisions that have not completed.
+
+    A backfill is pending if its checkpoint is missing or still RUNNING, e.g. because
+    the process running it crashed or was stopped with --max-chunks. Backfills of
+    tables the database does not have are never run and therefore not pending.
+
+    Args:
+        connection: Connection to the database
+
+    Returns:
+        Names of the pending backfills, oldest revision first
+    """
+    # Imported here: the models' module imports this one
+    from db.database import BackfillCheckpoint, BackfillStatus
+
+    current = get_current_revision(connection)
+    inspector = inspect(connection)
+    if current is None or not inspector.has_table("backfill_checkpoints"):
+        return []
+    completed = set(connection.execute(
+        select(BackfillCheckpoint.name).where(BackfillCheckpoint.status == BackfillStatus.COMPLETED)
+    ).scalars())
+    return [backfill.name for backfill in _declared_backfills(current)
+            if backfill.name not in completed and inspector.has_table(backfill.table)]
+
+def _declared_backfills(current: str) -> Iterator[Any]:
+    """Yield the backfills declared by a revision and its ancestors, oldest first."""
+    script = ScriptDirectory.from_config(get_alembic_config())
+    for revision in reversed(list(script.iterate_revisions(current, "base"))):
+        yield from getattr(revision.module, "backfills", [])
+
+def ensure_schema(engine: Engine, auto_upgrade: Optional[bool] = None) -> None:
+    """
+    Check that a database is at the latest revision and its data backfills have completed.
+
+    Deploys migrate with `python -m db.migrate upgrade` before starting the application,
+    so by default an outdated database is refused rather than migrated on import.
+
+    Args:
+        engine: Engine of the database
+        auto_upgrade: Upgrade a database that is behind instead of failing
+            (defaults to SCHEMA_CONFIG["auto_upgrade"])
+
+    Raises:
+        RuntimeError: If the database is behind or has pending backfills and auto_upgrade is off
+    """
+    with engine.connect() as connection:
+        current = get_current_revision(connection)
+        head = get_head_revision()
+        pending = get_pending_backfills(connection) if current == head else []
+    if current == head and not pending:
+        return
+
+    if not (SCHEMA_CONFIG["auto_upgrade"] if auto_upgrade is None else auto_upgrade):
+        if current != head:
+            raise RuntimeError(f"Database schema is at revision {current}, expected {head}. "
+                               "Run `python -m db.migrate upgrade`.")
+        raise RuntimeError(f"Data backfills {', '.join(pending)} have not completed. "
+                           "Run `python -m db.migrate backfill`.")
+    if current != head:
+        logger.info(f"Upgrading database schema from revision {current} to {head}")
+    else:
+        logger.info(f"Resuming data backfills {', '.join(pending)}")
+    upgrade(engine)
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the database schema version")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subparsers.add_parser("upgrade", help="Migrate to a revision")
+    upgrade_parser.add_argument("revision", nargs="?", default="head", help="Target revision (default: head)")
+    subparsers.add_parser("current", help="Show the revision of the database")
+    subparsers.add_parser("history", help="List the revisions")
+    stamp_parser = subparsers.add_parser("stamp", help="Record a revision without migrating")
+    stamp_parser.add_argument("revision", help="Revision to record")
+    backfill_parser = subparsers.add_parser("backfill", help="Run or resume the pending data backfills")
+    backfill_parser.add_argument("--dry-run", action="store_true", help="Only count the rows to backfill")
+    backfill_parser.add_argument("--chunk-size", type=int, help="Rows per transaction")
+    backfill_parser.add_argument("--throttle-seconds", type=float, help="Pause between chunks")
+    backfill_parser.add_argument("--max-chunks", type=int, help="Stop each backfill after this many chunks")
+    args = parser.parse_args()
+
+    engine = create_engine(get_connection_string())
+    try:
+        if args.command == "upgrade":
+            upgrade(engine, args.revision)
+            print(f"Database is at revision {args.revision}")
+        elif args.command == "current":
+            with engine.connect() as connection:
+                print(get_current_revision(connection) or "No revision recorded")
+        elif args.command == "history":
+            command.history(get_alembic_config())
+        elif args.command == "stamp":
+            with engine.begin() as connection:
+                command.stamp(get_alembic_config(connection), args.revision)
+            print(f"Recorded revision {args.revision}")
+        elif args.command == "backfill":
+            progress = run_backfills(engine, dry_run=args.dry_run, chunk_size=args.chunk_size,
+                                     throttle_seconds=args.throttle_seconds, max_chunks=args.max_chunks)
+            for name, metrics in progress.items():
+                print(f"{name}: {metrics['status']}, {metrics['rows']} rows in {metrics['chunks']} chunks"
+                      f"{' (dry run)' if metrics['dry_run'] else ''}")
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
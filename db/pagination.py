@@ -0,0 +1,89 @@
+"""
+Keyset pagination.
+
+A page is read with a WHERE on the sort key of the last row of the previous page instead
+of an OFFSET, so every page is an index range scan of at most limit rows however deep it
+is, and rows inserted in the meantime do not shift later pages. Clients get the position
+as an opaque cursor, which also records the sort key it belongs to so that a cursor of one
+listing is rejected by another.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+class InvalidCursorError(ValueError):
+    """Raised for cursors that were not issued for the listing they are used with."""
+
+class Page(NamedTuple):
+    """One page of a listing."""
+    items: List[Any]
+    next_cursor: Optional[str]  # None on the last page
+
+def _encode_value(value: Any) -> Any:
+    """Encode the sort key values JSON has no type for."""
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"decimal": str(value)}
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+def _decode_value(value: Any) -> Any:
+    """Decode a value encoded by _encode_value."""
+    if isinstance(value, dict) and "datetime" in value:
+        return datetime.fromisoformat(value["datetime"])
+    if isinstance(value, dict) and "decimal" in value:
+        return Decimal(value["decimal"])
+    return value
+
+def encode_cursor(scope: str, values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of a row as a cursor.
+
+    Args:
+        scope: Identifies the sort key, e.g. the names of its columns
+        values: Values of the sort key columns of the row
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([scope, list(values)], default=_encode_value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _is_instance(value: Any, expected: type) -> bool:
+    """Check a decoded value against the Python type of its column; JSON booleans are not numbers."""
+    return isinstance(value, expected) and (expected is bool or not isinstance(value, bool))
+
+def decode_cursor(cursor: str, scope: str, types: Optional[Sequence[type]] = None) -> List[Any]:
+    """
+    Decode a cursor issued by encode_cursor.
+
+    Args:
+        cursor: The cursor
+        scope: Sort key the cursor must belong to
+        types: Python types of the sort key columns the values must have, if given
+
+    Returns:
+        Values of the sort key columns
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or belongs to another sort key
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_scope, values = json.loads(payload)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+    if cursor_scope != scope or not isinstance(values, list):
+        raise InvalidCursorError("Cursor does not belong to this listing")
+    try:
+        values = [_decode_value(value) for value in values]
+    except (ValueError, ArithmeticError, TypeError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+    if types is not None and (len(values) != len(types)
+                              or not all(map(_is_instance, values, types))):
+        raise InvalidCursorError("Cursor does not belong to this listing")
+    return values
@@ -92,6 +92,7 @@ TEST_DONATIONS = [
         "amount": 500.0,
         "currency": "RLUSD",
         "status": DonationStatus.COMPLETED,
+        "remaining_amount": 0.0,
         "donation_date": datetime.utcnow()
     },
     {
@@ -101,6 +102,7 @@ TEST_DONATIONS = [
         "amount": 750.0,
         "currency": "RLUSD",
         "status": DonationStatus.COMPLETED,
+        "remaining_amount": 0.0,
         "donation_date": datetime.utcnow()
     }
 ]
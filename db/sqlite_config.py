@@ -1,9 +1,16 @@
 """
-SQLite database configuration settings.
+Database configuration settings.
+
+The application uses an SQLite file in data/ unless DATABASE_URL points it at another
+database, such as the PostgreSQL server from docker-compose.yml.
 """
 
 import os
 from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 
 # Database file path
 DB_DIR = Path(__file__).parent.parent / "data"
@@ -12,11 +19,155 @@ DB_FILE = "disaster_monitor.db"
 # Create data directory if it doesn't exist
 DB_DIR.mkdir(exist_ok=True)
 
+# Engine profile used for file databases (see create_sqlite_engine)
+SQLITE_ENGINE_CONFIG = {
+    "journal_mode": "WAL",  # Readers no longer block the writer and vice versa
+    "synchronous": "NORMAL",  # fsync on checkpoint instead of every commit; safe with WAL
+    "busy_timeout_ms": 10000,  # Wait for the write lock instead of failing with "database is locked"
+    "mmap_size": 268435456,  # Bytes of the file read through memory mapping (256 MiB)
+    "cache_size_kib": 65536,  # Page cache per connection (64 MiB)
+    "temp_store": "MEMORY",  # Temporary tables and indices for sorting kept in memory
+    "pool_size": 10,  # Connections kept open per process
+    "max_overflow": 20,  # Extra connections opened under load
+    "pool_timeout": 30  # Seconds to wait for a free connection
+}
+
+# Engine profile used for PostgreSQL (see create_database_engine)
+POSTGRES_ENGINE_CONFIG = {
+    "pool_size": 10,  # Connections kept open per process
+    "max_overflow": 20,  # Extra connections opened under load
+    "pool_timeout": 30,  # Seconds to wait for a free connection
+    "pool_recycle": 1800,  # Reopen connections older than this many seconds
+    "pool_pre_ping": True,  # Replace connections the server closed while they were idle
+    "statement_timeout_ms": 30000  # Abort statements running longer than this
+}
+
+# Schema version check run when a Database is constructed (see db/migrate.py)
+SCHEMA_CONFIG = {
+    # Upgrade an outdated or empty database instead of failing; off so that deploys
+    # migrate once with `python -m db.migrate upgrade` instead of every process at import
+    "auto_upgrade": os.getenv("DB_AUTO_UPGRADE", "false").lower() == "true"
+}
+
+# Chunked data backfills declared by migrations (see db/backfill.py)
+BACKFILL_CONFIG = {
+    "chunk_size": 1000,  # Rows per transaction
+    "throttle_seconds": 0.05,  # Pause between chunks so other writers get the database
+    "log_every_chunks": 10  # Progress is logged every this many chunks
+}
+
+# Keyset-paginated listings (see db/pagination.py)
+PAGINATION_CONFIG = {
+    "default_limit": 100,  # Rows per page when the client does not ask for a limit
+    "max_limit": 1000  # Largest page a client can ask for
+}
+
+# Statement counts and timing of the Database engine (see db/instrumentation.py)
+QUERY_INSTRUMENTATION_CONFIG = {
+    "slow_statement_ms": 100,  # Statements running at least this long are logged with parameters redacted
+    "slow_log_size": 50,  # Most recent slow statements kept for /metrics
+    "max_statement_chars": 2000,  # Longer SQL is cut in the slow statement log
+    "block_statement_warning": 50  # Requests running more statements than this are logged as likely N+1 queries
+}
+
+# Write-behind group commit of single-row writes (see Database.enable_write_behind)
+WRITE_BEHIND_CONFIG = {
+    "enabled": False,  # Opt-in: batch insert_transaction/insert_check/insert_donation/upsert_news_link
+    "max_batch_size": 500,  # Writes per transaction
+    "max_delay_seconds": 0.01  # Maximum time a write waits for its batch to fill
+}
+
 def get_connection_string() -> str:
     """
-    Get the SQLite database connection string.
+    Get the database connection string.
+    
+    Returns:
+        str: The DATABASE_URL environment variable if set, otherwise the SQLite
+        connection string for data/disaster_monitor.db
+    """
+    return os.getenv("DATABASE_URL") or f"sqlite:///{DB_DIR / DB_FILE}"
+
+def _is_file_database(connection_string: str) -> bool:
+    """Whether the connection string points at an SQLite database file (not in memory)."""
+    path = connection_string.split(":///", 1)[1] if ":///" in connection_string else ""
+    return bool(path) and path != ":memory:" and "mode=memory" not in path
+
+def create_sqlite_engine(connection_string: str, profile: Optional[Dict[str, Any]] = None) -> Engine:
+    """
+    Create an SQLite engine tuned for concurrent use by several processes.
+    
+    File databases get WAL journaling, a busy timeout, memory-mapped reads and a larger
+    page cache on every connection, and a connection pool sized for the API server and
+    workers. In-memory databases keep SQLAlchemy's defaults.
+    
+    Args:
+        connection_string: SQLite connection string
+        profile: Engine settings (defaults to SQLITE_ENGINE_CONFIG)
+        
+    Returns:
+        Engine: The configured engine
+    """
+    if not _is_file_database(connection_string):
+        return create_engine(connection_string)
+    
+    profile = profile or SQLITE_ENGINE_CONFIG
+    engine = create_engine(
+        connection_string,
+        pool_size=profile["pool_size"],
+        max_overflow=profile["max_overflow"],
+        pool_timeout=profile["pool_timeout"],
+        connect_args={
+            "timeout": profile["busy_timeout_ms"] / 1000,
+            # Pooled connections are handed to whichever thread checks them out
+            "check_same_thread": False
+        }
+    )
+    
+    @event.listens_for(engine, "connect")
+    def set_profile_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={profile['journal_mode']}")
+        cursor.execute(f"PRAGMA synchronous={profile['synchronous']}")
+        cursor.execute(f"PRAGMA busy_timeout={int(profile['busy_timeout_ms'])}")
+        cursor.execute(f"PRAGMA mmap_size={int(profile['mmap_size'])}")
+        cursor.execute(f"PRAGMA cache_size=-{int(profile['cache_size_kib'])}")
+        cursor.execute(f"PRAGMA temp_store={profile['temp_store']}")
+        cursor.close()
+    
+    return engine
+
+def create_postgres_engine(connection_string: str, profile: Optional[Dict[str, Any]] = None) -> Engine:
+    """
+    Create a pooled PostgreSQL engine shared by the API server and workers of a process.
+    
+    Args:
+        connection_string: PostgreSQL connection string
+        profile: Engine settings (defaults to POSTGRES_ENGINE_CONFIG)
+        
+    Returns:
+        Engine: The configured engine
+    """
+    profile = profile or POSTGRES_ENGINE_CONFIG
+    return create_engine(
+        connection_string,
+        pool_size=profile["pool_size"],
+        max_overflow=profile["max_overflow"],
+        pool_timeout=profile["pool_timeout"],
+        pool_recycle=profile["pool_recycle"],
+        pool_pre_ping=profile["pool_pre_ping"],
+        connect_args={"options": f"-c statement_timeout={int(profile['statement_timeout_ms'])}"}
+    )
+
+def create_database_engine(connection_string: str) -> Engine:
+    """
+    Create the engine for a connection string with the profile of its backend.
     
+    Args:
+        connection_string: SQLite or PostgreSQL connection string
+        
     Returns:
-        str: SQLite connection string
+        Engine: The configured engine
     """
-    return f"sqlite:///{DB_DIR / DB_FILE}" 
\ No newline at end of file
+    if connection_string.startswith("postgresql"):
+        return create_postgres_engine(connection_string)
+    return create_sqlite_engine(connection_string)
@@ -0,0 +1,113 @@
+"""
+Request-scoped units of work.
+
+Every Database method opens its own session, so a request that calls several of them
+checks out a connection and commits a transaction per call. Inside a UnitOfWork the
+sessions of those calls are bound to one connection and join its transaction instead:
+their commits only flush, and everything is committed (or rolled back) once for the
+whole unit. The current unit of work is tracked in a context variable, so Database
+methods pick it up without changing their signatures, including when called through
+asyncio.to_thread (which copies the context).
+
+    with db.unit_of_work():
+        db.insert_donations(donations)
+        db.complete_idempotency_key(endpoint, key, body)
+"""
+
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from sqlalchemy.engine import Connection, Engine, RootTransaction
+from sqlalchemy.orm import Session
+
+from config.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+_current_unit_of_work: ContextVar[Optional["UnitOfWork"]] = ContextVar("unit_of_work", default=None)
+
+def get_current_unit_of_work() -> Optional["UnitOfWork"]:
+    """Get the unit of work of the current context, if any."""
+    return _current_unit_of_work.get()
+
+class UnitOfWork:
+    """One connection and transaction shared by the database calls of a request or job."""
+
+    def __init__(self, engine: Engine, commit_on_exit: bool = True):
+        """
+        Args:
+            engine: Engine the connection is checked out from
+            commit_on_exit: Commit when the with block exits without an exception; otherwise
+                only explicit commit() calls are committed and the rest is rolled back
+        """
+        self.engine = engine
+        self.commit_on_exit = commit_on_exit
+        self.sessions = 0
+        self.commits = 0
+        self._connection: Optional[Connection] = None
+        self._transaction: Optional[RootTransaction] = None
+        self._token: Optional[Token] = None
+
+    def session(self) -> Session:
+        """
+        Open a session that joins the unit's transaction.
+
+        The connection is only checked out on first use, so a unit of work opened before
+        slow non-database work does not hold a connection during it. The session's
+        commit() flushes without committing, and its rollback() rolls back the whole unit.
+        Sessions are meant to be used by one thread at a time.
+
+        Raises:
+            RuntimeError: If a session of this unit rolled it back
+        """
+        if self._transaction is not None and not self._transaction.is_active:
+            raise RuntimeError("Unit of work was rolled back after a failed database call")
+        if self._connection is None:
+            self._connection = self.engine.connect()
+        if self._transaction is None:
+            self._transaction = self._connection.begin()
+        self.sessions += 1
+        return Session(bind=self._connection, join_transaction_mode="rollback_only")
+
+    def commit(self) -> None:
+        """Commit the work done so far; later calls start a new transaction on the same connection."""
+        if self._transaction is not None:
+            transaction, self._transaction = self._transaction, None
+            try:
+                transaction.commit()
+            except Exception:
+                # Return the connection so whatever the failed commit left open is rolled back
+                self.close()
+                raise
+            self.commits += 1
+
+    def rollback(self) -> None:
+        """Roll back the work done since the last commit."""
+        if self._transaction is not None:
+            transaction, self._transaction = self._transaction, None
+            if transaction.is_active:
+                transaction.rollback()
+
+    def close(self) -> None:
+        """Roll back uncommitted work and return the connection to the pool."""
+        try:
+            self.rollback()
+        finally:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __enter__(self) -> "UnitOfWork":
+        if self._token is not None:
+            raise RuntimeError("Unit of work is already in use")
+        self._token = _current_unit_of_work.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is None and self.commit_on_exit:
+                self.commit()
+        finally:
+            _current_unit_of_work.reset(self._token)
+            self._token = None
+            self.close()
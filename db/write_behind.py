@@ -0,0 +1,168 @@
+"""
+Write-behind buffer with group commit.
+
+Every commit on SQLite is an fsync, so committing one row per call caps write throughput
+at a few hundred rows per second. The WriteBehindBuffer collects writes from concurrent
+callers and applies them in batched transactions from a background thread, flushing when
+a batch is full or the oldest write has waited long enough. Each caller gets a future
+that resolves only after the transaction containing its write has committed.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from config.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# Applies one write to the session it is given; must be safe to run again after a rollback
+WriteOperation = Callable[[Session], Any]
+
+class WriteBehindBuffer:
+    """Batches writes from concurrent callers into group commits."""
+
+    def __init__(self, session_factory: Callable[[], Session], max_batch_size: int = 500,
+                 max_delay_seconds: float = 0.01):
+        """
+        Args:
+            session_factory: Creates the sessions batches are written with
+            max_batch_size: Writes per transaction
+            max_delay_seconds: Maximum time a write waits for its batch to fill
+        """
+        self._session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.max_delay_seconds = max_delay_seconds
+        self._pending: List[Tuple[WriteOperation, Future]] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._batches = 0
+        self._writes = 0
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, operation: WriteOperation) -> Future:
+        """
+        Queue a write.
+
+        Args:
+            operation: Applies the write to a session
+
+        Returns:
+            Future resolved with the operation's return value once its batch has committed
+        """
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write-behind buffer is closed")
+            self._pending.append((operation, future))
+            self._condition.notify()
+        return future
+
+    def write(self, operation: WriteOperation) -> Any:
+        """
+        Queue a write and wait until it is durable.
+
+        This blocks the calling thread for up to max_delay_seconds; coroutines should
+        call it through asyncio.to_thread so the event loop keeps running.
+        """
+        return self.submit(operation).result()
+
+    def close(self) -> None:
+        """Flush the queued writes and stop the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get buffer metrics.
+
+        Returns:
+            Dictionary with pending, batches, writes and avg_batch_size
+        """
+        return {
+            "pending": len(self._pending),
+            "batches": self._batches,
+            "writes": self._writes,
+            "avg_batch_size": self._writes / self._batches if self._batches else 0.0
+        }
+
+    def _run(self) -> None:
+        """Collect and commit batches until closed and drained."""
+        try:
+            while True:
+                with self._condition:
+                    while not self._pending and not self._closed:
+                        self._condition.wait()
+                    if not self._pending:
+                        return
+                    # Give concurrent callers a moment to join the batch
+                    deadline = time.monotonic() + self.max_delay_seconds
+                    while len(self._pending) < self.max_batch_size and not self._closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    batch = self._pending[:self.max_batch_size]
+                    del self._pending[:self.max_batch_size]
+                self._commit(batch)
+        finally:
+            # If the thread dies, fail the queued writes instead of leaving their callers waiting
+            with self._condition:
+                self._closed = True
+                pending, self._pending = self._pending, []
+            self._fail(pending, RuntimeError("Write-behind buffer stopped"))
+
+    def _commit(self, batch: List[Tuple[WriteOperation, Future]]) -> None:
+        """Apply a batch, failing the writes left unresolved if an operation raises a BaseException."""
+        try:
+            self._commit_batch(batch)
+        finally:
+            self._fail(batch, RuntimeError("Write-behind batch was aborted"))
+
+    def _fail(self, writes: List[Tuple[WriteOperation, Future]], error: BaseException) -> None:
+        """Fail the futures of writes that have not been resolved yet."""
+        for _, future in writes:
+            if not future.done():
+                future.set_exception(error)
+
+    def _commit_batch(self, batch: List[Tuple[WriteOperation, Future]]) -> None:
+        """Apply a batch in one transaction, falling back to one transaction per write if it fails."""
+        session = self._session_factory()
+        try:
+            results = [operation(session) for operation, _ in batch]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"Group commit of {len(batch)} writes failed, retrying them one by one: {str(e)}")
+            results = None
+        finally:
+            session.close()
+
+        if results is not None:
+            self._batches += 1
+            self._writes += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            return
+
+        # Isolate the failing writes so the others still go through
+        for operation, future in batch:
+            session = self._session_factory()
+            try:
+                result = operation(session)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                future.set_exception(e)
+                continue
+            finally:
+                session.close()
+            self._batches += 1
+            self._writes += 1
+            future.set_result(result)
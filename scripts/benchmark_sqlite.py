@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent SQLite reads and writes with the default engine and with the
+production profile from db/sqlite_config.py.
+
+Writer processes insert donations one per transaction, like /donate does, while reader
+processes aggregate a cause's donations, like the cause progress queries. Each profile
+runs against a fresh temporary database and reports throughput and lock errors.
+
+Usage:
+    python scripts/benchmark_sqlite.py [--writers 4] [--readers 4] [--seconds 10]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# Add the project root directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.exc import OperationalError
+
+from db.database import Base, Donations, DonationStatus
+from db.sqlite_config import create_sqlite_engine
+
+PROFILES = {
+    "default": lambda url: create_engine(url),
+    "production": create_sqlite_engine
+}
+
+def _worker(profile: str, url: str, role: str, seconds: float, results) -> None:
+    """Run reads or writes until the time is up and report (role, operations, lock errors)."""
+    engine = PROFILES[profile](url)
+    operations = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            with engine.begin() as conn:
+                if role == "writer":
+                    conn.execute(insert(Donations).values(
+                        donation_id=str(uuid.uuid4()),
+                        customer_id="donor-1",
+                        cause_id="cause-1",
+                        amount=1,
+                        remaining_amount=1,
+                        currency="RLUSD",
+                        donation_date=datetime.utcnow(),
+                        status=DonationStatus.PENDING
+                    ))
+                else:
+                    conn.execute(
+                        select(func.count(), func.sum(Donations.remaining_amount))
+                        .where(Donations.cause_id == "cause-1")
+                    ).one()
+            operations += 1
+        except OperationalError:
+            # "database is locked"
+            errors += 1
+    engine.dispose()
+    results.put((role, operations, errors))
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float) -> dict:
+    """Run one profile against a fresh database and collect the totals."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    url = f"sqlite:///{path}"
+    try:
+        engine = PROFILES[profile](url)
+        Base.metadata.create_all(engine)
+        engine.dispose()
+
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_worker, args=(profile, url, role, seconds, results))
+            for role in ["writer"] * writers + ["reader"] * readers
+        ]
+        for process in processes:
+            process.start()
+        totals = {"writer": [0, 0], "reader": [0, 0]}
+        for _ in processes:
+            role, operations, errors = results.get()
+            totals[role][0] += operations
+            totals[role][1] += errors
+        for process in processes:
+            process.join()
+        return {
+            "writes_per_second": totals["writer"][0] / seconds,
+            "reads_per_second": totals["reader"][0] / seconds,
+            "lock_errors": totals["writer"][1] + totals["reader"][1]
+        }
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent SQLite reads and writes per engine profile")
+    parser.add_argument("--writers", type=int, default=4, help="Writer processes")
+    parser.add_argument("--readers", type=int, default=4, help="Reader processes")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration per profile")
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds}s per profile\n")
+    print(f"{'profile':<12}{'writes/s':>12}{'reads/s':>12}{'lock errors':>14}")
+    for profile in PROFILES:
+        result = run_profile(profile, args.writers, args.readers, args.seconds)
+        print(f"{profile:<12}{result['writes_per_second']:>12.0f}{result['reads_per_second']:>12.0f}"
+              f"{result['lock_errors']:>14}")
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,10 @@ source venv/bin/activate
 # Add project root to PYTHONPATH
 export PYTHONPATH=$PROJECT_ROOT:$PYTHONPATH
 
+# Migrate the database before starting; the application refuses an outdated schema
+echo "Migrating database..."
+python -m db.migrate upgrade
+
 # Start the API server
 echo "Starting API server..."
 python service/api_server.py
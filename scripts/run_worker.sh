@@ -23,6 +23,10 @@ fi
 echo "Activating virtual environment..."
 source venv/bin/activate
 
+# Migrate the database before starting; the application refuses an outdated schema
+echo "Migrating database..."
+python -m db.migrate upgrade
+
 # Start the worker
 echo "Starting Temporal worker..."
 python -m workflow.worker
@@ -1,16 +1,28 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
 from pydantic import BaseModel
 import uvicorn
-from blockchain.transaction import execute_payment
+import asyncio
+from blockchain.transaction import PaymentNotSubmitted, execute_payment, disbursement_executor, post_payment_worker
 from workflow.temporal_client import execute_disaster_workflow
 from blockchain.traces import get_all_consolidated_edges
-from typing import List, Optional
-from db.database import get_db, Customer, CustomerType, Donations, DonationStatus
+from typing import AsyncIterator, List, Optional
+from db.database import (
+    get_db, ActivityDirection, ActivityKind, Customer, CustomerType, CheckType, DonationStatus, TransactionStatus
+)
+from db.pagination import InvalidCursorError
+from db.sqlite_config import PAGINATION_CONFIG
+from db.unit_of_work import UnitOfWork
 from enum import Enum
 from blockchain.payment_edge import ConsolidatedPaymentEdge
-from blockchain.balance import get_formatted_balance
+from blockchain.balance import get_balances
+from blockchain.batch_payment import LegStatus, PaymentLeg, execute_batch_payment
+from blockchain.onboarding import onboard_customers
+from blockchain.signing import get_signing_service, shutdown_signing_service
+from blockchain.wallet import clear_wallet_cache
+from service.idempotency import RequestNotExecuted, run_idempotent
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from config.blockchain_config import BATCH_PAYMENT_CONFIG, POST_PAYMENT_CONFIG
 from config.logger_config import setup_logger
 from datetime import datetime
 import uuid
@@ -29,6 +41,44 @@ app = FastAPI(
     version="1.0.0"
 )
 
+@app.on_event("startup")
+async def startup():
+    """Start working off the payment outbox, including entries left by a previous run."""
+    post_payment_worker.ensure_started()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Release in-memory signing material and the signing pool when the server stops."""
+    await post_payment_worker.stop()
+    # Flush buffered writes before the process exits
+    get_db().disable_write_behind()
+    clear_wallet_cache()
+    shutdown_signing_service()
+
+@app.middleware("http")
+async def track_queries(request: Request, call_next):
+    """
+    Count and time the SQL statements of every request, aggregated by route in the "db"
+    section of /metrics (see db/instrumentation.py).
+    """
+    with get_db().track_queries() as stats:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        stats.label = f"{request.method} {route.path}" if route else None
+    return response
+
+async def get_unit_of_work() -> AsyncIterator[UnitOfWork]:
+    """
+    Request-scoped unit of work: the database calls of a request share one connection
+    and transaction (see db/unit_of_work.py).
+    
+    FastAPI tears dependencies down only after the response has been sent, so endpoints
+    that write commit the unit themselves before responding. Anything left uncommitted,
+    e.g. after an error, is rolled back.
+    """
+    with get_db().unit_of_work(commit_on_exit=False) as unit_of_work:
+        yield unit_of_work
+
 # ============================================================================
 # DATA MODELS
 # ============================================================================
@@ -73,6 +123,7 @@ class CustomerResponse(BaseModel):
 
 class CustomersResponse(BaseModel):
     customers: List[CustomerResponse]
+    next_cursor: Optional[str] = None  # Pass as cursor to get the next page, None on the last page
 
 class CreateCustomerRequest(BaseModel):
     customer_id: str
@@ -81,11 +132,45 @@ class CreateCustomerRequest(BaseModel):
     email_address: str
     wallet_address: str
 
+class CurrencyBalanceResponse(BaseModel):
+    currency: str
+    issuer: str
+    value: str
+    limit: str
+
+class OnboardCustomerRequest(BaseModel):
+    customer_id: str
+    customer_name: Optional[str] = None
+    email_address: Optional[str] = None
+    customer_type: str = "receiver"
+    wallet_seed: Optional[str] = None
+
+class BulkOnboardingRequest(BaseModel):
+    customers: List[OnboardCustomerRequest]
+    fund_wallets: bool = False
+    setup_trustline: bool = True
+
+class OnboardingRowResponse(BaseModel):
+    row: int
+    customer_id: Optional[str]
+    status: str
+    wallet_address: Optional[str] = None
+    trustline: Optional[str] = None
+    failed_stage: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkOnboardingResponse(BaseModel):
+    onboarded: int
+    resumed: int
+    failed: int
+    results: List[OnboardingRowResponse]
+
 class CustomerBalanceResponse(BaseModel):
     customer_id: str
     public_address: str
     balance: str
     sequence: int
+    currencies: List[CurrencyBalanceResponse] = []
 
 class CustomersBalanceResponse(BaseModel):
     customers: List[CustomerBalanceResponse]
@@ -115,6 +200,27 @@ class DisbursementInfo(BaseModel):
     customer_id: str
     original_amount: float
     amount: float
+    remaining_amount: Optional[float] = None
+
+class BatchPaymentRequest(BaseModel):
+    payments: List[PaymentRequest]
+
+class PaymentLegResponse(BaseModel):
+    index: int
+    sender_id: str
+    receiver_id: str
+    amount: float
+    currency: str
+    status: str
+    transaction_hash: Optional[str] = None
+    error: Optional[str] = None
+    disbursements: List[DisbursementInfo] = []
+
+class BatchPaymentResponse(BaseModel):
+    succeeded: int
+    failed: int
+    invalid: int
+    results: List[PaymentLegResponse]
 
 class PaymentResponse(BaseModel):
     success: bool
@@ -132,6 +238,111 @@ class DonationRequest(BaseModel):
     amount: float
     currency: str = "RLUSD"
 
+class BulkDonationRequest(BaseModel):
+    """Request model for bulk donation registration."""
+    donations: List[DonationRequest]
+
+class DonationRecordResponse(BaseModel):
+    """A registered donation."""
+    donation_id: str
+    customer_id: str
+    cause_id: str
+    amount: float
+    currency: str
+    donation_date: datetime
+    status: DonationStatus
+    remaining_amount: float
+
+class BulkDonationResponse(BaseModel):
+    """Response model for bulk donation registration."""
+    created: int
+    donations: List[DonationRecordResponse]
+
+class DonationsResponse(BaseModel):
+    """One page of donations."""
+    donations: List[DonationRecordResponse]
+    next_cursor: Optional[str] = None
+
+class TransactionRecordResponse(BaseModel):
+    """A transaction between customers."""
+    transaction_hash: str
+    sender_id: str
+    receiver_id: str
+    amount: float
+    currency: str
+    transaction_type: str
+    status: str
+    insertion_date: datetime
+
+class TransactionsResponse(BaseModel):
+    """One page of transactions."""
+    transactions: List[TransactionRecordResponse]
+    next_cursor: Optional[str] = None
+
+class CheckRecordResponse(BaseModel):
+    """A check between customers."""
+    check_id: str
+    transaction_hash: str
+    sender_id: str
+    receiver_id: str
+    amount: float
+    currency: str
+    expiration_date: datetime
+    insertion_date: datetime
+    check_type: str
+
+class ChecksResponse(BaseModel):
+    """One page of checks."""
+    checks: List[CheckRecordResponse]
+    next_cursor: Optional[str] = None
+
+class ActivityEntryResponse(BaseModel):
+    """A payment or check in a customer's activity feed."""
+    kind: ActivityKind
+    direction: ActivityDirection
+    reference_id: str  # Transaction hash of payments, check ID of checks
+    transaction_hash: str
+    counterparty_id: str
+    amount: float
+    currency: str
+    state: str  # Transaction status of payments, check type of checks
+    occurred_at: datetime
+    expires_at: Optional[datetime] = None
+
+class ActivityResponse(BaseModel):
+    """One page of a customer's activity feed."""
+    activity: List[ActivityEntryResponse]
+    next_cursor: Optional[str] = None
+
+class DisasterResponseRecordResponse(BaseModel):
+    """A stored disaster analysis."""
+    response_id: str
+    customer_id: str
+    beneficiary_id: str
+    location: str
+    disaster_type: str
+    severity: str
+    status: str
+    is_aid_required: bool
+    estimated_affected: int
+    required_aid_amount: float
+    aid_currency: str
+    evacuation_needed: bool
+    disaster_date: str
+    timestamp: datetime
+    confidence_score: str
+    is_valid: bool
+    reasoning: str
+    validation_reasoning: str
+    summarized_news: Optional[str] = None
+    news_link: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class DisasterResponsesResponse(BaseModel):
+    """One page of disaster analyses."""
+    disaster_responses: List[DisasterResponseRecordResponse]
+    next_cursor: Optional[str] = None
+
 class DonationResponse(BaseModel):
     """Response model for donation registration."""
     donation_id: str
@@ -141,6 +352,7 @@ class DonationResponse(BaseModel):
     currency: str
     donation_date: datetime
     status: DonationStatus
+    remaining_amount: Optional[float] = None
     success: bool
     message: str
 
@@ -185,7 +397,7 @@ async def analyze_disaster(request: DisasterRequest):
         # Handle any errors that occur during processing
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
-@app.get("/payment-trace/{customer_id}", response_model=List[ConsolidatedEdgeResponse])
+@app.get("/payment-trace/{customer_id}", response_model=List[ConsolidatedEdgeResponse], dependencies=[Depends(get_unit_of_work)])
 async def get_payment_trace(customer_id: str, max_depth: Optional[int] = 10):
     """
     Get all consolidated payment edges for a customer up to a specified depth.
@@ -201,13 +413,16 @@ async def get_payment_trace(customer_id: str, max_depth: Optional[int] = 10):
         # Get all consolidated edges
         edges = await get_all_consolidated_edges(customer_id, max_depth)
         
+        # Look up the customers of all senders and receivers in one query
+        customers = get_db().get_customers_by_wallet(
+            [edge.sender for edge in edges] + [edge.receiver for edge in edges]
+        )
+        
         # Convert edges to response format
         response = []
         for edge in edges:
-            # Get sender details
-            sender_details = get_db().get_customer_details_from_wallet(edge.sender)
-            # Get receiver details
-            receiver_details = get_db().get_customer_details_from_wallet(edge.receiver)
+            sender_details = customers.get(edge.sender)
+            receiver_details = customers.get(edge.receiver)
             
             response.append(ConsolidatedEdgeResponse(
                 sender=edge.sender,
@@ -234,10 +449,23 @@ async def get_payment_trace(customer_id: str, max_depth: Optional[int] = 10):
         raise HTTPException(status_code=500, detail=f"Error getting payment edges: {str(e)}")
 
 @app.get("/customers/balances", response_model=CustomersBalanceResponse)
-async def get_all_customers_balances():
+async def get_all_customers_balances(
+    currency: Optional[List[str]] = Query(None),
+    issuer: Optional[List[str]] = Query(None),
+    max_concurrency: Optional[int] = Query(None, ge=1, le=100),
+    refresh: bool = False
+):
     """
-    Get balances for all customers in the system.
+    Get XRP and trustline balances for all customers in the system.
     
+    Balances for all customers are fetched concurrently and served from a short-lived cache.
+    
+    Args:
+        currency: Trustline currencies to report (default: configured currencies, e.g. RLUSD)
+        issuer: Trustline issuers to report (default: configured issuers)
+        max_concurrency: Maximum number of accounts queried in parallel
+        refresh: Bypass the balance cache
+        
     Returns:
         List of all customers with their balances
         
@@ -245,87 +473,222 @@ async def get_all_customers_balances():
         HTTPException: If there's an error retrieving balances
     """
     try:
-        print("\nGetting all customers...")
         customers = get_db().get_all_customers()
-        print(f"Found {len(customers) if customers else 0} customers")
+        addresses = {customer.customer_id: customer.wallet_address for customer in customers if customer.wallet_address}
         
-        if not customers:
-            print("No customers found in database")
-            return CustomersBalanceResponse(customers=[])
-            
-        balances = []
-        for customer in customers:
-            print(f"\nProcessing customer: {customer.customer_id}")
-            print(f"Wallet address: {customer.wallet_address}")
-            
-            if not customer.wallet_address:
-                print(f"Warning: Customer {customer.customer_id} has no wallet address")
+        balances = await get_balances(
+            addresses.values(),
+            issuers=issuer,
+            currencies=currency,
+            max_concurrency=max_concurrency,
+            use_cache=not refresh
+        )
+        
+        response = []
+        for customer_id, address in addresses.items():
+            account_balances = balances.get(address)
+            if not account_balances:
+                logger.warning(f"Could not get balance info for customer {customer_id}")
                 continue
-                
-            balance_info = await get_formatted_balance(customer.wallet_address)
-            print(f"Balance info: {balance_info}")
-            
-            if balance_info:
-                balances.append(
-                    CustomerBalanceResponse(
-                        customer_id=customer.customer_id,
-                        public_address=balance_info['public_address'],
-                        balance=balance_info['balance'],
-                        sequence=balance_info['sequence']
-                    )
+            response.append(
+                CustomerBalanceResponse(
+                    customer_id=customer_id,
+                    public_address=address,
+                    balance=account_balances.xrp_drops,
+                    sequence=account_balances.sequence,
+                    currencies=[
+                        CurrencyBalanceResponse(
+                            currency=line.currency,
+                            issuer=line.issuer,
+                            value=line.value,
+                            limit=line.limit
+                        ) for line in account_balances.currencies
+                    ]
                 )
-                print(f"Added balance info for customer {customer.customer_id}")
-            else:
-                print(f"Warning: Could not get balance info for customer {customer.customer_id}")
-                
-        if not balances:
-            print("No balances found for any customers")
-            return CustomersBalanceResponse(customers=[])
-            
-        print(f"\nReturning balances for {len(balances)} customers")
-        return CustomersBalanceResponse(customers=balances)
+            )
+        return CustomersBalanceResponse(customers=response)
         
     except Exception as e:
-        print(f"\nError in get_all_customers_balances: {str(e)}")
-        print(f"Error type: {type(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.error(f"Error retrieving customer balances: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Error retrieving customer balances: {str(e)}"
         )
 
 
-@app.get("/customers", response_model=CustomersResponse)
-async def get_all_customers():
+PageLimit = Query(None, ge=1, le=PAGINATION_CONFIG["max_limit"],
+                  description=f"Rows per page (default {PAGINATION_CONFIG['default_limit']})")
+
+@app.get("/customers", response_model=CustomersResponse, dependencies=[Depends(get_unit_of_work)])
+async def get_all_customers(
+    customer_type: Optional[CustomerType] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = PageLimit
+):
     """
-    Get all customers in the system.
+    Get the customers in the system, one page at a time, by customer ID.
+    
+    Args:
+        customer_type: Only list customers of this type
+        cursor: next_cursor of the previous page, omitted for the first page
+        limit: Customers per page
     
     Returns:
-        List of all customers with their details
+        Page of customers with their details
         
     Raises:
-        HTTPException: If there's an error retrieving customers
+        HTTPException: 400 for an invalid cursor, 500 if there's an error retrieving customers
     """
     try:
-        customers = get_db().get_all_customers()
-        if not customers:
-            return CustomersResponse(customers=[])
-            
-        return CustomersResponse(
+        page = get_db().list_customers(customer_type.value if customer_type else None, cursor, limit)
+        # The rows are already typed, so skip a validation pass (FastAPI still validates the response)
+        return CustomersResponse.model_construct(
             customers=[
-                CustomerResponse(
+                CustomerResponse.model_construct(
                     customer_id=customer.customer_id,
                     email_address=customer.email_address,
                     wallet_address=customer.wallet_address
                 )
-                for customer in customers
-            ]
+                for customer in page.items
+            ],
+            next_cursor=page.next_cursor
         )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving customers: {str(e)}")
 
-@app.get("/customers/{customer_id}", response_model=CustomerResponse)
+@app.get("/donations", response_model=DonationsResponse)
+async def list_donations(
+    customer_id: Optional[str] = None,
+    cause_id: Optional[str] = None,
+    status: Optional[DonationStatus] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = PageLimit
+):
+    """
+    List donations, newest first, one page at a time.
+    
+    Args:
+        customer_id: Only list donations of this donor
+        cause_id: Only list donations to this cause
+        status: Only list donations with this status
+        cursor: next_cursor of the previous page, omitted for the first page
+        limit: Donations per page
+        
+    Returns:
+        Page of donations
+    """
+    try:
+        page = get_db().list_donations(customer_id, cause_id, status, cursor, limit)
+        return DonationsResponse(
+            donations=[DonationRecordResponse(**donation._asdict()) for donation in page.items],
+            next_cursor=page.next_cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving donations: {str(e)}")
+
+@app.get("/transactions", response_model=TransactionsResponse)
+async def list_transactions(
+    sender_id: Optional[str] = None,
+    receiver_id: Optional[str] = None,
+    currency: Optional[str] = None,
+    status: Optional[TransactionStatus] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = PageLimit
+):
+    """
+    List transactions, newest first, one page at a time.
+    
+    Args:
+        sender_id: Only list transactions sent by this customer
+        receiver_id: Only list transactions received by this customer
+        currency: Only list transactions in this currency
+        status: Only list transactions with this status
+        cursor: next_cursor of the previous page, omitted for the first page
+        limit: Transactions per page
+        
+    Returns:
+        Page of transactions
+    """
+    try:
+        page = get_db().list_transactions(sender_id, receiver_id, currency, status, cursor, limit)
+        return TransactionsResponse(
+            transactions=[TransactionRecordResponse(**transaction._asdict()) for transaction in page.items],
+            next_cursor=page.next_cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving transactions: {str(e)}")
+
+@app.get("/checks", response_model=ChecksResponse)
+async def list_checks(
+    sender_id: Optional[str] = None,
+    receiver_id: Optional[str] = None,
+    currency: Optional[str] = None,
+    check_type: Optional[CheckType] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = PageLimit
+):
+    """
+    List checks, newest first, one page at a time.
+    
+    Args:
+        sender_id: Only list checks written by this customer
+        receiver_id: Only list checks written to this customer
+        currency: Only list checks in this currency
+        check_type: Only list checks of this type (created or cashed)
+        cursor: next_cursor of the previous page, omitted for the first page
+        limit: Checks per page
+        
+    Returns:
+        Page of checks
+    """
+    try:
+        page = get_db().list_checks(sender_id, receiver_id, currency, check_type, cursor, limit)
+        return ChecksResponse(
+            checks=[CheckRecordResponse(**check._asdict()) for check in page.items],
+            next_cursor=page.next_cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving checks: {str(e)}")
+
+@app.get("/disaster-responses", response_model=DisasterResponsesResponse)
+async def list_disaster_responses(
+    customer_id: Optional[str] = None,
+    beneficiary_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = PageLimit
+):
+    """
+    List stored disaster analyses, most recent first, one page at a time.
+    
+    Args:
+        customer_id: Only list analyses for this customer
+        beneficiary_id: Only list analyses for this beneficiary
+        cursor: next_cursor of the previous page, omitted for the first page
+        limit: Analyses per page
+        
+    Returns:
+        Page of disaster analyses
+    """
+    try:
+        page = get_db().list_disaster_responses(customer_id, beneficiary_id, cursor, limit)
+        return DisasterResponsesResponse(
+            disaster_responses=[DisasterResponseRecordResponse(**response._asdict()) for response in page.items],
+            next_cursor=page.next_cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving disaster responses: {str(e)}")
+
+@app.get("/customers/{customer_id}", response_model=CustomerResponse, dependencies=[Depends(get_unit_of_work)])
 async def get_customer(customer_id: str):
     """
     Get customer details by ID.
@@ -362,6 +725,44 @@ async def get_customer(customer_id: str):
         print(f"Error retrieving customer: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving customer: {str(e)}")
 
+@app.get("/customers/{customer_id}/activity", response_model=ActivityResponse)
+async def get_customer_activity(
+    customer_id: str,
+    direction: Optional[ActivityDirection] = None,
+    kind: Optional[ActivityKind] = None,
+    currency: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = PageLimit
+):
+    """
+    Get a customer's payments and checks, sent and received, newest first, one page at a time.
+    
+    Args:
+        customer_id: The ID of the customer
+        direction: Only list entries the customer sent or received
+        kind: Only list payments or checks
+        currency: Only list entries in this currency
+        since: Only list entries from this time on
+        until: Only list entries before this time
+        cursor: next_cursor of the previous page, omitted for the first page
+        limit: Entries per page
+        
+    Returns:
+        Page of the customer's activity
+    """
+    try:
+        page = get_db().get_customer_activity(customer_id, direction, kind, currency, since, until, cursor, limit)
+        return ActivityResponse(
+            activity=[ActivityEntryResponse(**entry._asdict()) for entry in page.items],
+            next_cursor=page.next_cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving customer activity: {str(e)}")
+
 @app.post("/customer", response_model=CustomerResponse)
 async def create_customer(customer: CreateCustomerRequest):
     """
@@ -393,6 +794,38 @@ async def create_customer(customer: CreateCustomerRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating customer: {str(e)}")
 
+@app.post("/customers/bulk", response_model=BulkOnboardingResponse)
+async def bulk_onboard_customers(request: BulkOnboardingRequest):
+    """
+    Onboard many customers in one call.
+    
+    Wallet generation, database inserts and trustline setup run as concurrent stages.
+    Customers that already exist are resumed (only their trustline is checked), so a
+    failed or interrupted import can be re-submitted unchanged.
+    
+    Args:
+        request: Customer rows and onboarding options
+        
+    Returns:
+        Per-row outcomes and a summary of the run
+    """
+    try:
+        report = await onboard_customers(
+            [customer.model_dump() for customer in request.customers],
+            fund_wallets=request.fund_wallets,
+            setup_trustline=request.setup_trustline
+        )
+        counts = report.counts()
+        return BulkOnboardingResponse(
+            onboarded=counts["onboarded"],
+            resumed=counts["resumed"],
+            failed=counts["failed"],
+            results=[OnboardingRowResponse(**vars(result)) for result in report.results]
+        )
+    except Exception as e:
+        logger.error(f"Error onboarding customers: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error onboarding customers: {str(e)}")
+
 @app.get("/health")
 async def health_check():
     """
@@ -406,17 +839,115 @@ async def health_check():
     """
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Operational metrics of the API process.
+    
+    Returns:
+        dict: Metrics grouped by subsystem
+    """
+    return {
+        "signing": get_signing_service().metrics(),
+        "disbursement": disbursement_executor.metrics(),
+        "post_payment": post_payment_worker.metrics(),
+        "write_behind": get_db().write_behind.metrics() if get_db().write_behind else None,
+        "db": get_db().instrumentation.metrics()
+    }
+
 @app.post("/disburse", response_model=PaymentResponse)
-async def execute_payment_endpoint(payment_request: PaymentRequest):
+async def execute_payment_endpoint(
+    payment_request: PaymentRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     Execute a payment transaction between two customers.
     
+    Requests with an Idempotency-Key header execute at most once per key; retries
+    get the response of the first request.
+    
     Args:
         payment_request: Payment details including sender, receiver, currency, and amount
+        idempotency_key: Optional client-chosen key that makes retries safe
         
     Returns:
         PaymentResponse with success status, transaction details, and disbursement information
     """
+    # Only a payment that was never submitted releases its key for a retry
+    return await run_idempotent(
+        "/disburse", idempotency_key, payment_request, PaymentResponse,
+        lambda: _execute_payment(payment_request), release_on=(RequestNotExecuted,)
+    )
+
+@app.post("/disburse/batch", response_model=BatchPaymentResponse)
+async def execute_batch_payment_endpoint(
+    batch_request: BatchPaymentRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """
+    Execute many payments in one call.
+    
+    All legs are validated together, submitted concurrently and awaited together,
+    so the batch completes in about one ledger close. Each leg is then recorded and
+    its disbursement allocated like a single /disburse payment.
+    
+    Args:
+        batch_request: The payments to make
+        idempotency_key: Optional client-chosen key that makes retries safe
+        
+    Returns:
+        BatchPaymentResponse with the outcome of every leg in request order
+    """
+    if len(batch_request.payments) > BATCH_PAYMENT_CONFIG["max_legs"]:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A batch can contain at most {BATCH_PAYMENT_CONFIG['max_legs']} payments"
+        )
+    # Legs may have been submitted before an error, so a failed batch keeps its key
+    return await run_idempotent(
+        "/disburse/batch", idempotency_key, batch_request, BatchPaymentResponse,
+        lambda: _execute_batch_payment(batch_request), release_on=()
+    )
+
+async def _execute_batch_payment(batch_request: BatchPaymentRequest) -> BatchPaymentResponse:
+    """Execute a batch of payments (see execute_batch_payment_endpoint)."""
+    try:
+        results = await execute_batch_payment([
+            PaymentLeg(payment.sender_id, payment.receiver_id, payment.amount, payment.currency)
+            for payment in batch_request.payments
+        ])
+        return BatchPaymentResponse(
+            succeeded=sum(1 for result in results if result.status == LegStatus.SUCCEEDED),
+            failed=sum(1 for result in results if result.status == LegStatus.FAILED),
+            invalid=sum(1 for result in results if result.status == LegStatus.INVALID),
+            results=[
+                PaymentLegResponse(
+                    index=result.index,
+                    sender_id=result.sender_id,
+                    receiver_id=result.receiver_id,
+                    amount=result.amount,
+                    currency=result.currency,
+                    status=result.status.value,
+                    transaction_hash=result.transaction_hash,
+                    error=result.error,
+                    disbursements=[
+                        DisbursementInfo(
+                            donation_id=d['donation_id'],
+                            customer_id=d['customer_id'],
+                            original_amount=d['original_amount'],
+                            amount=d['amount'],
+                            remaining_amount=d.get('remaining_amount')
+                        ) for d in result.disbursements
+                    ]
+                ) for result in results
+            ]
+        )
+    except Exception as e:
+        logger.error(f"Error executing batch payment: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error executing batch payment: {str(e)}")
+
+async def _execute_payment(payment_request: PaymentRequest) -> PaymentResponse:
+    """Execute a payment (see execute_payment_endpoint)."""
     try:
         # Execute the payment
         success, transaction_hash, disbursements = await execute_payment(
@@ -427,16 +958,21 @@ async def execute_payment_endpoint(payment_request: PaymentRequest):
         )
         
         if success:
+            if POST_PAYMENT_CONFIG["mode"] == "inline":
+                message = "Payment executed successfully"
+            else:
+                message = "Payment executed successfully, disbursements are being allocated"
             return PaymentResponse(
                 success=True,
-                message="Payment executed successfully",
+                message=message,
                 transaction_hash=transaction_hash,
                 disbursements=[
                     DisbursementInfo(
                         donation_id=d['donation_id'],
                         customer_id=d['customer_id'],
                         original_amount=d['original_amount'],
-                        amount=d['amount']
+                        amount=d['amount'],
+                        remaining_amount=d.get('remaining_amount')
                     ) for d in disbursements
                 ]
             )
@@ -448,6 +984,12 @@ async def execute_payment_endpoint(payment_request: PaymentRequest):
                 disbursements=[]
             )
             
+    except PaymentNotSubmitted as e:
+        logger.error(f"Payment was not submitted: {str(e)}")
+        raise RequestNotExecuted(
+            status_code=500,
+            detail=f"Error executing payment: {str(e)}"
+        )
     except Exception as e:
         logger.error(f"Error executing payment: {str(e)}")
         raise HTTPException(
@@ -456,53 +998,100 @@ async def execute_payment_endpoint(payment_request: PaymentRequest):
         )
 
 @app.post("/donate", response_model=DonationResponse)
-async def register_donation(request: DonationRequest):
+async def register_donation(
+    request: DonationRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    unit_of_work: UnitOfWork = Depends(get_unit_of_work)
+):
     """
     Register a new donation in the database.
     
+    Requests with an Idempotency-Key header register at most one donation per key;
+    retries get the response of the first request.
+    
     Args:
         request: DonationRequest containing customer_id, cause_id, amount, and currency
+        idempotency_key: Optional client-chosen key that makes retries safe
+        unit_of_work: Commits the donation together with its stored response
         
     Returns:
         DonationResponse with complete donation details, success status, and message
     """
+    return await run_idempotent(
+        "/donate", idempotency_key, request, DonationResponse,
+        lambda: _register_donation(request),
+        on_complete=unit_of_work.commit
+    )
+
+async def _register_donation(request: DonationRequest) -> DonationResponse:
+    """Register a donation (see register_donation)."""
     try:
         # Get database instance
         db = get_db()
         
-        # Insert donation using the database function
-        donation_id = db.insert_donation(
-            customer_id=request.customer_id,
-            cause_id=request.cause_id,
-            amount=request.amount,
-            currency=request.currency
-        )
+        # The inserted row is returned as written, no need to read it back
+        donation = db.insert_donations([request.model_dump()])[0]
+        logger.info(f"Successfully registered donation {donation['donation_id']} for customer {request.customer_id} to cause {request.cause_id}")
         
-        # Get the complete donation object
-        session = db.Session()
-        try:
-            donation = session.query(Donations).filter_by(donation_id=donation_id).first()
-            if not donation:
-                raise HTTPException(status_code=500, detail="Donation not found after insertion")
-            
-            return DonationResponse(
-                donation_id=donation.donation_id,
-                customer_id=donation.customer_id,
-                cause_id=donation.cause_id,
-                amount=donation.amount,
-                currency=donation.currency,
-                donation_date=donation.donation_date,
-                status=donation.status,
-                success=True,
-                message="Donation registered successfully"
-            )
-        finally:
-            session.close()
+        return DonationResponse(
+            **donation,
+            success=True,
+            message="Donation registered successfully"
+        )
             
     except Exception as e:
         logger.error(f"Error in donation registration: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error registering donation: {str(e)}")
 
+@app.post("/donations/bulk", response_model=BulkDonationResponse)
+async def register_donations_bulk(
+    request: BulkDonationRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    unit_of_work: UnitOfWork = Depends(get_unit_of_work)
+):
+    """
+    Register many donations in one call.
+    
+    All donations are validated first and then inserted in a single transaction,
+    so either all of them are registered or none is.
+    
+    Args:
+        request: The donations to register
+        idempotency_key: Optional client-chosen key that makes retries safe
+        unit_of_work: Commits the donations together with their stored response
+        
+    Returns:
+        BulkDonationResponse with the registered donations in request order
+    """
+    invalid = [
+        index for index, donation in enumerate(request.donations)
+        if donation.amount <= 0 or not donation.customer_id or not donation.cause_id
+    ]
+    if invalid:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Donations need a customer, a cause and a positive amount (invalid rows: {invalid[:20]})"
+        )
+    return await run_idempotent(
+        "/donations/bulk", idempotency_key, request, BulkDonationResponse,
+        lambda: _register_donations(request),
+        on_complete=unit_of_work.commit
+    )
+
+async def _register_donations(request: BulkDonationRequest) -> BulkDonationResponse:
+    """Register donations in bulk (see register_donations_bulk)."""
+    try:
+        donations = await asyncio.to_thread(
+            get_db().insert_donations, [donation.model_dump() for donation in request.donations]
+        )
+        return BulkDonationResponse(
+            created=len(donations),
+            donations=[DonationRecordResponse(**donation) for donation in donations]
+        )
+    except Exception as e:
+        logger.error(f"Error in bulk donation registration: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error registering donations: {str(e)}")
+
 # ============================================================================
 # MAIN ENTRY POINT
 # ============================================================================
@@ -0,0 +1,155 @@
+"""
+Idempotency-Key handling for the API.
+
+A client that sends an Idempotency-Key header can retry a request as often as it likes:
+the first request with a key executes and its response is stored, later requests with
+the same key get the stored response back. Duplicates that arrive while the first request
+is still running wait for its result instead of executing again. Reusing a key with a
+different request body is rejected.
+
+A key is released for a retry only when its request failed with one of the errors the
+endpoint declares safe to retry (release_on); a request that was cancelled, or failed
+after it may have had an effect (e.g. a submitted payment), keeps its key in progress.
+Such a claim is taken over once it is older than IDEMPOTENCY_CONFIG["lease_seconds"],
+which also frees the keys of requests whose process crashed.
+
+Endpoints that write through a unit of work pass its commit as on_complete: it runs
+after the response is stored in the same unit and before duplicates get the response,
+so nobody sees a response whose effects are not committed. If the commit fails, neither
+the effects nor the stored response exist and the key is released.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from config.blockchain_config import IDEMPOTENCY_CONFIG
+from config.logger_config import setup_logger
+from db.database import Database, IdempotencyStatus, get_db
+
+logger = setup_logger(__name__)
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+# Requests with a claimed key running in this process, resolved with their response
+# (or None if they failed and released the key)
+_in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+class RequestNotExecuted(HTTPException):
+    """An HTTP error raised before the request had any effect, so it is safe to retry."""
+
+def hash_request(request: BaseModel) -> str:
+    """Hash a request body independently of field order."""
+    body = json.dumps(request.model_dump(mode="json"), sort_keys=True)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+async def run_idempotent(
+    endpoint: str,
+    idempotency_key: Optional[str],
+    request: BaseModel,
+    response_model: Type[ResponseT],
+    handler: Callable[[], Awaitable[ResponseT]],
+    database: Optional[Database] = None,
+    release_on: Tuple[Type[Exception], ...] = (Exception,),
+    on_complete: Optional[Callable[[], None]] = None
+) -> ResponseT:
+    """
+    Execute a request at most once per idempotency key.
+
+    Args:
+        endpoint: Endpoint the key is scoped to
+        idempotency_key: Value of the Idempotency-Key header (None executes the request normally)
+        request: The request body
+        response_model: Model of the response, used to restore stored responses
+        handler: Executes the request
+        database: Database storing the keys (defaults to the global database)
+        release_on: Errors of the handler after which the key is released for a retry;
+            only errors known to happen before the request had any effect belong here
+        on_complete: Commits the request's effects together with its stored response, e.g.
+            UnitOfWork.commit; called before the response is handed to anyone
+
+    Returns:
+        The response of the request that executed with this key
+
+    Raises:
+        HTTPException: 422 if the key was used with a different request, 409 if the
+            original request did not finish within IDEMPOTENCY_CONFIG["wait_timeout_seconds"]
+    """
+    if not idempotency_key:
+        response = await handler()
+        if on_complete is not None:
+            await asyncio.to_thread(on_complete)
+        return response
+
+    db = database or get_db()
+    request_hash = hash_request(request)
+    flight_key = (endpoint, idempotency_key)
+    deadline = time.monotonic() + IDEMPOTENCY_CONFIG["wait_timeout_seconds"]
+
+    while True:
+        existing = await asyncio.to_thread(db.claim_idempotency_key, endpoint, idempotency_key, request_hash,
+                                           IDEMPOTENCY_CONFIG["lease_seconds"])
+        if existing is None:
+            return await _execute(db, flight_key, response_model, handler, release_on, on_complete)
+
+        if existing['request_hash'] != request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        if existing['status'] == IdempotencyStatus.COMPLETED:
+            logger.info(f"Replaying stored response for {endpoint} Idempotency-Key {idempotency_key}")
+            return response_model.model_validate_json(existing['response_body'])
+
+        # The original request is still running: wait for it, then look again
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        in_flight = _in_flight.get(flight_key)
+        try:
+            if in_flight is not None:
+                response = await asyncio.wait_for(asyncio.shield(in_flight), remaining)
+                if response is not None:
+                    return response
+            else:
+                # Running in another process
+                await asyncio.sleep(min(IDEMPOTENCY_CONFIG["poll_interval_seconds"], remaining))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+
+async def _execute(db: Database, flight_key: Tuple[str, str], response_model: Type[ResponseT],
+                   handler: Callable[[], Awaitable[ResponseT]],
+                   release_on: Tuple[Type[Exception], ...],
+                   on_complete: Optional[Callable[[], None]]) -> ResponseT:
+    """Run the request for a claimed key and store its response, or release the key if it fails safely."""
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[flight_key] = future
+    try:
+        try:
+            response = await handler()
+        except release_on:
+            # Let the client retry a request that failed before it had any effect
+            await asyncio.to_thread(db.release_idempotency_key, *flight_key)
+            raise
+        except Exception:
+            # The request may have had an effect: keep the key in progress until its lease expires
+            logger.error(f"{flight_key[0]} request with Idempotency-Key {flight_key[1]} failed with an unknown outcome")
+            raise
+        body = response_model.model_validate(response).model_dump_json()
+        await asyncio.to_thread(db.complete_idempotency_key, *flight_key, body)
+        if on_complete is not None:
+            try:
+                await asyncio.to_thread(on_complete)
+            except Exception:
+                # Neither the effects nor the stored response were committed
+                await asyncio.to_thread(db.release_idempotency_key, *flight_key)
+                raise
+        future.set_result(response)
+        return response
+    finally:
+        if not future.done():
+            # Waiting duplicates claim the key again
+            future.set_result(None)
+        _in_flight.pop(flight_key, None)
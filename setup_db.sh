@@ -13,9 +13,9 @@ if [ ! -d "data" ]; then
     mkdir -p data
 fi
 
-# Initialize the database
-echo -e "${GREEN}Initializing database...${NC}"
-python3 -c "from db import init_db; from db.sqlite_config import get_connection_string; init_db(get_connection_string())"
+# Create or upgrade the schema to the latest revision
+echo -e "${GREEN}Migrating database...${NC}"
+python3 -m db.migrate upgrade
 
 # Check if initialization was successful
 if [ $? -ne 0 ]; then
@@ -1 +1,82 @@
-"""Test package for disaster monitoring system.""" 
\ No newline at end of file
+"""Test package for disaster monitoring system."""
+
+import os
+import tempfile
+import unittest
+from contextlib import contextmanager, suppress
+from datetime import datetime
+
+from db.database import CustomerType, Database
+
+def _remove_if_exists(path: str) -> None:
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+def temporary_database_file(test: unittest.TestCase) -> str:
+    """Create an empty SQLite database file that is removed, with its migration lock file, when the test finishes."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    test.addCleanup(os.remove, path)
+    test.addCleanup(_remove_if_exists, f"{path}.migrate.lock")
+    return path
+
+class TemporaryDatabaseMixin:
+    """Gives every test a throwaway file database in self.db (at self.db_path)."""
+
+    def setUp(self):
+        """Set up a throwaway database."""
+        super().setUp()
+        self.db_path = temporary_database_file(self)
+        self.db = Database(f"sqlite:///{self.db_path}", auto_upgrade=True)
+        self.addCleanup(self.db.engine.dispose)
+
+class DatabaseTestCase(TemporaryDatabaseMixin, unittest.TestCase):
+    """Test case with a throwaway database."""
+
+class AsyncDatabaseTestCase(TemporaryDatabaseMixin, unittest.IsolatedAsyncioTestCase):
+    """Async test case with a throwaway database."""
+
+class QueryBudgetMixin:
+    """Assertions on the number of statements a block of code runs."""
+
+    @contextmanager
+    def assertQueryBudget(self, db: Database, max_statements: int):
+        """Fail if the with block runs more than max_statements statements on db."""
+        with db.track_queries() as stats:
+            yield stats
+        self.assertLessEqual(stats.statements, max_statements,
+                             f"Ran {stats.statements} statements, budget is {max_statements}")
+
+def customer_row(customer_id: str, customer_type: CustomerType = CustomerType.SENDER, **overrides) -> dict:
+    """Customer fields for Database.add_customers."""
+    fields = dict(
+        customer_id=customer_id,
+        wallet_seed="seed",
+        customer_type=customer_type,
+        wallet_address=f"r{customer_id}",
+        email_address=f"{customer_id}@example.com"
+    )
+    fields.update(overrides)
+    return fields
+
+def response_fields(**overrides) -> dict:
+    """Disaster response fields for Database.upsert_disaster_response."""
+    fields = dict(
+        location="Valencia",
+        disaster_type="flood",
+        severity="high",
+        status="ongoing",
+        is_aid_required=True,
+        estimated_affected=1000,
+        required_aid_amount=5000.0,
+        aid_currency="RLUSD",
+        evacuation_needed=False,
+        disaster_date="2024-10-29",
+        timestamp=datetime(2024, 10, 30),
+        confidence_score="0.9",
+        is_valid=True,
+        reasoning="Reported flooding",
+        validation_reasoning="Confirmed by several sources"
+    )
+    fields.update(overrides)
+    return fields
@@ -0,0 +1,112 @@
+"""Tests for the single-query customer activity feed."""
+
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from db.database import (
+    ActivityDirection, ActivityKind, CheckType, CustomerType, TransactionStatus, TransactionType
+)
+from db.pagination import InvalidCursorError
+from service import api_server
+from tests import AsyncDatabaseTestCase, DatabaseTestCase
+
+class TestActivityFeed(DatabaseTestCase):
+    """Test cases for Database.get_customer_activity."""
+
+    def setUp(self):
+        """Set up a throwaway database with payments and checks in both directions."""
+        super().setUp()
+        self.db.add_customer("donor-1", "seed-1", CustomerType.SENDER, "rDonor", "donor@example.org")
+        self.db.add_customer("charity-1", "seed-2", CustomerType.RECEIVER, "rCharity", "charity@example.org")
+        for i in range(3):
+            self.db.insert_transaction(f"sent-{i}", "donor-1", "charity-1", 10 + i, "RLUSD" if i % 2 else "XRP",
+                                       TransactionType.PAYMENT, TransactionStatus.SUCCESS)
+            self.db.insert_transaction(f"received-{i}", "charity-1", "donor-1", 20 + i, "RLUSD",
+                                       TransactionType.PAYMENT, TransactionStatus.FAILED)
+            self.db.insert_check(f"check-sent-{i}", f"check-hash-{i}", "donor-1", "charity-1", 30 + i, "RLUSD",
+                                 int(datetime(2030, 1, 1).timestamp()), CheckType.CHECK_CREATE)
+            self.db.insert_check(f"check-received-{i}", f"check-hash-r{i}", "charity-1", "donor-1", 40 + i, "XRP",
+                                 int(datetime(2030, 1, 1).timestamp()), CheckType.CHECK_CASH)
+
+    def read_all(self, **filters):
+        """Follow next_cursor through all pages of donor-1's activity."""
+        pages, cursor = [], None
+        while True:
+            page = self.db.get_customer_activity("donor-1", cursor=cursor, **filters)
+            pages.append(page.items)
+            if page.next_cursor is None:
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages(self):
+        """Test that all entries are paged newest first, without gaps or repeats."""
+        pages = self.read_all(limit=5)
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        entries = [entry for page in pages for entry in page]
+        self.assertEqual(len({(entry.kind, entry.reference_id) for entry in entries}), 12)
+        self.assertEqual([entry.occurred_at for entry in entries],
+                         sorted((entry.occurred_at for entry in entries), reverse=True))
+
+        # The payment the customer received is seen from the customer's side
+        received, = [entry for entry in entries if entry.reference_id == "received-2"]
+        self.assertEqual((received.kind, received.direction, received.counterparty_id, received.amount,
+                          received.state, received.expires_at),
+                         (ActivityKind.PAYMENT, ActivityDirection.RECEIVED, "charity-1", Decimal("22"),
+                          TransactionStatus.FAILED.value, None))
+        check, = [entry for entry in entries if entry.reference_id == "check-sent-0"]
+        self.assertEqual((check.direction, check.transaction_hash, check.state, check.expires_at),
+                         (ActivityDirection.SENT, "check-hash-0", CheckType.CHECK_CREATE.value, datetime(2030, 1, 1)))
+
+    def test_filters(self):
+        """Test the direction, kind, currency and time filters."""
+        def entries(**filters):
+            return [entry for page in self.read_all(limit=2, **filters) for entry in page]
+
+        sent = entries(direction=ActivityDirection.SENT)
+        self.assertEqual(len(sent), 6)
+        self.assertTrue(all(entry.counterparty_id == "charity-1" for entry in sent))
+        checks = entries(kind=ActivityKind.CHECK, direction=ActivityDirection.RECEIVED)
+        self.assertEqual(sorted(entry.reference_id for entry in checks), [f"check-received-{i}" for i in range(3)])
+        self.assertEqual(len(entries(currency="XRP")), 5)
+
+        everything = entries()
+        middle = sorted(entry.occurred_at for entry in everything)[4]
+        self.assertEqual(len(entries(since=middle)), len([e for e in everything if e.occurred_at >= middle]))
+        self.assertEqual(len(entries(until=middle)), len([e for e in everything if e.occurred_at < middle]))
+        self.assertEqual(self.db.get_customer_activity("nobody").items, [])
+
+    def test_invalid_cursor(self):
+        """Test that cursors of other listings are rejected."""
+        cursor = self.db.list_transactions(limit=1).next_cursor
+        with self.assertRaises(InvalidCursorError):
+            self.db.get_customer_activity("donor-1", cursor=cursor)
+
+class TestActivityEndpoint(AsyncDatabaseTestCase):
+    """Test cases for GET /customers/{customer_id}/activity."""
+
+    def setUp(self):
+        """Set up a throwaway database with a few payments."""
+        super().setUp()
+        self.db.add_customer("donor-1", "seed-1", CustomerType.SENDER, "rDonor", "donor@example.org")
+        self.db.add_customer("charity-1", "seed-2", CustomerType.RECEIVER, "rCharity", "charity@example.org")
+        for i in range(3):
+            self.db.insert_transaction(f"hash-{i}", "donor-1", "charity-1", 10, "RLUSD",
+                                       TransactionType.PAYMENT, TransactionStatus.SUCCESS)
+
+    async def test_activity(self):
+        """Test that the endpoint returns a page and maps invalid cursors to 400."""
+        with patch.object(api_server, "get_db", return_value=self.db):
+            response = await api_server.get_customer_activity("donor-1", limit=2)
+            self.assertEqual([entry.reference_id for entry in response.activity], ["hash-2", "hash-1"])
+            self.assertEqual(response.activity[0].direction, ActivityDirection.SENT)
+            self.assertIsNotNone(response.next_cursor)
+            with self.assertRaises(HTTPException) as raised:
+                await api_server.get_customer_activity("donor-1", cursor="not a cursor", limit=2)
+        self.assertEqual(raised.exception.status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Tests for resumable batched backfills."""
+
+import unittest
+
+from sqlalchemy import func, select
+
+from db.backfill import BackfillRunner, update_backfill
+from db.database import BackfillCheckpoint, BackfillStatus, Customer
+from tests import DatabaseTestCase, customer_row
+
+class TestBackfill(DatabaseTestCase):
+    """Test cases for BackfillRunner."""
+
+    def setUp(self):
+        """Set up a throwaway database with unnamed customers."""
+        super().setUp()
+        self.db.add_customers([
+            customer_row(f"customer-{i:02d}") for i in range(25)
+        ])
+        self.backfill = update_backfill(
+            name="test_customer_names",
+            table="customers",
+            key="customer_id",
+            set_clause="customer_name = :prefix || customer_id",
+            where="customer_name IS NULL",
+            parameters={"prefix": "Customer "}
+        )
+
+    def unnamed(self):
+        with self.db.Session() as session:
+            return session.scalar(select(func.count()).where(Customer.customer_name.is_(None)))
+
+    def checkpoint(self):
+        with self.db.Session() as session:
+            return session.get(BackfillCheckpoint, "test_customer_names")
+
+    def test_runs_in_chunks(self):
+        """Test that every row is backfilled in chunk-sized transactions."""
+        progress = BackfillRunner(self.db.engine, chunk_size=10, throttle_seconds=0).run(self.backfill)
+
+        self.assertEqual((progress["rows"], progress["chunks"], progress["status"]), (25, 3, "COMPLETED"))
+        self.assertEqual(self.unnamed(), 0)
+        checkpoint = self.checkpoint()
+        self.assertEqual((checkpoint.rows_processed, checkpoint.chunks), (25, 3))
+        self.assertEqual(checkpoint.status, BackfillStatus.COMPLETED)
+
+    def test_resumes_from_checkpoint(self):
+        """Test that an interrupted backfill continues after its last committed chunk."""
+        runner = BackfillRunner(self.db.engine, chunk_size=10, throttle_seconds=0)
+        paused = runner.run(self.backfill, max_chunks=1)
+        self.assertEqual((paused["rows"], paused["status"]), (10, "RUNNING"))
+        self.assertEqual(self.checkpoint().last_key, '"customer-09"')
+        self.assertEqual(self.unnamed(), 15)
+
+        resumed = runner.run(self.backfill)
+        self.assertEqual(resumed["rows"], 15)
+        self.assertEqual(self.checkpoint().rows_processed, 25)
+        self.assertEqual(self.unnamed(), 0)
+
+        # A completed backfill does not run again
+        self.assertEqual(runner.run(self.backfill)["rows"], 0)
+
+    def test_failed_chunk_is_rolled_back(self):
+        """Test that a failing chunk leaves its rows and the checkpoint untouched."""
+        def apply(connection, keys):
+            self.backfill_apply(connection, keys)
+            if "customer-15" in keys:
+                raise RuntimeError("Chunk failed")
+        self.backfill_apply, self.backfill.apply = self.backfill.apply, apply
+
+        with self.assertRaises(RuntimeError):
+            BackfillRunner(self.db.engine, chunk_size=10, throttle_seconds=0).run(self.backfill)
+        self.assertEqual(self.unnamed(), 15)
+        self.assertEqual(self.checkpoint().last_key, '"customer-09"')
+
+    def test_dry_run(self):
+        """Test that a dry run counts the rows without writing anything."""
+        progress = BackfillRunner(self.db.engine, chunk_size=10, throttle_seconds=0, dry_run=True).run(self.backfill)
+
+        self.assertEqual((progress["rows"], progress["chunks"], progress["dry_run"]), (25, 3, True))
+        self.assertEqual(self.unnamed(), 25)
+        self.assertIsNone(self.checkpoint())
+
+if __name__ == "__main__":
+    unittest.main()
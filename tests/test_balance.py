@@ -0,0 +1,121 @@
+"""Tests for the multi-currency balance service."""
+
+import unittest
+from unittest.mock import patch
+
+from xrpl.models.requests import AccountInfo, AccountLines
+from xrpl.models.response import Response, ResponseStatus
+
+from blockchain import balance
+from config.blockchain_config import RLUSD_CURRENCY_HEX, RLUSD_ISSUER
+
+OTHER_ISSUER = "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"
+
+class FakeClient:
+    """Minimal async XRPL client returning canned account_info/account_lines results."""
+    
+    def __init__(self, accounts):
+        self.accounts = accounts
+        self.requests = []
+    
+    async def request(self, request):
+        self.requests.append(request)
+        account = self.accounts.get(request.account)
+        if account is None:
+            return Response(status=ResponseStatus.ERROR, result={"error": "actNotFound"})
+        if isinstance(request, AccountInfo):
+            return Response(status=ResponseStatus.SUCCESS, result={"account_data": account["account_data"]})
+        if isinstance(request, AccountLines):
+            pages = account["pages"]
+            index = int(request.marker or 0)
+            result = {"lines": pages[index]}
+            if index + 1 < len(pages):
+                result["marker"] = str(index + 1)
+            return Response(status=ResponseStatus.SUCCESS, result=result)
+        raise AssertionError(f"Unexpected request {request}")
+
+def trustline(currency, issuer, value, limit="1000000000"):
+    return {"account": issuer, "currency": currency, "balance": value, "limit": limit}
+
+class TestBalanceService(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the balance service."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        balance.clear_balance_cache()
+        self.client = FakeClient({
+            "rSender": {
+                "account_data": {"Balance": "99000000", "Sequence": 7},
+                "pages": [
+                    [trustline(RLUSD_CURRENCY_HEX, RLUSD_ISSUER, "125.5")],
+                    [trustline("USD", OTHER_ISSUER, "3"), trustline(RLUSD_CURRENCY_HEX, OTHER_ISSUER, "9")]
+                ]
+            },
+            "rReceiver": {
+                "account_data": {"Balance": "10000000", "Sequence": 3},
+                "pages": [[]]
+            }
+        })
+        patcher = patch.object(balance, "get_client", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_decode_currency_code(self):
+        """Test decoding of hex and standard currency codes."""
+        self.assertEqual(balance.decode_currency_code(RLUSD_CURRENCY_HEX), "RLUSD")
+        self.assertEqual(balance.decode_currency_code("USD"), "USD")
+    
+    async def test_filters_to_configured_issuers_and_currencies(self):
+        """Test that only configured trustlines are reported, across all pages."""
+        result = await balance.get_account_balances("rSender", client=self.client)
+        
+        self.assertEqual(result.xrp_drops, "99000000")
+        self.assertEqual(result.sequence, 7)
+        self.assertEqual(len(result.currencies), 1)
+        self.assertEqual(result.get("RLUSD").value, "125.5")
+        self.assertEqual(result.get("RLUSD").issuer, RLUSD_ISSUER)
+        
+        everything = await balance.get_account_balances(
+            "rSender", issuers=[RLUSD_ISSUER, OTHER_ISSUER], currencies=["RLUSD", "USD"], client=self.client
+        )
+        self.assertEqual(len(everything.currencies), 3)
+        self.assertEqual(everything.get("RLUSD", OTHER_ISSUER).value, "9")
+    
+    async def test_get_balances_skips_unknown_accounts_and_caches(self):
+        """Test bulk fetching, omission of failed accounts and caching."""
+        result = await balance.get_balances(["rSender", "rReceiver", "rMissing", "rSender"])
+        
+        self.assertEqual(set(result), {"rSender", "rReceiver"})
+        self.assertIsNone(result["rReceiver"].get("RLUSD"))
+        
+        requests_made = len(self.client.requests)
+        await balance.get_balances(["rSender", "rReceiver"])
+        self.assertEqual(len(self.client.requests), requests_made)
+        
+        await balance.get_balances(["rSender"], use_cache=False)
+        self.assertGreater(len(self.client.requests), requests_made)
+    
+    async def test_cache_is_keyed_by_address(self):
+        """Test that different issuer and currency filters are served from one entry per account."""
+        await balance.get_balances(["rSender"])
+        requests_made = len(self.client.requests)
+        
+        result = await balance.get_balances(["rSender"], issuers=[OTHER_ISSUER], currencies=["USD", "RLUSD"])
+        self.assertEqual(len(self.client.requests), requests_made)
+        self.assertEqual([(c.currency, c.value) for c in result["rSender"].currencies], [("USD", "3"), ("RLUSD", "9")])
+        self.assertEqual(len(balance._balance_cache), 1)
+    
+    def test_cache_is_bounded(self):
+        """Test that the least recently used and stale entries are dropped."""
+        cache = balance.BalanceCache(max_size=2, ttl_seconds=60)
+        for address in ("rA", "rB", "rC"):
+            cache.put(balance.AccountBalances(address=address, xrp_drops="1", sequence=1))
+        self.assertIsNone(cache.get("rA"))
+        self.assertEqual(len(cache), 2)
+        
+        with patch.object(balance.time, "monotonic", return_value=balance.time.monotonic() + 61):
+            self.assertIsNone(cache.get("rB"))
+        self.assertEqual(len(cache), 1)
+
+if __name__ == '__main__':
+    unittest.main()
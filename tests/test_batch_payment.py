@@ -0,0 +1,150 @@
+"""Tests for batch payments."""
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from xrpl.core.binarycodec import decode
+from xrpl.models.requests import SubmitOnly, Tx
+from xrpl.models.response import Response, ResponseStatus
+from xrpl.wallet import Wallet
+
+from blockchain import batch_payment
+from blockchain.batch_payment import LegStatus, PaymentLeg
+
+SENDERS = {name: Wallet.create() for name in ("sender-1", "sender-2")}
+RECEIVERS = {name: Wallet.create().classic_address for name in ("receiver-1", "receiver-2", "receiver-3")}
+
+class FakeClient:
+    """Minimal async XRPL client that accepts submissions and validates them on the first lookup."""
+    
+    def __init__(self, rejected_sequences=(), timed_out_sequences=(), validated_on_lookup=1):
+        self.rejected_sequences = set(rejected_sequences)
+        self.timed_out_sequences = set(timed_out_sequences)
+        self.validated_on_lookup = validated_on_lookup
+        self.validated_ledger = 110
+        self.lookups = 0
+        self.submitted = {}
+    
+    async def request(self, request):
+        if isinstance(request, SubmitOnly):
+            tx = decode(request.tx_blob)
+            key = (tx["Account"], tx["Sequence"])
+            if key in self.timed_out_sequences:
+                # Reached the ledger, but the response was lost
+                self.submitted[key] = tx
+                raise TimeoutError("submit timed out")
+            if key in self.rejected_sequences:
+                self.rejected_sequences.discard(key)
+                return Response(status=ResponseStatus.SUCCESS,
+                                result={"engine_result": "telINSUF_FEE_P", "engine_result_message": "Fee too low"})
+            self.submitted[key] = tx
+            return Response(status=ResponseStatus.SUCCESS, result={"engine_result": "tesSUCCESS"})
+        if isinstance(request, Tx):
+            self.lookups += 1
+            if self.lookups < self.validated_on_lookup:
+                # The payment is validated in the last ledger it may be in, right after this lookup
+                self.validated_ledger = 120
+                return Response(status=ResponseStatus.SUCCESS, result={"validated": False})
+            return Response(status=ResponseStatus.SUCCESS,
+                            result={"validated": True, "meta": {"TransactionResult": "tesSUCCESS"}})
+        raise AssertionError(f"Unexpected request {request}")
+
+async def fake_autofill(payment, client):
+    return payment.__class__.from_dict({**payment.to_dict(), "fee": "12", "last_ledger_sequence": 120})
+
+async def fake_sequence(address, client):
+    return 100
+
+async def fake_validated_ledger(client):
+    return client.validated_ledger
+
+class TestBatchPayment(unittest.IsolatedAsyncioTestCase):
+    """Test cases for execute_batch_payment."""
+    
+    async def run_batch(self, legs, client):
+        customers = {
+            customer_id: SimpleNamespace(wallet_address=address)
+            for customer_id, address in {**RECEIVERS, **{k: w.classic_address for k, w in SENDERS.items()}}.items()
+        }
+        self.recorded = []
+        
+        async def fake_record(transaction_hash, sender_id, receiver_id, amount, currency, post_payment=None):
+            self.recorded.append((sender_id, receiver_id, amount))
+            return []
+        
+        with patch.object(batch_payment, "get_client", return_value=client), \
+             patch.object(batch_payment, "db", SimpleNamespace(get_customers=lambda ids: {i: customers[i] for i in ids if i in customers})), \
+             patch.object(batch_payment, "get_customer_wallets", lambda ids: {i: SENDERS[i] for i in ids if i in SENDERS}), \
+             patch.object(batch_payment, "get_next_valid_seq_number", fake_sequence), \
+             patch.object(batch_payment, "get_latest_validated_ledger_sequence", fake_validated_ledger), \
+             patch.object(batch_payment, "autofill", fake_autofill), \
+             patch.object(batch_payment, "record_payment", fake_record), \
+             patch.dict(batch_payment.BATCH_PAYMENT_CONFIG, {"poll_interval_seconds": 0}):
+            return await batch_payment.execute_batch_payment(legs, signer=None)
+    
+    async def test_sequences_per_sender(self):
+        """Test that each sender's legs get consecutive sequences and invalid legs are skipped."""
+        client = FakeClient()
+        results = await self.run_batch([
+            PaymentLeg("sender-1", "receiver-1", 10),
+            PaymentLeg("sender-2", "receiver-2", 20),
+            PaymentLeg("sender-1", "receiver-3", 30),
+            PaymentLeg("sender-1", "unknown", 40),
+            PaymentLeg("sender-2", "receiver-1", 0),
+        ], client)
+        
+        self.assertEqual([r.status for r in results],
+                         [LegStatus.SUCCEEDED, LegStatus.SUCCEEDED, LegStatus.SUCCEEDED, LegStatus.INVALID, LegStatus.INVALID])
+        sender_1 = SENDERS["sender-1"].classic_address
+        self.assertEqual(client.submitted[(sender_1, 100)]["Destination"], RECEIVERS["receiver-1"])
+        self.assertEqual(client.submitted[(sender_1, 101)]["Destination"], RECEIVERS["receiver-3"])
+        self.assertIn((SENDERS["sender-2"].classic_address, 100), client.submitted)
+        self.assertEqual(len(client.submitted), 3)
+        self.assertEqual(sorted(self.recorded), [("sender-1", "receiver-1", 10), ("sender-1", "receiver-3", 30),
+                                                 ("sender-2", "receiver-2", 20)])
+        self.assertTrue(all(r.transaction_hash for r in results[:3]))
+    
+    async def test_rejected_leg_frees_its_sequence(self):
+        """Test that a leg rejected on submission does not leave a sequence gap."""
+        sender_1 = SENDERS["sender-1"].classic_address
+        client = FakeClient(rejected_sequences=[(sender_1, 100)])
+        results = await self.run_batch([
+            PaymentLeg("sender-1", "receiver-1", 10),
+            PaymentLeg("sender-1", "receiver-2", 20),
+        ], client)
+        
+        self.assertEqual(results[0].status, LegStatus.FAILED)
+        self.assertIn("telINSUF_FEE_P", results[0].error)
+        self.assertEqual(results[1].status, LegStatus.SUCCEEDED)
+        self.assertEqual(client.submitted[(sender_1, 100)]["Destination"], RECEIVERS["receiver-2"])
+
+    async def test_submit_error_is_confirmed_by_hash(self):
+        """Test that a leg whose submission raised is confirmed by hash and stops its sender's later legs."""
+        sender_1 = SENDERS["sender-1"].classic_address
+        client = FakeClient(timed_out_sequences=[(sender_1, 100)])
+        results = await self.run_batch([
+            PaymentLeg("sender-1", "receiver-1", 10),
+            PaymentLeg("sender-1", "receiver-2", 20),
+            PaymentLeg("sender-2", "receiver-3", 30),
+        ], client)
+        
+        self.assertEqual([r.status for r in results], [LegStatus.SUCCEEDED, LegStatus.FAILED, LegStatus.SUCCEEDED])
+        self.assertIsNotNone(results[0].transaction_hash)
+        self.assertIn("unknown outcome", results[1].error)
+        # The sequence of the leg with the unknown outcome was not reused
+        self.assertEqual(client.submitted[(sender_1, 100)]["Destination"], RECEIVERS["receiver-1"])
+        self.assertNotIn((sender_1, 101), client.submitted)
+        self.assertEqual(sorted(self.recorded), [("sender-1", "receiver-1", 10), ("sender-2", "receiver-3", 30)])
+
+    async def test_validated_in_last_ledger(self):
+        """Test that a leg validated in its last ledger between the lookup and the ledger read is recorded."""
+        client = FakeClient(validated_on_lookup=2)
+        results = await self.run_batch([PaymentLeg("sender-1", "receiver-1", 10)], client)
+        
+        self.assertEqual(results[0].status, LegStatus.SUCCEEDED)
+        self.assertEqual(client.lookups, 2)
+        self.assertEqual(self.recorded, [("sender-1", "receiver-1", 10)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Tests for atomic cause balance updates."""
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from db.database import Cause
+from tests import DatabaseTestCase
+
+class TestCauseBalance(DatabaseTestCase):
+    """Test cases for cause balance increments."""
+    
+    def setUp(self):
+        """Set up a throwaway database with two causes."""
+        super().setUp()
+        with self.db.Session() as session:
+            for cause_id in ("cause-1", "cause-2"):
+                session.add(Cause(
+                    cause_id=cause_id,
+                    name=cause_id,
+                    description="",
+                    imageUrl="",
+                    category="",
+                    goal=1000,
+                    balance=100
+                ))
+            session.commit()
+    
+    def cause(self, cause_id):
+        with self.db.Session() as session:
+            return session.get(Cause, cause_id)
+    
+    def test_concurrent_increments_are_not_lost(self):
+        """Test that increments from many threads all land."""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: self.db.increment_cause_balance("cause-1", 1.5), range(40)))
+        
+        cause = self.cause("cause-1")
+        self.assertEqual(float(cause.balance), 160.0)
+        self.assertEqual(cause.version, 40)
+    
+    def test_expected_version(self):
+        """Test that a stale version leaves the balance untouched."""
+        self.assertTrue(self.db.increment_cause_balance("cause-1", 10, expected_version=0))
+        self.assertFalse(self.db.increment_cause_balance("cause-1", 10, expected_version=0))
+        self.assertTrue(self.db.update_cause_balance("cause-1", 5, expected_version=1))
+        self.assertEqual(float(self.cause("cause-1").balance), 5.0)
+        self.assertFalse(self.db.increment_cause_balance("missing", 10))
+    
+    def test_batch_increment(self):
+        """Test that many causes are incremented in one call."""
+        updated = self.db.increment_cause_balances({"cause-1": 25, "cause-2": -40, "missing": 1})
+        
+        self.assertEqual(updated, 2)
+        self.assertEqual(float(self.cause("cause-1").balance), 125.0)
+        self.assertEqual(float(self.cause("cause-2").balance), 60.0)
+        self.assertEqual(self.cause("cause-2").version, 1)
+
+if __name__ == '__main__':
+    unittest.main()
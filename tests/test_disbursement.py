@@ -0,0 +1,141 @@
+"""Tests for FIFO disbursement allocation."""
+
+import asyncio
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from blockchain.disbursement import DisbursementExecutor
+from db.database import DisbursementsDonations, Donations, DonationStatus
+from tests import DatabaseTestCase
+
+class TestDisbursementAllocation(DatabaseTestCase):
+    """Test cases for Database.allocate_disbursement."""
+    
+    def setUp(self):
+        """Set up a throwaway database with pending donations."""
+        super().setUp()
+        start = datetime(2025, 1, 1)
+        with self.db.Session() as session:
+            # Inserted out of date order on purpose
+            for donor, amount, day in [("donor-3", 200, 3), ("donor-1", 500, 1), ("donor-2", 300, 2), ("donor-4", 100, 4)]:
+                session.add(Donations(
+                    donation_id=f"donation-{day}",
+                    customer_id=donor,
+                    cause_id="cause-1",
+                    amount=amount,
+                    currency="RLUSD",
+                    donation_date=start + timedelta(days=day),
+                    status=DonationStatus.PENDING
+                ))
+            session.add(Donations(
+                donation_id="other-cause",
+                customer_id="donor-1",
+                cause_id="cause-2",
+                amount=50,
+                currency="RLUSD",
+                donation_date=start,
+                status=DonationStatus.PENDING
+            ))
+            session.commit()
+    
+    def statuses(self):
+        with self.db.Session() as session:
+            return {d.donation_id: d.status for d in session.query(Donations)}
+    
+    def test_allocates_oldest_first_and_stops_when_used_up(self):
+        """Test FIFO order, partial fulfillment and early stop."""
+        disbursements = self.db.allocate_disbursement("cause-1", 650, "hash-1")
+        
+        self.assertEqual([d['donation_id'] for d in disbursements], ["donation-1", "donation-2"])
+        self.assertEqual([d['amount'] for d in disbursements], [500.0, 150.0])
+        self.assertEqual(disbursements[1]['original_amount'], 300.0)
+        
+        self.assertEqual(disbursements[1]['remaining_amount'], 150.0)
+        
+        statuses = self.statuses()
+        self.assertEqual(statuses["donation-1"], DonationStatus.COMPLETED)
+        self.assertEqual(statuses["donation-2"], DonationStatus.PARTIAL)
+        self.assertEqual(statuses["donation-3"], DonationStatus.PENDING)
+        self.assertEqual(statuses["other-cause"], DonationStatus.PENDING)
+        
+        with self.db.Session() as session:
+            rows = session.query(DisbursementsDonations).order_by(DisbursementsDonations.amount).all()
+        self.assertEqual([(r.donation_id, r.donor_id, r.amount) for r in rows],
+                         [("donation-2", "donor-2", 150.0), ("donation-1", "donor-1", 500.0)])
+        self.assertTrue(all(r.disbursement_id == "hash-1" and r.cause_id == "cause-1" for r in rows))
+    
+    def test_partial_donation_is_continued_before_pending_ones(self):
+        """Test that a later disbursement picks up where the last one stopped."""
+        self.db.allocate_disbursement("cause-1", 650, "hash-1")
+        disbursements = self.db.allocate_disbursement("cause-1", 250, "hash-2")
+        
+        self.assertEqual([(d['donation_id'], d['amount']) for d in disbursements],
+                         [("donation-2", 150.0), ("donation-3", 100.0)])
+        statuses = self.statuses()
+        self.assertEqual(statuses["donation-2"], DonationStatus.COMPLETED)
+        self.assertEqual(statuses["donation-3"], DonationStatus.PARTIAL)
+        
+        self.assertEqual(self.db.get_cause_progress("cause-1"),
+                         {'donated': 1100.0, 'disbursed': 900.0, 'outstanding': 200.0})
+        statement = {d['donation_id']: d for d in self.db.get_donor_statement("donor-3")}
+        self.assertEqual(statement["donation-3"]['disbursed'], 100.0)
+        self.assertEqual(statement["donation-3"]['remaining_amount'], 100.0)
+    
+    def test_no_pending_donations(self):
+        """Test that nothing is written when there is nothing to allocate."""
+        self.assertEqual(self.db.allocate_disbursement("cause-3", 100, "hash-1"), [])
+        with self.db.Session() as session:
+            self.assertEqual(session.query(DisbursementsDonations).count(), 0)
+
+class TestDisbursementExecutor(unittest.IsolatedAsyncioTestCase):
+    """Test cases for per-cause serialized allocation."""
+    
+    async def test_serializes_per_cause_and_runs_causes_in_parallel(self):
+        """Test that a cause never allocates twice at once while causes overlap."""
+        lock = threading.Lock()
+        running = {}
+        max_running = {}
+        overall = []
+        
+        def allocate(cause_id, amount, transaction_hash):
+            with lock:
+                running[cause_id] = running.get(cause_id, 0) + 1
+                max_running[cause_id] = max(max_running.get(cause_id, 0), running[cause_id])
+                overall.append(sum(running.values()))
+            time.sleep(0.05)
+            with lock:
+                running[cause_id] -= 1
+            return [{'transaction_hash': transaction_hash}]
+        
+        executor = DisbursementExecutor(allocate)
+        results = await asyncio.gather(*[
+            executor.submit(cause_id, 10, f"{cause_id}-{i}")
+            for i in range(3) for cause_id in ("cause-1", "cause-2")
+        ])
+        
+        self.assertEqual(max_running, {"cause-1": 1, "cause-2": 1})
+        self.assertEqual(max(overall), 2)
+        self.assertEqual(results[0], [{'transaction_hash': "cause-1-0"}])
+        self.assertEqual(executor.metrics(), {"active_causes": 0, "queued": 0, "processed": 6, "failed": 0})
+    
+    async def test_failure_is_raised_to_the_caller(self):
+        """Test that an allocation error reaches its caller and not the next one."""
+        def allocate(cause_id, amount, transaction_hash):
+            if transaction_hash == "bad":
+                raise ValueError("boom")
+            return []
+        
+        executor = DisbursementExecutor(allocate)
+        results = await asyncio.gather(
+            executor.submit("cause-1", 10, "bad"),
+            executor.submit("cause-1", 10, "good"),
+            return_exceptions=True
+        )
+        self.assertIsInstance(results[0], ValueError)
+        self.assertEqual(results[1], [])
+        self.assertEqual(executor.metrics()["failed"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Tests for bulk donation registration."""
+
+import unittest
+
+from db.database import Donations, DonationStatus
+from tests import DatabaseTestCase
+
+class TestInsertDonations(DatabaseTestCase):
+    """Test cases for Database.insert_donations."""
+    
+    def test_inserts_and_returns_rows(self):
+        """Test that all rows are written and returned in input order."""
+        donations = self.db.insert_donations([
+            {"customer_id": f"donor-{i}", "cause_id": "cause-1", "amount": i + 1}
+            for i in range(1000)
+        ])
+        
+        self.assertEqual(len(donations), 1000)
+        self.assertEqual(donations[5]['customer_id'], "donor-5")
+        self.assertEqual(donations[5]['remaining_amount'], 6)
+        self.assertEqual(donations[5]['currency'], "RLUSD")
+        self.assertEqual(donations[5]['status'], DonationStatus.PENDING)
+        with self.db.Session() as session:
+            stored = session.get(Donations, donations[5]['donation_id'])
+            self.assertEqual(stored.customer_id, "donor-5")
+            self.assertEqual(session.query(Donations).count(), 1000)
+    
+    def test_dates_follow_input_order(self):
+        """Test that donations are dated, and so allocated, in the order they were registered."""
+        first = self.db.insert_donations([
+            {"customer_id": f"donor-{i}", "cause_id": "cause-1", "amount": 10} for i in range(50)
+        ])
+        second = self.db.insert_donations([{"customer_id": "donor-50", "cause_id": "cause-1", "amount": 10}])
+        
+        dates = [donation['donation_date'] for donation in first + second]
+        self.assertEqual(len(set(dates)), 51)
+        self.assertEqual(dates, sorted(dates))
+        allocated = self.db.allocate_disbursement("cause-1", 25, "hash-1")
+        self.assertEqual([d['customer_id'] for d in allocated], ["donor-0", "donor-1", "donor-2"])
+    
+    def test_failure_inserts_nothing(self):
+        """Test that one bad row rolls back the whole batch."""
+        with self.assertRaises(Exception):
+            self.db.insert_donations([
+                {"customer_id": "donor-1", "cause_id": "cause-1", "amount": 10},
+                {"customer_id": None, "cause_id": "cause-1", "amount": 10}
+            ])
+        with self.db.Session() as session:
+            self.assertEqual(session.query(Donations).count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
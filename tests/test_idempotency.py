@@ -0,0 +1,144 @@
+"""Tests for Idempotency-Key handling."""
+
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from db.database import IdempotencyKey, IdempotencyStatus
+from blockchain.transaction import PaymentNotSubmitted
+from service import api_server
+from service.idempotency import run_idempotent
+from tests import AsyncDatabaseTestCase
+
+class EchoRequest(BaseModel):
+    value: int
+
+class EchoResponse(BaseModel):
+    value: int
+    calls: int
+
+class TestIdempotency(AsyncDatabaseTestCase):
+    """Test cases for run_idempotent."""
+    
+    def setUp(self):
+        """Set up a throwaway database."""
+        super().setUp()
+        self.calls = 0
+    
+    async def handler(self, request, fail=False):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if fail:
+            raise RuntimeError("boom")
+        return EchoResponse(value=request.value, calls=self.calls)
+    
+    def run_request(self, key, value=1, fail=False, release_on=(Exception,)):
+        request = EchoRequest(value=value)
+        return run_idempotent("/echo", key, request, EchoResponse,
+                              lambda: self.handler(request, fail), database=self.db, release_on=release_on)
+    
+    def age_claim(self, key, seconds):
+        with self.db.Session() as session:
+            session.get(IdempotencyKey, ("/echo", key)).created_at = datetime.utcnow() - timedelta(seconds=seconds)
+            session.commit()
+    
+    async def test_concurrent_duplicates_execute_once(self):
+        """Test that duplicates wait for and share the first response."""
+        responses = await asyncio.gather(*[self.run_request("key-1") for _ in range(5)])
+        
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(r == EchoResponse(value=1, calls=1) for r in responses))
+        # Replayed from the database later on
+        self.assertEqual(await self.run_request("key-1"), EchoResponse(value=1, calls=1))
+        self.assertEqual(self.calls, 1)
+    
+    async def test_key_reused_with_different_request(self):
+        """Test that a key cannot be reused for another request body."""
+        await self.run_request("key-1", value=1)
+        with self.assertRaises(HTTPException) as ctx:
+            await self.run_request("key-1", value=2)
+        self.assertEqual(ctx.exception.status_code, 422)
+    
+    async def test_failed_request_releases_key(self):
+        """Test that a request that raised can be retried with the same key."""
+        with self.assertRaises(RuntimeError):
+            await self.run_request("key-1", fail=True)
+        self.assertIsNone(self.db.get_idempotency_key("/echo", "key-1"))
+        
+        self.assertEqual(await self.run_request("key-1"), EchoResponse(value=1, calls=2))
+    
+    async def test_unsafe_failure_keeps_key(self):
+        """Test that an error not declared safe to retry leaves the key in progress."""
+        with self.assertRaises(RuntimeError):
+            await self.run_request("key-1", fail=True, release_on=(KeyError,))
+        self.assertEqual(self.db.get_idempotency_key("/echo", "key-1")["status"], IdempotencyStatus.IN_PROGRESS)
+    
+    async def test_cancelled_request_keeps_key(self):
+        """Test that a cancelled request, e.g. a client disconnect, does not release its key."""
+        task = asyncio.ensure_future(self.run_request("key-1"))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(self.db.get_idempotency_key("/echo", "key-1")["status"], IdempotencyStatus.IN_PROGRESS)
+    
+    def test_stale_claim_is_taken_over(self):
+        """Test that a claim older than the lease is taken over, by the same request only."""
+        self.assertIsNone(self.db.claim_idempotency_key("/echo", "key-1", "hash", lease_seconds=60))
+        self.assertIsNotNone(self.db.claim_idempotency_key("/echo", "key-1", "hash", lease_seconds=60))
+        
+        self.age_claim("key-1", 120)
+        self.assertEqual(self.db.claim_idempotency_key("/echo", "key-1", "other", lease_seconds=60)["request_hash"], "hash")
+        self.assertIsNotNone(self.db.claim_idempotency_key("/echo", "key-1", "hash"))
+        self.assertIsNone(self.db.claim_idempotency_key("/echo", "key-1", "hash", lease_seconds=60))
+        # The renewed claim is fresh again
+        self.assertIsNotNone(self.db.claim_idempotency_key("/echo", "key-1", "hash", lease_seconds=60))
+    
+    async def test_disburse_releases_key_only_before_submission(self):
+        """Test that /disburse keeps the key of a payment that may have been submitted."""
+        request = api_server.PaymentRequest(sender_id="sender-1", receiver_id="receiver-1", amount=1, currency="RLUSD")
+        with patch("service.idempotency.get_db", return_value=self.db):
+            for key, error in (("key-1", PaymentNotSubmitted("unknown customer")), ("key-2", TimeoutError("submit"))):
+                with patch.object(api_server, "execute_payment", AsyncMock(side_effect=error)):
+                    with self.assertRaises(HTTPException):
+                        await api_server.execute_payment_endpoint(request, idempotency_key=key)
+        
+        self.assertIsNone(self.db.get_idempotency_key("/disburse", "key-1"))
+        self.assertEqual(self.db.get_idempotency_key("/disburse", "key-2")["status"], IdempotencyStatus.IN_PROGRESS)
+    
+    async def run_in_unit_of_work(self, key, fail_commit=False):
+        request = EchoRequest(value=1)
+        with self.db.unit_of_work(commit_on_exit=False) as unit_of_work:
+            def commit():
+                if fail_commit:
+                    raise RuntimeError("commit failed")
+                unit_of_work.commit()
+            
+            return await run_idempotent("/echo", key, request, EchoResponse, lambda: self.handler(request),
+                                        database=self.db, on_complete=commit)
+    
+    async def test_failed_commit_releases_key(self):
+        """Test that a waiting duplicate does not get the response of a request whose commit failed."""
+        first = asyncio.ensure_future(self.run_in_unit_of_work("key-1", fail_commit=True))
+        await asyncio.sleep(0.01)
+        duplicate = asyncio.ensure_future(self.run_in_unit_of_work("key-1"))
+        
+        with self.assertRaises(RuntimeError):
+            await first
+        # The duplicate executed the request itself once the key was released
+        self.assertEqual(await duplicate, EchoResponse(value=1, calls=2))
+        self.assertEqual(self.db.get_idempotency_key("/echo", "key-1")["status"], IdempotencyStatus.COMPLETED)
+        self.assertEqual(await self.run_request("key-1"), EchoResponse(value=1, calls=2))
+    
+    async def test_without_key(self):
+        """Test that requests without a key always execute."""
+        await self.run_request(None)
+        await self.run_request(None)
+        self.assertEqual(self.calls, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Tests for the versioned schema migrations."""
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, text
+
+from db.database import Base, Database
+from db.migrate import (
+    ensure_schema, get_alembic_config, get_current_revision, get_head_revision, get_pending_backfills, run_backfills,
+    upgrade
+)
+from tests import temporary_database_file
+
+class TestMigrations(unittest.TestCase):
+    """Test cases for db.migrate and the Alembic revisions."""
+
+    def setUp(self):
+        """Set up an empty throwaway database."""
+        self.db_path = temporary_database_file(self)
+        self.engine = create_engine(f"sqlite:///{self.db_path}")
+        self.addCleanup(self.engine.dispose)
+
+    def test_migrated_schema_matches_models(self):
+        """Test that upgrading an empty database yields exactly the model schema."""
+        upgrade(self.engine)
+
+        with self.engine.connect() as connection:
+            self.assertEqual(get_current_revision(connection), get_head_revision())
+            self.assertEqual(compare_metadata(MigrationContext.configure(connection), Base.metadata), [])
+
+    def test_outdated_schema_without_auto_upgrade(self):
+        """Test that an unmigrated database is rejected when auto upgrade is off."""
+        with self.assertRaises(RuntimeError):
+            ensure_schema(self.engine, auto_upgrade=False)
+
+    def test_refused_by_default(self):
+        """Test that a Database on an unmigrated file fails instead of migrating it on start."""
+        with self.assertRaises(RuntimeError):
+            Database(f"sqlite:///{self.db_path}")
+
+    def test_concurrent_upgrades(self):
+        """Test that processes starting together on an empty database migrate it one at a time."""
+        engines = [create_engine(f"sqlite:///{self.db_path}") for _ in range(4)]
+        try:
+            with ThreadPoolExecutor(max_workers=len(engines)) as pool:
+                list(pool.map(lambda engine: ensure_schema(engine, auto_upgrade=True), engines))
+        finally:
+            for engine in engines:
+                engine.dispose()
+
+        with self.engine.connect() as connection:
+            self.assertEqual(get_current_revision(connection), get_head_revision())
+
+    def create_unversioned_database(self):
+        """Create a donations table from before versioning, with one donation."""
+        with self.engine.begin() as connection:
+            connection.execute(text("""
+                CREATE TABLE donations (
+                    donation_id VARCHAR(50) PRIMARY KEY, customer_id VARCHAR(50) NOT NULL,
+                    cause_id VARCHAR(50) NOT NULL, amount NUMERIC(20, 6) NOT NULL, currency VARCHAR NOT NULL,
+                    donation_date DATETIME NOT NULL, status VARCHAR(9) NOT NULL
+                )
+            """))
+            connection.execute(text("""
+                INSERT INTO donations VALUES ('donation-1', 'donor-1', 'cause-1', 100, 'RLUSD', '2025-01-01', 'PENDING')
+            """))
+        self.engine.dispose()
+
+    def test_adopts_unversioned_database(self):
+        """Test that a database created before versioning gets the missing columns and backfills."""
+        self.create_unversioned_database()
+
+        db = Database(f"sqlite:///{self.db_path}", auto_upgrade=True)
+        try:
+            donation = db.get_donor_statement("donor-1")[0]
+            self.assertEqual(donation['remaining_amount'], 100.0)
+            # Tables that did not exist yet are created
+            self.assertEqual(sum(db.get_outbox_counts().values()), 0)
+        finally:
+            db.engine.dispose()
+
+    def test_interrupted_backfill_blocks_start(self):
+        """Test that a backfill left RUNNING is refused, then resumed by an upgrade."""
+        self.create_unversioned_database()
+        with self.engine.begin() as connection:
+            command.upgrade(get_alembic_config(connection), "head")
+        with self.engine.connect() as connection:
+            # The process crashed between the schema upgrade and the backfills
+            self.assertIn("0001_donations_remaining_amount", get_pending_backfills(connection))
+        with self.assertRaisesRegex(RuntimeError, "0001_donations_remaining_amount"):
+            ensure_schema(self.engine, auto_upgrade=False)
+
+        run_backfills(self.engine, max_chunks=0)
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(text(
+                "SELECT status FROM backfill_checkpoints WHERE name = '0001_donations_remaining_amount'"
+            )).scalar(), "RUNNING")
+        with self.assertRaises(RuntimeError):
+            ensure_schema(self.engine, auto_upgrade=False)
+
+        upgrade(self.engine)
+        ensure_schema(self.engine, auto_upgrade=False)
+        with self.engine.connect() as connection:
+            self.assertEqual(get_pending_backfills(connection), [])
+            self.assertEqual(connection.execute(text("SELECT remaining_amount FROM donations")).scalar(), 100)
+
+if __name__ == "__main__":
+    unittest.main()
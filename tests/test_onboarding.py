@@ -0,0 +1,63 @@
+"""Tests for the bulk onboarding pipeline."""
+
+import unittest
+from unittest.mock import patch
+
+from blockchain import onboarding
+from db.database import CustomerType
+from tests import AsyncDatabaseTestCase
+
+class TestBulkOnboarding(AsyncDatabaseTestCase):
+    """Test cases for bulk customer onboarding without ledger access."""
+    
+    def setUp(self):
+        """Set up a throwaway database used by the pipeline."""
+        super().setUp()
+        patcher = patch.object(onboarding, "db", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    async def test_onboards_rows_and_reports_row_errors(self):
+        """Test local wallet generation, batched inserts and per-row validation errors."""
+        rows = [{"customer_id": f"beneficiary-{i}", "email_address": f"b{i}@example.com"} for i in range(7)]
+        rows.append({"customer_id": "beneficiary-0"})
+        rows.append({"customer_id": "bad-type", "customer_type": "donor"})
+        rows.append({"email_address": "missing-id@example.com"})
+        
+        report = await onboarding.onboard_customers(rows, insert_batch_size=3)
+        
+        self.assertEqual(report.counts(), {"onboarded": 7, "resumed": 0, "failed": 3})
+        self.assertEqual([result.row for result in report.results], list(range(10)))
+        self.assertEqual(report.results[7].failed_stage, "validate")
+        self.assertIn("customer_type", report.results[8].error)
+        
+        customers = self.db.get_customers([f"beneficiary-{i}" for i in range(7)])
+        self.assertEqual(len(customers), 7)
+        self.assertEqual(customers["beneficiary-3"].customer_type, CustomerType.RECEIVER)
+        self.assertEqual(customers["beneficiary-3"].wallet_address, report.results[3].wallet_address)
+    
+    async def test_rerun_resumes_existing_customers(self):
+        """Test that re-running an import only onboards the missing rows."""
+        await onboarding.onboard_customers([{"customer_id": "beneficiary-1"}])
+        first_address = self.db.get_customer("beneficiary-1").wallet_address
+        
+        report = await onboarding.onboard_customers([{"customer_id": "beneficiary-1"}, {"customer_id": "beneficiary-2"}])
+        
+        self.assertEqual([result.status for result in report.results], ["resumed", "onboarded"])
+        self.assertEqual(self.db.get_customer("beneficiary-1").wallet_address, first_address)
+    
+    async def test_failed_batch_falls_back_to_row_inserts(self):
+        """Test that one conflicting row does not fail the rest of its batch."""
+        rows = [{"customer_id": "beneficiary-1"}, {"customer_id": "beneficiary-2"}]
+        original = self.db.get_customers
+        # Hide the existing customer so the pipeline tries to insert it again
+        with patch.object(self.db, "get_customers", side_effect=lambda ids: {}):
+            await onboarding.onboard_customers(rows[:1])
+            report = await onboarding.onboard_customers(rows)
+        
+        self.assertEqual(report.results[0].failed_stage, "insert")
+        self.assertEqual(report.results[1].status, "onboarded")
+        self.assertIn("beneficiary-2", original(["beneficiary-2"]))
+
+if __name__ == '__main__':
+    unittest.main()
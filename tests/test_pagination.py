@@ -0,0 +1,145 @@
+"""Tests for keyset-paginated listings."""
+
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from sqlalchemy import insert
+
+from db.database import CheckType, CustomerType, Donations, DonationStatus
+from db.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from tests import DatabaseTestCase, customer_row, response_fields
+
+class TestPagination(DatabaseTestCase):
+    """Test cases for the Database.list_* methods."""
+
+    def read_all(self, listing, **filters):
+        """Follow next_cursor through all pages, returning the pages' items."""
+        pages, cursor = [], None
+        while True:
+            page = listing(cursor=cursor, **filters)
+            pages.append(page.items)
+            if page.next_cursor is None:
+                return pages
+            cursor = page.next_cursor
+
+    def test_customers(self):
+        """Test that customers are paged by customer ID, with filters applied."""
+        self.db.add_customers([
+            customer_row(f"customer-{i:02d}", CustomerType.SENDER if i % 2 else CustomerType.RECEIVER) for i in range(25)
+        ])
+
+        pages = self.read_all(self.db.list_customers, limit=10)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        ids = [customer.customer_id for page in pages for customer in page]
+        self.assertEqual(ids, [f"customer-{i:02d}" for i in range(25)])
+
+        senders = [customer for page in self.read_all(self.db.list_customers, customer_type=CustomerType.SENDER, limit=5)
+                   for customer in page]
+        self.assertEqual(len(senders), 12)
+        self.assertTrue(all(customer.customer_type == CustomerType.SENDER for customer in senders))
+
+    def test_donations_newest_first(self):
+        """Test that donations with equal dates are paged without gaps or repeats."""
+        # Rows sharing a donation_date, e.g. from several processes, are ordered by donation_id
+        first = [
+            {"donation_id": f"donation-{i:02d}", "customer_id": f"donor-{i % 3}", "cause_id": "cause-1", "amount": i + 1,
+             "remaining_amount": i + 1, "currency": "RLUSD", "donation_date": datetime(2025, 1, 1),
+             "status": DonationStatus.PENDING}
+            for i in range(20)
+        ]
+        with self.db.Session() as session:
+            session.execute(insert(Donations), first)
+            session.commit()
+        page = self.db.list_donations(limit=7)
+        later = self.db.insert_donations([{"customer_id": "donor-0", "cause_id": "cause-2", "amount": 5}])
+
+        seen = [donation.donation_id for donation in page.items]
+        cursor = page.next_cursor
+        while cursor:
+            next_page = self.db.list_donations(cursor=cursor, limit=7)
+            seen += [donation.donation_id for donation in next_page.items]
+            cursor = next_page.next_cursor
+        # Rows inserted after the first page do not shift the following pages
+        self.assertEqual(sorted(seen), sorted(donation['donation_id'] for donation in first))
+        self.assertEqual(len(seen), len(set(seen)))
+        # A fresh listing starts with the newest donation
+        self.assertEqual(self.db.list_donations(limit=1).items[0].donation_id, later[0]['donation_id'])
+
+        donor = [donation for page in self.read_all(self.db.list_donations, customer_id="donor-1", limit=3)
+                 for donation in page]
+        self.assertEqual(len(donor), 7)
+        self.assertEqual(self.db.list_donations(cause_id="cause-2").items[0].amount, 5)
+        self.assertEqual(len(self.db.list_donations(status=DonationStatus.PENDING, limit=1000).items), 21)
+
+    def test_transactions_checks_and_disaster_responses(self):
+        """Test the remaining listings and their filters."""
+        self.db.add_customer("donor-1", "seed-1", CustomerType.SENDER, "rDonor", "donor@example.org")
+        self.db.add_customer("charity-1", "seed-2", CustomerType.RECEIVER, "rCharity", "charity@example.org")
+        for i in range(5):
+            self.db.insert_transaction(f"hash-{i}", "donor-1", "charity-1", 10, "RLUSD" if i % 2 else "XRP",
+                                       "PAYMENT", "SUCCESS")
+            self.db.insert_check(f"check-{i}", f"check-hash-{i}", "donor-1", "charity-1", 10, "RLUSD",
+                                 int(datetime(2030, 1, 1).timestamp()), CheckType.CHECK_CREATE)
+
+        transactions = self.read_all(self.db.list_transactions, sender_id="donor-1", limit=2)
+        self.assertEqual([len(page) for page in transactions], [2, 2, 1])
+        self.assertEqual(len(self.db.list_transactions(receiver_id="charity-1", currency="RLUSD").items), 2)
+        self.assertEqual(self.db.list_transactions(sender_id="charity-1").items, [])
+
+        checks = [check for page in self.read_all(self.db.list_checks, receiver_id="charity-1", limit=2) for check in page]
+        self.assertEqual(sorted(check.check_id for check in checks), [f"check-{i}" for i in range(5)])
+        self.assertEqual(self.db.list_checks(check_type=CheckType.CHECK_CASH).items, [])
+
+        with patch("db.database.uuid.uuid4", side_effect=[f"response-{i}" for i in range(3)]):
+            for i in range(3):
+                self.db.upsert_disaster_response("charity-1", f"beneficiary-{i}",
+                                                 **response_fields(timestamp=datetime(2026, 10, 19, i)))
+        responses = self.read_all(self.db.list_disaster_responses, customer_id="charity-1", limit=2)
+        self.assertEqual([response.response_id for page in responses for response in page],
+                         ["response-2", "response-1", "response-0"])
+
+    def test_limits(self):
+        """Test that the page size defaults and is capped."""
+        self.db.insert_donations([{"customer_id": "donor-1", "cause_id": "cause-1", "amount": 1}] * 5)
+        with patch.dict("db.database.PAGINATION_CONFIG", {"default_limit": 2, "max_limit": 3}):
+            self.assertEqual(len(self.db.list_donations().items), 2)
+            self.assertEqual(len(self.db.list_donations(limit=100).items), 3)
+
+    def test_invalid_cursors(self):
+        """Test that malformed cursors and cursors of other listings are rejected."""
+        self.db.insert_donations([{"customer_id": "donor-1", "cause_id": "cause-1", "amount": 1}] * 2)
+        cursor = self.db.list_donations(limit=1).next_cursor
+
+        with self.assertRaises(InvalidCursorError):
+            self.db.list_customers(cursor=cursor)
+        with self.assertRaises(InvalidCursorError):
+            self.db.list_donations(cursor="not a cursor")
+        with self.assertRaises(InvalidCursorError):
+            self.db.list_donations(cursor=encode_cursor("donations:donation_date,donation_id", ["only one"]))
+
+    def test_cursor_value_types(self):
+        """Test that cursor values of the wrong type are rejected instead of reaching the query."""
+        scope = "donations:donation_date,donation_id"
+        date = {"datetime": "2026-10-19T12:00:00"}
+        cursors = [
+            encode_cursor(scope, [{"datetime": 5}, "donation-1"]),
+            encode_cursor(scope, ["2026-10-19", "donation-1"]),
+            encode_cursor(scope, [["2026-10-19"], "donation-1"]),
+            encode_cursor(scope, [date, 5]),
+            encode_cursor(scope, [date, None]),
+            encode_cursor("activity:occurred_at,branch,reference_id", [date, True, "hash"])
+        ]
+        for cursor in cursors[:-1]:
+            with self.assertRaises(InvalidCursorError):
+                self.db.list_donations(cursor=cursor)
+        with self.assertRaises(InvalidCursorError):
+            self.db.get_customer_activity("donor-1", cursor=cursors[-1])
+
+    def test_cursor_round_trip(self):
+        """Test that cursors keep the types of the sort key."""
+        values = [datetime(2026, 10, 19, 12, 30, 15, 250), "donation-1"]
+        self.assertEqual(decode_cursor(encode_cursor("scope", values), "scope"), values)
+
+if __name__ == "__main__":
+    unittest.main()
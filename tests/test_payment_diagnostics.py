@@ -0,0 +1,111 @@
+"""Tests for the payment path's diagnostics levels and metadata-derived balances."""
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from xrpl.models.requests import Tx
+from xrpl.models.response import Response, ResponseStatus
+from xrpl.wallet import Wallet
+
+from blockchain import transaction
+from blockchain.trace_utils import get_balances_from_metadata
+from blockchain.transaction import DiagnosticsLevel
+from config.blockchain_config import RLUSD_CURRENCY_HEX, RLUSD_ISSUER
+
+def rlusd(value):
+    return {"currency": RLUSD_CURRENCY_HEX, "issuer": "rrrrrrrrrrrrrrrrrrrrBZbvji", "value": value}
+
+def limit(account, value="1000000000"):
+    return {"currency": RLUSD_CURRENCY_HEX, "issuer": account, "value": value}
+
+# Metadata of a validated 10 RLUSD payment from rSender to rReceiver
+PAYMENT_META = {
+    "AffectedNodes": [
+        {"ModifiedNode": {
+            "LedgerEntryType": "AccountRoot",
+            "LedgerIndex": "A" * 64,
+            "FinalFields": {"Account": "rSender", "Balance": "99999988", "Flags": 0, "OwnerCount": 1, "Sequence": 8},
+            "PreviousFields": {"Balance": "100000000", "Sequence": 7}
+        }},
+        {"ModifiedNode": {
+            "LedgerEntryType": "RippleState",
+            "LedgerIndex": "B" * 64,
+            "FinalFields": {"Balance": rlusd("115.5"), "Flags": 131072,
+                            "HighLimit": limit(RLUSD_ISSUER, "0"), "LowLimit": limit("rSender")},
+            "PreviousFields": {"Balance": rlusd("125.5")}
+        }},
+        {"ModifiedNode": {
+            "LedgerEntryType": "RippleState",
+            "LedgerIndex": "C" * 64,
+            "FinalFields": {"Balance": rlusd("-10"), "Flags": 131072,
+                            "HighLimit": limit("rReceiver"), "LowLimit": limit(RLUSD_ISSUER, "0")},
+            "PreviousFields": {"Balance": rlusd("0")}
+        }}
+    ],
+    "TransactionIndex": 3,
+    "TransactionResult": "tesSUCCESS"
+}
+
+class TestBalancesFromMetadata(unittest.TestCase):
+    """Test cases for get_balances_from_metadata."""
+
+    def test_derives_before_and_after(self):
+        """Test that XRP and trustline balances are derived from the affected nodes."""
+        balances = get_balances_from_metadata(PAYMENT_META, ["rSender", "rReceiver"])
+
+        self.assertEqual(set(balances), {"rSender", "rReceiver"})
+        self.assertEqual(balances["rSender"], [
+            {"currency": "XRP", "issuer": None, "before": "100.000000", "after": "99.999988", "change": "-0.000012"},
+            {"currency": RLUSD_CURRENCY_HEX, "issuer": RLUSD_ISSUER, "before": "125.5", "after": "115.5", "change": "-10"}
+        ])
+        self.assertEqual(balances["rReceiver"], [
+            {"currency": RLUSD_CURRENCY_HEX, "issuer": RLUSD_ISSUER, "before": "0", "after": "10", "change": "10"}
+        ])
+
+    def test_all_accounts_by_default(self):
+        """Test that the issuer's side of the trustlines is reported when no accounts are given."""
+        self.assertIn(RLUSD_ISSUER, get_balances_from_metadata(PAYMENT_META))
+
+class TestDiagnosticsLevels(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the ledger round trips of create_wallet_transaction per diagnostics level."""
+
+    def setUp(self):
+        """Patch out the wallets, the ledger client and submission."""
+        self.client = MagicMock()
+        self.client.request = AsyncMock(return_value=Response(status=ResponseStatus.SUCCESS, result={"validated": True}))
+        self.balance = AsyncMock(return_value=100)
+        submitted = Response(status=ResponseStatus.SUCCESS,
+                             result={"hash": "HASH", "validated": True, "meta": PAYMENT_META})
+        sender, receiver = Wallet.create(), Wallet.create()
+        for patcher in (
+            patch.object(transaction, "client", self.client),
+            patch.object(transaction, "get_wallet_balance", self.balance),
+            patch.object(transaction, "get_wallet_pair", AsyncMock(return_value=(sender, receiver))),
+            patch.object(transaction, "submit_and_wait", AsyncMock(return_value=submitted)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.query = SimpleNamespace(customer_id="sender-1", beneficiary_id="receiver-1")
+
+    async def run_payment(self, diagnostics):
+        with patch.object(transaction, "log_metadata_balances") as log_metadata_balances:
+            result = await transaction.create_wallet_transaction(self.query, {}, diagnostics=diagnostics)
+        self.assertEqual(result["hash"], "HASH")
+        tx_lookups = [call for call in self.client.request.await_args_list if isinstance(call.args[0], Tx)]
+        return len(tx_lookups), self.balance.await_count, log_metadata_balances.call_count
+
+    async def test_off(self):
+        """Test that no diagnostics means no extra round trips."""
+        self.assertEqual(await self.run_payment(DiagnosticsLevel.OFF), (0, 0, 0))
+
+    async def test_metadata(self):
+        """Test that metadata diagnostics log balances without any ledger query."""
+        self.assertEqual(await self.run_payment(DiagnosticsLevel.METADATA), (0, 0, 1))
+
+    async def test_ledger(self):
+        """Test that the Tx lookup and balance queries only run in ledger mode."""
+        self.assertEqual(await self.run_payment(DiagnosticsLevel.LEDGER), (1, 4, 0))
+
+if __name__ == '__main__':
+    unittest.main()
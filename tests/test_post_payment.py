@@ -0,0 +1,93 @@
+"""Tests for the background post-payment pipeline."""
+
+import unittest
+from datetime import datetime
+
+from blockchain.disbursement import DisbursementExecutor
+from blockchain.post_payment import PostPaymentWorker
+from db.database import Cause, Donations, DonationStatus, OutboxStatus, PaymentOutbox
+from tests import AsyncDatabaseTestCase, customer_row
+
+class TestPostPaymentWorker(AsyncDatabaseTestCase):
+    """Test cases for PostPaymentWorker."""
+    
+    def setUp(self):
+        """Set up a throwaway database with a cause, customers and a donation."""
+        super().setUp()
+        self.db.add_customers([
+            customer_row(customer_id) for customer_id in ("sender-1", "receiver-1")
+        ])
+        with self.db.Session() as session:
+            session.add(Cause(cause_id="sender-1", name="", description="", imageUrl="", category="", goal=1000, balance=0))
+            session.add(Donations(donation_id="donation-1", customer_id="donor-1", cause_id="receiver-1", amount=100,
+                                  currency="RLUSD", donation_date=datetime(2025, 1, 1), status=DonationStatus.PENDING))
+            session.commit()
+        self.failures = 0
+        self.notified = []
+        self.worker = PostPaymentWorker(
+            DisbursementExecutor(self.db.allocate_disbursement),
+            database=self.db,
+            notifiers=[self.notifier],
+            config={"batch_size": 10, "poll_interval_seconds": 0.01, "lease_seconds": 60,
+                    "max_attempts": 2, "retry_backoff_seconds": 0}
+        )
+    
+    async def notifier(self, entry, disbursements):
+        self.notified.append([(d['donation_id'], d['amount']) for d in disbursements])
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("notification failed")
+    
+    def outbox(self):
+        with self.db.Session() as session:
+            return session.query(PaymentOutbox).one()
+    
+    def cause_balance(self):
+        with self.db.Session() as session:
+            return float(session.get(Cause, "sender-1").balance)
+    
+    async def test_process_now(self):
+        """Test that a recorded payment credits the cause and allocates donations."""
+        outbox_id = self.db.record_payment("hash-1", "sender-1", "receiver-1", 60, "RLUSD", lease_seconds=60)
+        # A worker poll does not claim the entry from the inline caller
+        self.assertEqual(await self.worker.process_due(), 0)
+        
+        disbursements = await self.worker.process_now(outbox_id)
+        
+        self.assertEqual([(d['donation_id'], d['amount']) for d in disbursements], [("donation-1", 60.0)])
+        self.assertEqual(self.cause_balance(), 60.0)
+        self.assertEqual(self.outbox().status, OutboxStatus.DONE)
+        self.assertEqual(self.db.get_outbox_counts()["DONE"], 1)
+    
+    async def test_retry_does_not_repeat_applied_steps(self):
+        """Test that a retried entry does not credit or allocate twice."""
+        self.failures = 1
+        self.db.record_payment("hash-1", "sender-1", "receiver-1", 60, "RLUSD")
+        
+        self.assertEqual(await self.worker.process_due(), 1)
+        entry = self.outbox()
+        self.assertEqual(entry.status, OutboxStatus.PENDING)
+        self.assertTrue(entry.balance_applied and entry.allocated)
+        self.assertIn("notification failed", entry.last_error)
+        
+        self.assertEqual(await self.worker.process_due(), 1)
+        self.assertEqual(self.outbox().status, OutboxStatus.DONE)
+        # The retried notification gets the records allocated by the first attempt
+        self.assertEqual(self.notified, [[("donation-1", 60.0)], [("donation-1", 60.0)]])
+        self.assertEqual(self.cause_balance(), 60.0)
+        self.assertEqual(self.db.get_cause_progress("receiver-1")['disbursed'], 60.0)
+    
+    async def test_gives_up_after_max_attempts(self):
+        """Test that an entry is marked failed once its attempts are used up."""
+        self.failures = 2
+        self.db.record_payment("hash-1", "sender-1", "receiver-1", 60, "RLUSD")
+        
+        await self.worker.process_due()
+        await self.worker.process_due()
+        
+        self.assertEqual(self.outbox().status, OutboxStatus.FAILED)
+        self.assertEqual(await self.worker.process_due(), 0)
+        self.assertEqual(self.worker.metrics()["failed"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Tests for query instrumentation and the statement budgets of the API endpoints."""
+
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import text
+
+from blockchain.payment_edge import ConsolidatedPaymentEdge
+from db.database import TransactionStatus, TransactionType
+from db.instrumentation import redact_parameters, redact_statement
+from service import api_server
+from tests import AsyncDatabaseTestCase, DatabaseTestCase, QueryBudgetMixin, customer_row
+
+class TestQueryInstrumentation(DatabaseTestCase):
+    """Test cases for Database.instrumentation."""
+
+    def test_tracked_blocks(self):
+        """Test that statements are counted for their block, its label and the process."""
+        before = self.db.instrumentation.metrics()["statements"]
+        for _ in range(2):
+            with self.db.track_queries("GET /customers") as stats:
+                self.db.list_customers()
+                self.db.get_customer_activity("donor-1")
+            self.assertEqual(stats.statements, 2)
+            self.assertGreater(stats.seconds, 0)
+        self.db.list_customers()
+
+        metrics = self.db.instrumentation.metrics()
+        self.assertEqual(metrics["statements"] - before, 5)
+        block = metrics["by_label"]["GET /customers"]
+        self.assertEqual((block["requests"], block["statements"], block["max_statements"], block["avg_statements"]),
+                         (2, 4, 2, 2.0))
+
+    def test_slow_statements_are_redacted(self):
+        """Test that slow statements are logged without their parameter values."""
+        self.db.instrumentation.slow_statement_ms = 0
+        with self.db.track_queries("GET /customers/{customer_id}") as stats:
+            self.db.get_customer_details_from_wallet("rSecretAddress")
+            with self.db.Session() as session:
+                session.execute(text("SELECT 'secret-literal'"))
+
+        self.assertEqual(len(stats.slow), 2)
+        logged = str(self.db.instrumentation.metrics()["slow_statements"])
+        self.assertNotIn("rSecretAddress", logged)
+        self.assertNotIn("secret-literal", logged)
+        self.assertIn("str", stats.slow[0].parameters)
+        self.assertEqual(stats.slow[0].label, "GET /customers/{customer_id}")
+
+    def test_failed_statements_are_counted(self):
+        """Test that statements raising an error are counted too."""
+        with self.db.track_queries() as stats:
+            with self.assertRaises(Exception):
+                with self.db.Session() as session:
+                    session.execute(text("SELECT * FROM no_such_table"))
+        self.assertEqual(stats.statements, 1)
+
+    def test_redaction(self):
+        """Test the redaction helpers."""
+        self.assertEqual(redact_statement("SELECT  *\nFROM t WHERE a = 'it''s' AND b = ?", 100),
+                         "SELECT * FROM t WHERE a = '?' AND b = ?")
+        self.assertEqual(redact_statement("SELECT 1", 3), "SEL...")
+        self.assertEqual(redact_parameters(("a", 1, None)), ["str", "int", "NoneType"])
+        self.assertEqual(redact_parameters({"key": datetime(2026, 1, 1)}), ["datetime"])
+
+class TestEndpointQueryBudgets(QueryBudgetMixin, AsyncDatabaseTestCase):
+    """Statement budgets of the read endpoints, which must not grow with the number of rows."""
+
+    def setUp(self):
+        """Set up a throwaway database with customers and payments between them."""
+        super().setUp()
+        self.db.add_customers([
+            customer_row(f"customer-{i}", wallet_address=f"r{i}", customer_name=f"Customer {i}") for i in range(10)
+        ])
+        for i in range(9):
+            self.db.insert_transaction(f"hash-{i}", "customer-0", f"customer-{i + 1}", 10, "RLUSD",
+                                       TransactionType.PAYMENT, TransactionStatus.SUCCESS)
+        patcher = patch.object(api_server, "get_db", return_value=self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def edge(self, sender: str, receiver: str) -> ConsolidatedPaymentEdge:
+        now = datetime(2026, 10, 19)
+        return ConsolidatedPaymentEdge(
+            sender=sender, receiver=receiver, currency="RLUSD", payment_type="Payment", amounts=["10"],
+            hashes=["hash"], fees=["0.00001"], timestamps=[now], total_amount="10",
+            first_transaction_timestamp=now, last_transaction_timestamp=now, total_transactions=1
+        )
+
+    async def test_payment_trace(self):
+        """Test that the customers of all trace edges are looked up in one query."""
+        edges = [self.edge(f"r{i}", f"r{i + 1}") for i in range(9)] + [self.edge("r9", "rUnknown")]
+        with patch.object(api_server, "get_all_consolidated_edges", AsyncMock(return_value=edges)):
+            with self.assertQueryBudget(self.db, 1):
+                response = await api_server.get_payment_trace("customer-0")
+        self.assertEqual([(edge.sender_id, edge.receiver_name) for edge in response[-2:]],
+                         [("customer-8", "Customer 9"), ("customer-9", "Unknown")])
+
+    async def test_listings(self):
+        """Test that a page of a listing is one query."""
+        with self.assertQueryBudget(self.db, 1):
+            await api_server.get_all_customers(None, None, 5)
+        with self.assertQueryBudget(self.db, 1):
+            await api_server.list_transactions(sender_id="customer-0", receiver_id=None, currency=None,
+                                               status=None, cursor=None, limit=5)
+        with self.assertQueryBudget(self.db, 1):
+            await api_server.get_customer_activity("customer-0", limit=5)
+
+if __name__ == "__main__":
+    unittest.main()
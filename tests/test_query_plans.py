@@ -0,0 +1,151 @@
+"""Query plan regression tests: hot queries must be served by an index, never a full scan."""
+
+import re
+import unittest
+from datetime import datetime
+
+from sqlalchemy import event, select
+
+from db.database import (
+    Base, Cause, CheckType, CustomerType, DisbursementsDonations, TransactionStatus, TransactionType
+)
+from tests import DatabaseTestCase, response_fields
+
+# "SCAN donations" or "SCAN donations USING INDEX ..." read every row of the table
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\w+)")
+
+class TestQueryPlans(DatabaseTestCase):
+    """Test cases for the plans of the hot lookup paths."""
+
+    def setUp(self):
+        """Set up a throwaway database and record every statement run against it."""
+        super().setUp()
+        self.db.add_customer("charity-1", "seed-1", CustomerType.RECEIVER, "rCharity", "charity@example.org")
+        self.db.add_customer("donor-1", "seed-2", CustomerType.SENDER, "rDonor", "donor@example.org")
+        with self.db.Session() as session:
+            session.add(Cause(cause_id="charity-1", name="Charity", description="", imageUrl="",
+                              category="", goal=1000, balance=0))
+            session.commit()
+        self.db.insert_donations([{
+            "customer_id": "donor-1", "cause_id": "charity-1", "amount": 100, "currency": "RLUSD"
+        }])
+        self.db.upsert_disaster_response("charity-1", "beneficiary-1", **response_fields())
+
+        self.statements = []
+        event.listen(self.db.engine, "before_cursor_execute", self.record)
+
+    def tearDown(self):
+        """Stop recording statements."""
+        event.remove(self.db.engine, "before_cursor_execute", self.record)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            self.statements.append((statement, parameters))
+
+    def assertNoFullScans(self):
+        """Explain every recorded statement and fail on any full table scan."""
+        self.assertTrue(self.statements, "No statements were recorded")
+        with self.db.engine.connect() as conn:
+            cursor = conn.connection.cursor()
+            for statement, parameters in self.statements:
+                plan = [row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                # Scans of subqueries (e.g. the branches of a UNION ALL) only read their own rows
+                scans = [detail for detail in plan
+                         if (scan := FULL_SCAN.match(detail)) and scan.group(1) in Base.metadata.tables]
+                self.assertFalse(scans, f"Full scan in plan {plan} of:\n{statement}")
+            cursor.close()
+
+    def test_wallet_lookups(self):
+        """Test that customers and causes are resolved by wallet address through an index."""
+        self.db.get_customer_details_from_wallet("rCharity")
+        self.db.get_cause_from_address("rCharity")
+        self.assertNoFullScans()
+
+    def test_customer_history(self):
+        """Test that a customer's transactions and checks are found through indexes."""
+        self.db.insert_transaction("hash-1", "donor-1", "charity-1", 10, "RLUSD",
+                                   TransactionType.PAYMENT, TransactionStatus.SUCCESS)
+        self.db.insert_check("check-1", "hash-2", "donor-1", "charity-1", 10, "RLUSD",
+                             int(datetime(2030, 1, 1).timestamp()), CheckType.CHECK_CREATE)
+        self.statements.clear()
+
+        self.db.get_customer_transactions("donor-1")
+        self.db.get_customer_checks("donor-1")
+        self.assertNoFullScans()
+
+    def test_donation_paths(self):
+        """Test that allocation, cause progress and donor statements use the donations indexes."""
+        self.db.allocate_disbursement("charity-1", 40, "hash-3")
+        self.db.get_cause_progress("charity-1")
+        self.db.get_donor_statement("donor-1")
+        self.assertNoFullScans()
+
+    def test_disaster_response_paths(self):
+        """Test that disaster response updates find their row through the unique index."""
+        self.db.upsert_news_link("charity-1", "beneficiary-1", "[]")
+        self.assertNoFullScans()
+
+    def test_listings(self):
+        """Test that following pages of the listings are index range scans."""
+        self.db.insert_donations([{
+            "customer_id": "donor-1", "cause_id": "charity-1", "amount": 50, "currency": "RLUSD"
+        }])
+        self.db.upsert_disaster_response("charity-1", "beneficiary-2", **response_fields())
+        for i in range(2):
+            self.db.insert_transaction(f"hash-{i}", "donor-1", "charity-1", 10, "RLUSD",
+                                       TransactionType.PAYMENT, TransactionStatus.SUCCESS)
+            self.db.insert_check(f"check-{i}", f"check-hash-{i}", "donor-1", "charity-1", 10, "RLUSD",
+                                 int(datetime(2030, 1, 1).timestamp()), CheckType.CHECK_CREATE)
+        listings = [
+            (self.db.list_customers, {}),
+            (self.db.list_donations, {}),
+            (self.db.list_donations, {"customer_id": "donor-1"}),
+            (self.db.list_donations, {"cause_id": "charity-1"}),
+            (self.db.list_transactions, {}),
+            (self.db.list_transactions, {"sender_id": "donor-1"}),
+            (self.db.list_transactions, {"receiver_id": "charity-1"}),
+            (self.db.list_checks, {}),
+            (self.db.list_checks, {"sender_id": "donor-1"}),
+            (self.db.list_checks, {"receiver_id": "charity-1"}),
+            (self.db.list_disaster_responses, {}),
+        ]
+        for listing, filters in listings:
+            cursor = listing(limit=1, **filters).next_cursor
+            self.assertIsNotNone(cursor)
+            self.statements.clear()
+            listing(cursor=cursor, limit=1, **filters)
+            self.assertNoFullScans()
+            with self.db.engine.connect() as conn:
+                statement, parameters = self.statements[-1]
+                plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan, f"{listing.__name__}({filters}) sorts its rows")
+
+    def test_customer_activity(self):
+        """Test that every branch of the activity feed is an index range scan."""
+        for i in range(2):
+            self.db.insert_transaction(f"hash-{i}", "donor-1", "charity-1", 10, "RLUSD",
+                                       TransactionType.PAYMENT, TransactionStatus.SUCCESS)
+            self.db.insert_check(f"check-{i}", f"check-hash-{i}", "charity-1", "donor-1", 10, "RLUSD",
+                                 int(datetime(2030, 1, 1).timestamp()), CheckType.CHECK_CREATE)
+        cursor = self.db.get_customer_activity("donor-1", limit=1).next_cursor
+        self.statements.clear()
+
+        self.db.get_customer_activity("donor-1", cursor=cursor, limit=1)
+        self.assertEqual(len(self.statements), 1)
+        self.assertNoFullScans()
+        with self.db.engine.connect() as conn:
+            statement, parameters = self.statements[-1]
+            plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        searches = [detail for detail in plan if detail.startswith("SEARCH")]
+        self.assertEqual(len(searches), 4, plan)
+        self.assertTrue(all(re.search(r"_(sender|receiver)_date", detail) for detail in searches), plan)
+
+    def test_disbursement_history(self):
+        """Test that disbursements are found by donation and by donor through indexes."""
+        with self.db.Session() as session:
+            session.execute(select(DisbursementsDonations).where(DisbursementsDonations.donation_id == "donation-1")).all()
+            session.execute(select(DisbursementsDonations).where(DisbursementsDonations.donor_id == "donor-1")).all()
+        self.assertNoFullScans()
+
+if __name__ == "__main__":
+    unittest.main()
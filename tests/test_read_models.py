@@ -0,0 +1,52 @@
+"""Tests for the column-only read models returned by list queries."""
+
+import unittest
+from datetime import datetime
+from decimal import Decimal
+
+from db.database import (
+    CheckRecord, CheckType, CustomerSummary, CustomerType, TransactionRecord,
+    TransactionStatus, TransactionType
+)
+from tests import DatabaseTestCase
+
+class TestReadModels(DatabaseTestCase):
+    """Test cases for get_all_customers, get_customer_transactions and get_customer_checks."""
+
+    def setUp(self):
+        """Set up a throwaway database with two customers, a payment and a check."""
+        super().setUp()
+        self.db.add_customer("charity-1", "seed-1", CustomerType.RECEIVER, "rCharity", "charity@example.org")
+        self.db.add_customer("donor-1", "seed-2", CustomerType.SENDER, "rDonor", "donor@example.org", "Donor")
+        self.db.insert_transaction("hash-1", "donor-1", "charity-1", 10.5, "RLUSD",
+                                   TransactionType.PAYMENT, TransactionStatus.SUCCESS)
+        self.db.insert_check("check-1", "hash-2", "charity-1", "donor-1", 3, "RLUSD",
+                             int(datetime(2030, 1, 1).timestamp()), CheckType.CHECK_CREATE)
+
+    def test_customers(self):
+        """Test that customers are listed without their wallet seeds."""
+        customers = {customer.customer_id: customer for customer in self.db.get_all_customers()}
+
+        self.assertEqual(customers["donor-1"], CustomerSummary(
+            "donor-1", "Donor", CustomerType.SENDER, "rDonor", "donor@example.org"
+        ))
+        self.assertNotIn("wallet_seed", CustomerSummary._fields)
+        wallets = {wallet.customer_id: wallet.wallet_seed for wallet in self.db.get_customer_wallets()}
+        self.assertEqual(wallets, {"charity-1": "seed-1", "donor-1": "seed-2"})
+
+    def test_transactions_and_checks(self):
+        """Test that sent and received payments and checks are returned as typed records."""
+        transaction, = self.db.get_customer_transactions("charity-1")
+        self.assertIsInstance(transaction, TransactionRecord)
+        self.assertEqual((transaction.sender_id, transaction.amount, transaction.status),
+                         ("donor-1", Decimal("10.5"), TransactionStatus.SUCCESS))
+        self.assertEqual(self.db.get_customer_transactions("donor-1"), [transaction])
+
+        check, = self.db.get_customer_checks("donor-1")
+        self.assertIsInstance(check, CheckRecord)
+        self.assertEqual((check.check_id, check.receiver_id, check.check_type),
+                         ("check-1", "donor-1", CheckType.CHECK_CREATE))
+        self.assertEqual(check.expiration_date, datetime(2030, 1, 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Tests for the process-pool signing service."""
+
+import unittest
+
+from xrpl.core.binarycodec import decode
+from xrpl.models.transactions import Payment
+from xrpl.wallet import Wallet
+
+from blockchain.signing import SigningService
+
+DESTINATION = "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"
+
+class TestSigningService(unittest.IsolatedAsyncioTestCase):
+    """Test cases for SigningService."""
+    
+    async def asyncSetUp(self):
+        """Set up a two-process signing service."""
+        self.service = SigningService(max_workers=2)
+        self.wallet = Wallet.create()
+    
+    async def asyncTearDown(self):
+        """Stop the signing pool."""
+        self.service.shutdown()
+    
+    def payment(self, sequence):
+        return Payment(
+            account=self.wallet.classic_address,
+            destination=DESTINATION,
+            amount="1000",
+            sequence=sequence,
+            fee="12",
+            last_ledger_sequence=1000
+        )
+    
+    async def test_signs_in_pool(self):
+        """Test that the pool returns a valid signed blob."""
+        signed = await self.service.sign(self.payment(1), self.wallet)
+        decoded = decode(signed.tx_blob)
+        
+        self.assertEqual(decoded["Account"], self.wallet.classic_address)
+        self.assertEqual(decoded["SigningPubKey"], self.wallet.public_key)
+        self.assertIn("TxnSignature", decoded)
+        self.assertEqual(len(signed.hash), 64)
+    
+    async def test_sign_many_and_metrics(self):
+        """Test batch signing and throughput metrics."""
+        signed = await self.service.sign_many([(self.payment(sequence), self.wallet) for sequence in range(1, 11)])
+        
+        self.assertEqual([decode(tx.tx_blob)["Sequence"] for tx in signed], list(range(1, 11)))
+        self.assertEqual(len({tx.hash for tx in signed}), 10)
+        metrics = self.service.metrics()
+        self.assertEqual(metrics["signed"], 10)
+        self.assertEqual(metrics["failed"], 0)
+        self.assertTrue(metrics["pool_started"])
+        self.assertGreater(metrics["throughput_per_second"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Tests for bulk trustline provisioning."""
+
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from xrpl.models.requests import AccountLines
+from xrpl.models.response import Response, ResponseStatus
+from xrpl.wallet import Wallet
+
+from blockchain import setup_rlusd_trustline as trustlines
+from blockchain.setup_rlusd_trustline import TrustlineStatus, required_trustset, text_to_hex
+from config.blockchain_config import RLUSD_CURRENCY_HEX, RLUSD_ISSUER
+from db.database import CustomerWallet
+
+USD_HEX = text_to_hex("USD")
+
+class FakeClient:
+    """Minimal async XRPL client returning canned account_lines results."""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    async def request(self, request):
+        assert isinstance(request, AccountLines), f"Unexpected request {request}"
+        lines = self.lines.get(request.account)
+        if lines is None:
+            return Response(status=ResponseStatus.ERROR, result={"error": "actNotFound"})
+        return Response(status=ResponseStatus.SUCCESS, result={"lines": lines})
+
+def trustline(currency, limit="1000000000", issuer=RLUSD_ISSUER):
+    return {"account": issuer, "currency": currency, "balance": "0", "limit": limit}
+
+class TestRequiredTrustSet(unittest.TestCase):
+    """Test cases for deciding whether a TrustSet is needed."""
+
+    def test_missing_line(self):
+        """Test that a TrustSet creates the line when the account has none for the issuer and currency."""
+        self.assertEqual(required_trustset([], RLUSD_ISSUER, RLUSD_CURRENCY_HEX, "1000000000"), TrustlineStatus.CREATED)
+        self.assertEqual(required_trustset([trustline(RLUSD_CURRENCY_HEX, issuer="rOther")], RLUSD_ISSUER,
+                                           RLUSD_CURRENCY_HEX, "1000000000"), TrustlineStatus.CREATED)
+
+    def test_low_limit(self):
+        """Test that a line with a different limit is updated."""
+        self.assertEqual(required_trustset([trustline(RLUSD_CURRENCY_HEX, limit="100")], RLUSD_ISSUER,
+                                           RLUSD_CURRENCY_HEX, "1000000000"), TrustlineStatus.UPDATED)
+
+    def test_already_set(self):
+        """Test that a line with the desired limit is skipped, whether reported in hex or ASCII."""
+        self.assertIsNone(required_trustset([trustline(RLUSD_CURRENCY_HEX, limit="1e9")], RLUSD_ISSUER,
+                                            RLUSD_CURRENCY_HEX, "1000000000"))
+        self.assertIsNone(required_trustset([trustline("USD")], RLUSD_ISSUER, USD_HEX, "1000000000"))
+
+    def test_other_currency_does_not_match(self):
+        """Test that an existing RLUSD line does not satisfy a line for another currency."""
+        lines = [trustline(RLUSD_CURRENCY_HEX), trustline("RLUSD")]
+        self.assertEqual(required_trustset(lines, RLUSD_ISSUER, USD_HEX, "1000000000"), TrustlineStatus.CREATED)
+
+class TestProvisionTrustlines(unittest.IsolatedAsyncioTestCase):
+    """Test cases for provisioning many accounts without ledger access."""
+
+    async def test_report_aggregates_outcomes(self):
+        """Test one created, updated, skipped and failed account in one run."""
+        wallets = [Wallet.create() for _ in range(4)]
+        customers = [CustomerWallet(f"customer-{i}", wallet.classic_address, wallet.seed)
+                     for i, wallet in enumerate(wallets)]
+        customers.append(CustomerWallet("customer-bad-seed", "rBad", "not-a-seed"))
+        client = FakeClient({
+            wallets[0].classic_address: [],
+            wallets[1].classic_address: [trustline(RLUSD_CURRENCY_HEX, limit="5")],
+            wallets[2].classic_address: [trustline(RLUSD_CURRENCY_HEX)]
+            # wallets[3] is not funded, so account_lines fails
+        })
+        submitted = Response(status=ResponseStatus.SUCCESS,
+                             result={"hash": "HASH", "meta": {"TransactionResult": "tesSUCCESS"}})
+        submit = AsyncMock(return_value=submitted)
+
+        with patch.object(trustlines, "get_client", return_value=client), \
+                patch.object(trustlines, "submit_and_wait", submit):
+            report = await trustlines.provision_trustlines(limit_amount="1000000000", customers=customers)
+
+        self.assertEqual([result.status for result in report.results],
+                         [TrustlineStatus.CREATED, TrustlineStatus.UPDATED, TrustlineStatus.SKIPPED,
+                          TrustlineStatus.FAILED, TrustlineStatus.FAILED])
+        self.assertEqual(report.counts(), {"created": 1, "updated": 1, "skipped": 1, "failed": 2})
+        self.assertEqual([failure.customer_id for failure in report.failures], ["customer-3", "customer-bad-seed"])
+        self.assertEqual(report.results[0].transaction_hash, "HASH")
+        self.assertEqual(submit.await_count, 2)
+        self.assertEqual(report.summary(), "5 accounts: 1 created, 1 updated, 1 already present, 2 failed")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""Tests for request-scoped units of work."""
+
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from db.database import Donations, IdempotencyKey, IdempotencyStatus
+from service import api_server
+from tests import AsyncDatabaseTestCase, DatabaseTestCase
+
+class TestUnitOfWork(DatabaseTestCase):
+    """Test cases for Database.unit_of_work."""
+
+    def setUp(self):
+        """Set up a throwaway database that counts connection checkouts."""
+        super().setUp()
+        self.checkouts = 0
+        event.listen(self.db.engine, "checkout", self.count_checkout)
+
+    def tearDown(self):
+        """Stop the write-behind buffer."""
+        self.db.disable_write_behind()
+
+    def count_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def donation(self, customer_id="donor-1"):
+        return {"customer_id": customer_id, "cause_id": "cause-1", "amount": 10}
+
+    def count_donations(self):
+        with self.db.session_factory() as session:
+            return session.query(Donations).count()
+
+    def test_calls_share_one_connection(self):
+        """Test that the calls of a unit of work use one connection and are committed together."""
+        with self.db.unit_of_work() as unit_of_work:
+            self.db.claim_idempotency_key("/donate", "key-1", "hash")
+            self.db.insert_donations([self.donation()])
+            self.db.insert_donations([self.donation("donor-2")])
+            self.db.get_donor_statement("donor-1")
+            self.db.complete_idempotency_key("/donate", "key-1", "{}")
+        # One connection for the unit, one for the idempotency claim
+        self.assertEqual(self.checkouts, 2)
+        self.assertEqual(unit_of_work.commits, 1)
+        self.assertEqual(self.count_donations(), 2)
+        self.assertEqual(self.db.get_idempotency_key("/donate", "key-1")["status"], IdempotencyStatus.COMPLETED)
+
+    def test_exception_rolls_back(self):
+        """Test that an exception in the block rolls back all calls of the unit."""
+        with self.assertRaises(RuntimeError):
+            with self.db.unit_of_work():
+                self.db.insert_donations([self.donation()])
+                raise RuntimeError("boom")
+        self.assertEqual(self.count_donations(), 0)
+
+    def test_failed_call_aborts_unit(self):
+        """Test that the unit cannot be used after one of its calls rolled it back."""
+        with self.db.unit_of_work() as unit_of_work:
+            self.db.insert_donations([self.donation()])
+            with self.assertRaises(Exception):
+                self.db.insert_donations([self.donation(None)])
+            with self.assertRaises(RuntimeError):
+                self.db.insert_donations([self.donation("donor-2")])
+            unit_of_work.rollback()
+            # An explicit rollback starts over
+            self.db.insert_donations([self.donation("donor-3")])
+        self.assertEqual(self.count_donations(), 1)
+
+    def test_commit_on_exit_disabled(self):
+        """Test that only explicitly committed work is kept when commit_on_exit is off."""
+        with self.db.unit_of_work(commit_on_exit=False) as unit_of_work:
+            self.db.insert_donations([self.donation()])
+            unit_of_work.commit()
+            self.db.insert_donations([self.donation("donor-2")])
+        self.assertEqual(self.count_donations(), 1)
+
+    def test_release_rolls_back_unit(self):
+        """Test that releasing the key of a failed request discards the request's writes."""
+        with self.db.unit_of_work():
+            self.db.claim_idempotency_key("/donate", "key-1", "hash")
+            self.db.insert_donations([self.donation()])
+            self.db.release_idempotency_key("/donate", "key-1")
+        self.assertEqual(self.count_donations(), 0)
+        self.assertIsNone(self.db.get_idempotency_key("/donate", "key-1"))
+
+    def test_write_behind_joins_unit(self):
+        """Test that buffered writes join the unit instead of committing on their own."""
+        self.db.enable_write_behind()
+        with self.assertRaises(RuntimeError):
+            with self.db.unit_of_work():
+                self.db.insert_donation("donor-1", "cause-1", 10)
+                raise RuntimeError("boom")
+        self.assertEqual(self.count_donations(), 0)
+
+class TestUnitOfWorkDependency(AsyncDatabaseTestCase):
+    """Test cases for the API's request-scoped unit of work."""
+
+    def setUp(self):
+        """Set up a throwaway database that counts connection checkouts."""
+        super().setUp()
+        self.checkouts = 0
+        event.listen(self.db.engine, "checkout", self.count_checkout)
+
+    def count_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    async def test_donate(self):
+        """Test that /donate commits the donation and its stored response on one connection."""
+        request = api_server.DonationRequest(customer_id="donor-1", cause_id="cause-1", amount=10)
+        with patch.object(api_server, "get_db", return_value=self.db), \
+             patch("service.idempotency.get_db", return_value=self.db):
+            dependency = api_server.get_unit_of_work()
+            unit_of_work = await anext(dependency)
+            await api_server.register_donation(request, "key-1", unit_of_work)
+            await dependency.aclose()
+
+        # One connection for the request, one for the idempotency claim
+        self.assertEqual(self.checkouts, 2)
+        with self.db.session_factory() as session:
+            self.assertEqual(session.query(Donations).count(), 1)
+            self.assertEqual(session.get(IdempotencyKey, ("/donate", "key-1")).status, IdempotencyStatus.COMPLETED)
+
+    async def test_uncommitted_work_is_rolled_back(self):
+        """Test that the dependency does not commit on teardown."""
+        with patch.object(api_server, "get_db", return_value=self.db):
+            dependency = api_server.get_unit_of_work()
+            await anext(dependency)
+            self.db.insert_donations([{"customer_id": "donor-1", "cause_id": "cause-1", "amount": 10}])
+            await dependency.aclose()
+        with self.db.session_factory() as session:
+            self.assertEqual(session.query(Donations).count(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
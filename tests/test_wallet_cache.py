@@ -0,0 +1,86 @@
+"""Tests for the derived wallet cache."""
+
+import unittest
+from unittest.mock import patch
+
+from xrpl.wallet import Wallet
+
+from blockchain import wallet as wallet_module
+from blockchain.wallet import WalletCache
+from db.database import CustomerType
+from tests import DatabaseTestCase
+
+class TestWalletCache(DatabaseTestCase):
+    """Test cases for WalletCache."""
+    
+    def setUp(self):
+        """Set up a throwaway database with three customers."""
+        super().setUp()
+        self.wallets = {f"customer-{i}": Wallet.create() for i in range(3)}
+        for customer_id, wallet in self.wallets.items():
+            self.db.add_customer(customer_id, wallet.seed, CustomerType.SENDER, wallet.classic_address, None)
+        patcher = patch.object(wallet_module, "db", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.seed_lookups = patch.object(self.db, "get_customer_seed", wraps=self.db.get_customer_seed).start()
+        self.addCleanup(patch.stopall)
+    
+    def test_hits_skip_database_and_derivation(self):
+        """Test that repeated lookups are served from memory."""
+        cache = WalletCache(max_size=10, ttl_seconds=60)
+        first = cache.get("customer-0")
+        second = cache.get("customer-0")
+        
+        self.assertIs(first, second)
+        self.assertEqual(first.classic_address, self.wallets["customer-0"].classic_address)
+        self.assertEqual(self.seed_lookups.call_count, 1)
+    
+    def test_evicts_least_recently_used(self):
+        """Test the LRU bound."""
+        cache = WalletCache(max_size=2, ttl_seconds=60)
+        cache.get("customer-0")
+        cache.get("customer-1")
+        cache.get("customer-0")
+        cache.get("customer-2")
+        
+        self.assertEqual(len(cache), 2)
+        cache.get("customer-0")
+        self.assertEqual(self.seed_lookups.call_count, 3)
+        cache.get("customer-1")
+        self.assertEqual(self.seed_lookups.call_count, 4)
+    
+    def test_get_many_loads_misses_in_one_query(self):
+        """Test that bulk lookups fetch only the missing wallets, together."""
+        cache = WalletCache(max_size=10, ttl_seconds=60)
+        cache.get("customer-0")
+        with patch.object(self.db, "get_customers", wraps=self.db.get_customers) as get_customers:
+            wallets = cache.get_many(["customer-0", "customer-1", "customer-2", "missing"])
+        
+        self.assertEqual(sorted(wallets), ["customer-0", "customer-1", "customer-2"])
+        self.assertEqual(wallets["customer-2"].classic_address, self.wallets["customer-2"].classic_address)
+        get_customers.assert_called_once()
+        self.assertEqual(sorted(get_customers.call_args.args[0]), ["customer-1", "customer-2", "missing"])
+        self.assertEqual(len(cache), 3)
+    
+    def test_expires_after_ttl(self):
+        """Test that entries are re-derived after the TTL."""
+        cache = WalletCache(max_size=10, ttl_seconds=0)
+        cache.get("customer-0")
+        cache.get("customer-0")
+        self.assertEqual(self.seed_lookups.call_count, 2)
+    
+    def test_seed_change_invalidates_entry(self):
+        """Test that updating a customer's seed drops the cached wallet."""
+        wallet_module.wallet_cache.clear()
+        before = wallet_module.get_customer_wallet("customer-1")
+        rotated = Wallet.create()
+        self.db.update_customer_seed("customer-1", rotated.seed, rotated.classic_address)
+        after = wallet_module.get_customer_wallet("customer-1")
+        
+        self.assertEqual(before.classic_address, self.wallets["customer-1"].classic_address)
+        self.assertEqual(after.classic_address, rotated.classic_address)
+        wallet_module.clear_wallet_cache()
+        self.assertEqual(len(wallet_module.wallet_cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
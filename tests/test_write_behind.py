@@ -0,0 +1,89 @@
+"""Tests for write-behind group commit."""
+
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from db.database import CustomerType, Donations, Transaction, TransactionStatus, TransactionType
+from db.write_behind import WriteBehindBuffer
+from tests import DatabaseTestCase
+
+class Abort(BaseException):
+    """Stands in for SystemExit or KeyboardInterrupt raised inside a write."""
+
+class TestWriteBehind(DatabaseTestCase):
+    """Test cases for Database write-behind."""
+    
+    def setUp(self):
+        """Set up a throwaway database with write-behind enabled."""
+        super().setUp()
+        self.db.add_customer("sender-1", "", CustomerType.SENDER, "r1", None)
+        self.db.add_customer("receiver-1", "", CustomerType.RECEIVER, "r2", None)
+        self.db.enable_write_behind(max_batch_size=50, max_delay_seconds=0.05)
+    
+    def tearDown(self):
+        """Stop the write-behind buffer."""
+        self.db.disable_write_behind()
+    
+    def test_concurrent_writes_share_commits(self):
+        """Test that concurrent inserts are durable on return and batched."""
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            donation_ids = list(pool.map(
+                lambda i: self.db.insert_donation(f"donor-{i}", "cause-1", i + 1), range(100)
+            ))
+        
+        with self.db.Session() as session:
+            self.assertEqual(session.query(Donations).filter(Donations.donation_id.in_(donation_ids)).count(), 100)
+        metrics = self.db.write_behind.metrics()
+        self.assertEqual(metrics["writes"], 100)
+        self.assertLess(metrics["batches"], 100)
+    
+    def test_failing_write_does_not_fail_its_batch(self):
+        """Test that only the caller of a bad write sees its error."""
+        def insert(transaction_hash):
+            try:
+                self.db.insert_transaction(transaction_hash, "sender-1", "receiver-1", 1, "RLUSD",
+                                           TransactionType.PAYMENT, TransactionStatus.SUCCESS)
+                return True
+            except Exception:
+                return False
+        
+        insert("hash-0")
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(insert, [f"hash-{i}" for i in range(10)]))
+        
+        self.assertEqual(results, [False] + [True] * 9)
+        with self.db.Session() as session:
+            self.assertEqual(session.query(Transaction).count(), 10)
+
+    def test_aborted_batch_does_not_hang(self):
+        """Test that a BaseException in a write fails the batch and queued writes and lets close() return."""
+        buffer = WriteBehindBuffer(self.db.Session, max_batch_size=2, max_delay_seconds=0.5)
+        release = threading.Event()
+        
+        def abort(session):
+            release.wait(5)
+            raise Abort()
+        
+        with patch("threading.excepthook"):
+            aborted = buffer.submit(abort)
+            batched = buffer.submit(lambda session: "batched")
+            while buffer.metrics()["pending"]:
+                time.sleep(0.01)
+            queued = buffer.submit(lambda session: "queued")
+            release.set()
+            buffer.close()
+        
+        for future in (aborted, batched, queued):
+            self.assertTrue(future.done())
+        with self.assertRaises(RuntimeError):
+            batched.result()
+        with self.assertRaises(RuntimeError):
+            queued.result()
+        with self.assertRaises(RuntimeError):
+            buffer.submit(lambda session: None)
+
+if __name__ == '__main__':
+    unittest.main()
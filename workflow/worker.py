@@ -37,6 +37,11 @@ async def main():
         await worker.run()
     except Exception as e:
         logger.error(f"Worker failed to start: {e}")
+    finally:
+        # Wallets are only cached if blockchain activities ran in this process
+        wallet_module = sys.modules.get("blockchain.wallet")
+        if wallet_module:
+            wallet_module.clear_wallet_cache()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file